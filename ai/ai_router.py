@@ -1,21 +1,42 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, Depends, Request, Header
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware 
-from .asr.asr_service import transcribe_file, analyze
-from .tts.tts_service import synthesize_to_wav
+from contextlib import asynccontextmanager
+from .asr.asr_service import warm_default_model
+from .tts.tts_formats import negotiate, stream_audio
 from .llm.llm_service import (
     generate_exercises,
-    generate_microdrills,
     generate_phoneme_lesson,
     generate_saarthi_feedback,  # ✅ NEW import
     generate_pronunciation_mission,
 )
-from .ai_utils import save_upload_file
+from .phonemizer.phoneme_colorizer import colorize_texts, add_color_hints, lesson_hints
+from .scheduler import cpu, gemini, work_priority, Overloaded
+from . import pipeline
+from .schemas import (
+    EvaluateResponse,
+    ExercisesResponse,
+    MicrodrillsResponse,
+    LessonResponse,
+    FeedbackResponse,
+    MissionResponse,
+    ColorizeRequest,
+    ColorizeResponse,
+    Detail,
+)
+from common.metrics import MetricsMiddleware, metrics_response
+from common.responses import FastJSONResponse
+from common.profiling import ProfilingMiddleware, admin_router
 import uvicorn
-import os
 import json
 
-app = FastAPI(title="LexiLift AI (dev)")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load the default Whisper model before the first request
+    warm_default_model()
+    yield
+
+app = FastAPI(title="LexiLift AI (dev)", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # ⭐ ADD CORS HERE
 origins = [
@@ -33,60 +54,130 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, app_name="ai")
+app.add_middleware(ProfilingMiddleware)
+app.include_router(admin_router)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    # shed work: tell the caller when to come back instead of queueing forever
+    return FastJSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return metrics_response()
 
 # --- 1️⃣ ASR Evaluation ---
-@app.post("/asr/evaluate")
-async def evaluate_read_aloud(file: UploadFile = File(...), expected_text: str = Form(...)):
-    path = save_upload_file(file)
-    trans = transcribe_file(path)
-    analysis = analyze(expected_text, trans["text"])
-    return JSONResponse({"transcription": trans, "analysis": analysis})
+@app.post("/asr/evaluate", response_model=EvaluateResponse)
+async def evaluate_read_aloud(
+    file: UploadFile = File(...),
+    expected_text: str = Form(...),
+    exercise_type: str = Form(None),
+    priority: str = Depends(work_priority("interactive")),
+):
+    data = await file.read()
+    return await pipeline.evaluate(data, file.filename, expected_text, exercise_type, priority)
+
+@app.post("/asr/lookup", response_model=EvaluateResponse, responses={404: {"model": Detail}})
+async def lookup_read_aloud(
+    audio_sha256: str = Form(...),
+    expected_text: str = Form(...),
+    exercise_type: str = Form(None),
+):
+    """
+    Returns a cached (or in-flight) evaluation for this audio hash without
+    uploading the audio. 404 means the caller has to POST /asr/evaluate.
+    """
+    result = await pipeline.lookup(audio_sha256, expected_text, exercise_type)
+    if result is None:
+        return FastJSONResponse({"detail": "not cached"}, status_code=404)
+    return result
 
 # --- 2️⃣ TTS ---
-@app.post("/tts/speak")
-async def tts_speak(text: str = Form(...)):
-    wav = synthesize_to_wav(text)
-    return FileResponse(wav, media_type="audio/wav", filename=os.path.basename(wav))
+@app.post("/tts/speak", response_class=StreamingResponse)
+async def tts_speak(
+    text: str = Form(...),
+    format: str = Form(None),
+    accept: str = Header(None),
+    priority: str = Depends(work_priority("interactive")),
+):
+    """
+    Streams the spoken text as WAV (default), Opus/OGG or 16/8 kHz WAV,
+    picked by the format field or the Accept header.
+    """
+    try:
+        fmt = negotiate(format, accept)
+    except ValueError as e:
+        return FastJSONResponse({"detail": str(e)}, status_code=400)
+    path = await pipeline.speak(text, priority, fmt)
+    return stream_audio(path, fmt)
+
+# --- Phoneme colorization ---
+@app.post("/phonemes/colorize", response_model=ColorizeResponse)
+async def phonemes_colorize(req: ColorizeRequest, priority: str = Depends(work_priority("interactive"))):
+    """
+    Colors whole exercise lists / sentences in one call: every grapheme gets the
+    color of the sound it spells; unseen words share a single espeak call.
+    """
+    items = await cpu.run(priority, colorize_texts, req.texts, req.level)
+    return {"items": items}
 
 # --- 3️⃣ Generate Exercises ---
-@app.post("/llm/generate_exercises")
-async def llm_generate(level: int = Form(1), patterns: str = Form("{}"), count: int = Form(10)):
+@app.post("/llm/generate_exercises", response_model=ExercisesResponse)
+async def llm_generate(
+    level: int = Form(1),
+    patterns: str = Form("{}"),
+    count: int = Form(10),
+    priority: str = Depends(work_priority("prefetch")),
+):
     try:
         p = json.loads(patterns)
     except Exception:
         p = {}
-    ex = generate_exercises(level, p, count)
-    return JSONResponse({"exercises": ex})
+    def generate():
+        # color hints are computed locally instead of asking Gemini for them
+        return add_color_hints(generate_exercises(level, p, count), level)
+
+    ex = await gemini.run(priority, generate)
+    return {"exercises": ex}
 
 # --- 4️⃣ Generate Microdrills ---
-@app.post("/llm/generate_microdrills")
-async def llm_generate_microdrills(payload: dict):
-    try:
-        drills = generate_microdrills(payload)
-        return JSONResponse({"microdrills": drills})
-    except Exception as e:
-        print("Error generating microdrills:", e)
-        return JSONResponse({"microdrills": []})
+@app.post("/llm/generate_microdrills", response_model=MicrodrillsResponse)
+async def llm_generate_microdrills(payload: dict, priority: str = Depends(work_priority("prefetch"))):
+    return {"microdrills": await pipeline.microdrills(payload, priority)}
 
 # --- 5️⃣ Generate Phoneme Lesson ---
-@app.post("/llm/generate_lesson")
-async def llm_generate_lesson(phoneme: str = Form(...), difficulty: int = Form(1)):
-    lesson = generate_phoneme_lesson(phoneme, difficulty)
-    return JSONResponse({"lesson": lesson})
+@app.post("/llm/generate_lesson", response_model=LessonResponse)
+async def llm_generate_lesson(
+    phoneme: str = Form(...),
+    difficulty: int = Form(1),
+    priority: str = Depends(work_priority("prefetch")),
+):
+    def generate():
+        lesson = generate_phoneme_lesson(phoneme, difficulty)
+        lesson["phoneme_color_hints"] = lesson_hints(phoneme, lesson.get("examples") or [])
+        return lesson
+
+    lesson = await gemini.run(priority, generate)
+    return {"lesson": lesson}
 
 # --- 6️⃣ Saarthi Motivational Feedback ---
-@app.post("/llm/feedback")
-async def llm_feedback(accuracy: float = Form(...)):
+@app.post("/llm/feedback", response_model=FeedbackResponse)
+async def llm_feedback(accuracy: float = Form(...), priority: str = Depends(work_priority("interactive"))):
     """
     Returns a short Saarthi motivational message based on session accuracy.
     """
-    feedback = generate_saarthi_feedback(accuracy)
-    return JSONResponse({"feedback": feedback})
+    feedback = await gemini.run(priority, generate_saarthi_feedback, accuracy)
+    return {"feedback": feedback}
 
 
 # --- 7️⃣ Generate Pronunciation Mission ---
-@app.post("/llm/generate_mission")
-async def llm_generate_mission(level: int = Form(1)):
+@app.post("/llm/generate_mission", response_model=MissionResponse)
+async def llm_generate_mission(level: int = Form(1), priority: str = Depends(work_priority("prefetch"))):
     """
     Creates a pronunciation mission:
     - mission title
@@ -94,8 +185,8 @@ async def llm_generate_mission(level: int = Form(1)):
     - target phonemes 
     """
 
-    mission = generate_pronunciation_mission(level)
-    return JSONResponse({"mission": mission})
+    mission = await gemini.run(priority, generate_pronunciation_mission, level)
+    return {"mission": mission}
 
 
 if __name__ == "__main__":
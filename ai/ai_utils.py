@@ -6,9 +6,12 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent
 
 def save_upload_file(upload_file, dest_folder=ROOT / "uploads"):
+    return save_upload_bytes(upload_file.file.read(), upload_file.filename, dest_folder)
+
+def save_upload_bytes(data: bytes, original_name: str, dest_folder=ROOT / "uploads"):
     dest_folder.mkdir(parents=True, exist_ok=True)
-    filename = f"{uuid.uuid4().hex}_{upload_file.filename}"
+    filename = f"{uuid.uuid4().hex}_{original_name}"
     out_path = dest_folder / filename
     with open(out_path, "wb") as f:
-        f.write(upload_file.file.read())
+        f.write(data)
     return str(out_path)
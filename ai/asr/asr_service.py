@@ -1,30 +1,113 @@
 # ai/asr/asr_service.py
-from faster_whisper import WhisperModel
-from phonemizer import phonemize
 from difflib import SequenceMatcher
 import os
 from pathlib import Path
 from ..ai_utils import ROOT
+from common.metrics import span
 import numpy as np
+from .model_registry import ModelRegistry, DECODE_PRESETS, decode_options
+from ..phonemizer.phoneme_colorizer import phonemes_for
 
-# Initialize model once per process
-ASR_MODEL_NAME = os.environ.get("ASR_MODEL", "tiny")  # tiny, small, medium
-_whisper_model = WhisperModel(ASR_MODEL_NAME, device="cpu", compute_type="int8")
+# Models the router may pick from, smallest/fastest first
+ASR_MODELS = [
+    m.strip() for m in os.environ.get("ASR_MODELS", os.environ.get("ASR_MODEL", "tiny")).split(",") if m.strip()
+] or ["tiny"]
+# Default model (used when no routing information is available); one of ASR_MODELS
+ASR_MODEL_NAME = os.environ.get("ASR_MODEL", ASR_MODELS[0])  # tiny, small, medium
+if ASR_MODEL_NAME not in ASR_MODELS:
+    raise ValueError(f"ASR_MODEL={ASR_MODEL_NAME!r} is not in ASR_MODELS ({', '.join(ASR_MODELS)})")
 
-def transcribe_file(path, language="en"):
-    # faster-whisper returns segments, we join them
-    segments, info = _whisper_model.transcribe(str(path), language=language)
-    text = " ".join([seg.text.strip() for seg in segments]).strip()
-    return {"text": text, "duration_s": info.duration if hasattr(info, "duration") else None}
+# Models are loaded lazily and shared for the whole process
+registry = ModelRegistry()
+# Set in multi-worker deployments: decoding goes to the shared decode host (ai/serve.py)
+_remote_decoder = None
+
+# -----------------------------------------------------------
+# Routing policy
+# -----------------------------------------------------------
+# tier 0 = single words, 1 = short sentences, 2 = long sentences
+TIER_PRESETS = ["fast", "balanced", "accurate"]
+# some exercise types always need at least a given tier
+EXERCISE_TIER_FLOOR = {
+    "mission": 1,
+}
+
+def route(expected_text=None, exercise_type=None):
+    """Picks a model and decoding preset for one request."""
+    if not expected_text:
+        return {"model": ASR_MODEL_NAME, "preset": "balanced", "reason": "no_expected_text"}
+
+    n_words = len(expected_text.split())
+    if n_words <= 2:
+        tier = 0
+    elif n_words <= 8:
+        tier = 1
+    else:
+        tier = 2
+    tier = max(tier, EXERCISE_TIER_FLOOR.get(exercise_type, 0))
+
+    model = ASR_MODELS[min(tier, len(ASR_MODELS) - 1)]
+    return {
+        "model": model,
+        "preset": TIER_PRESETS[tier],
+        "reason": f"{n_words}_words" + (f"+{exercise_type}" if exercise_type else ""),
+    }
+
+def use_decode_host(address, authkey):
+    """Sends all decoding in this process to a shared decode host instead of loading models."""
+    global _remote_decoder
+    from .decode_host import RemoteDecoder
+
+    _remote_decoder = RemoteDecoder(address, authkey)
+
+def warm_default_model():
+    if _remote_decoder is None:
+        registry.get(ASR_MODEL_NAME)
+
+def transcribe_file(path, language="en", expected_text=None, exercise_type=None, route_info=None):
+    route_info = route_info or route(expected_text, exercise_type)
+    if route_info["preset"] not in DECODE_PRESETS:
+        route_info = dict(route_info, preset="balanced")
+    if _remote_decoder is not None:
+        with span("asr.decode_remote", f'{route_info["model"]}/{route_info["preset"]}'):
+            return _remote_decoder.transcribe(
+                path=str(path), language=language, expected_text=expected_text, route_info=route_info
+            )
+    return transcribe_local(path, language, expected_text, route_info)
+
+def transcribe_local(path, language, expected_text, route_info):
+    model = registry.get(route_info["model"])
+    # faster-whisper returns segments (lazily decoded), we join them
+    with span("asr.decode", f'{route_info["model"]}/{route_info["preset"]}'):
+        segments, info = model.transcribe(
+            str(path),
+            language=language,
+            **decode_options(route_info["preset"], expected_text),
+        )
+        text = " ".join([seg.text.strip() for seg in segments]).strip()
+    return {
+        "text": text,
+        "duration_s": info.duration if hasattr(info, "duration") else None,
+        "route": route_info,
+    }
 
 def _phonemes_of(word):
-    # simple phonemizer, returns ipa-like string per word
+    # simple phonemizer, returns ipa-like string per word (cached; see _prefetch_phonemes)
     try:
-        phones = phonemize(word, language="en-us", backend="espeak", strip=True, with_stress=False)
+        with span("asr.phonemize"):
+            phones = "".join(phonemes_for([word])[word.lower()])
     except Exception:
         phones = word
     return phones
 
+def _prefetch_phonemes(words):
+    # one espeak call for every word of the utterance instead of one per word
+    try:
+        with span("asr.phonemize", "batch"):
+            phonemes_for(words)
+    except Exception:
+        pass
+
 def phoneme_similarity(a, b):
     # Compare phoneme strings with SequenceMatcher (0..1)
     if not a or not b:
@@ -34,6 +117,7 @@ def phoneme_similarity(a, b):
 def analyze(expected_text, spoken_text):
     expected_words = expected_text.strip().lower().split()
     spoken_words = spoken_text.strip().lower().split()
+    _prefetch_phonemes(expected_words + spoken_words)
 
     results = []
     for i, exp in enumerate(expected_words):
@@ -0,0 +1,92 @@
+# ai/asr/decode_host.py
+"""
+Shared Whisper decode host for multi-worker deployments (see ai/serve.py).
+
+One process loads the Whisper weights (CTranslate2 shares them between its
+num_workers replicas), and every uvicorn worker sends decode requests to it over
+a Unix socket instead of loading its own copy. Only the audio file path
+crosses the socket; uploads are already saved to disk by the worker.
+"""
+import os
+import threading
+from multiprocessing.connection import Listener, Client
+
+
+def serve(address, authkey, preload=(), on_ready=None, heartbeat=None):
+    """Runs the decode host forever (call in a dedicated process)."""
+    from . import asr_service
+
+    if heartbeat:
+        # before preloading: a slow model load (first download, small/medium) must not
+        # look like a hang to the supervisor
+        threading.Thread(target=heartbeat, name="heartbeat", daemon=True).start()
+    for name in preload:
+        asr_service.registry.get(name)
+
+    if os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    print(f"ASR decode host ready on {address} (models: {', '.join(asr_service.registry.loaded())})")
+    if on_ready:
+        on_ready()
+
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:
+            print("ASR decode host: rejected connection:", e)
+            continue
+        threading.Thread(target=_handle, args=(conn, asr_service), daemon=True).start()
+
+
+def _handle(conn, asr_service):
+    # one thread per worker connection; faster-whisper releases the GIL while decoding
+    with conn:
+        while True:
+            try:
+                kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                conn.send(("ok", asr_service.transcribe_local(**kwargs)))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class RemoteDecoder:
+    """Client side: one connection per calling thread, reconnecting once on failure."""
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def transcribe(self, **kwargs):
+        for attempt in range(2):
+            try:
+                conn = self._conn()
+                conn.send(kwargs)
+                status, payload = conn.recv()
+                break
+            except (EOFError, OSError, ConnectionError):
+                self._drop()
+                if attempt:
+                    raise
+        if status != "ok":
+            raise RuntimeError(f"ASR decode host failed: {payload}")
+        return payload
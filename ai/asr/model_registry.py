@@ -0,0 +1,173 @@
+# ai/asr/model_registry.py
+import os
+import threading
+from collections import OrderedDict
+from faster_whisper import WhisperModel
+
+# -----------------------------------------------------------
+# Registry configuration (env driven, like ASR_MODEL)
+# -----------------------------------------------------------
+ASR_DEVICE = os.environ.get("ASR_DEVICE", "cpu")
+ASR_COMPUTE_TYPE = os.environ.get("ASR_COMPUTE_TYPE", "int8")
+ASR_MEMORY_BUDGET_MB = int(os.environ.get("ASR_MEMORY_BUDGET_MB", "1024"))
+ASR_MAX_LOADED_MODELS = int(os.environ.get("ASR_MAX_LOADED_MODELS", "2"))
+# Parallel decodes per model; replicas share the weights (used by the decode host)
+ASR_NUM_WORKERS = int(os.environ.get("ASR_NUM_WORKERS", "1"))
+ASR_CPU_THREADS = int(os.environ.get("ASR_CPU_THREADS", "0"))
+
+# Rough resident size of each faster-whisper model at int8 (MB).
+# Used only to decide when to unload; not an exact measurement.
+MODEL_FOOTPRINT_MB = {
+    "tiny": 75,
+    "tiny.en": 75,
+    "base": 145,
+    "base.en": 145,
+    "small": 480,
+    "small.en": 480,
+    "medium": 1500,
+    "medium.en": 1500,
+    "large-v3": 3100,
+}
+
+
+class ModelRegistry:
+    """
+    Holds several WhisperModels, loading them on first use and unloading the
+    least recently used one when the memory budget or model cap is exceeded.
+    A model that is unloaded while a transcription is still running stays
+    alive until that call drops its reference. A model being loaded counts
+    against the budget from the moment its load is decided.
+    """
+
+    def __init__(self, budget_mb=ASR_MEMORY_BUDGET_MB, max_models=ASR_MAX_LOADED_MODELS):
+        self.budget_mb = budget_mb
+        self.max_models = max(1, max_models)
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._reserved = {}   # name -> MB of models being loaded
+        self._load_done = threading.Condition(self._lock)
+
+    def footprint(self, name):
+        return MODEL_FOOTPRINT_MB.get(name, 500)
+
+    def loaded(self):
+        with self._lock:
+            return list(self._models.keys())
+
+    def used_mb(self):
+        with self._lock:
+            return sum(self.footprint(n) for n in self._models)
+
+    def get(self, name):
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                self._models.move_to_end(name)
+                return model
+            # one loader per model name; other threads wait on it
+            load_lock = self._loading.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                model = self._models.get(name)
+                if model is not None:
+                    self._models.move_to_end(name)
+                    return model
+                # wait for other loads if only they keep this one over budget
+                while not self._evict_for(name):
+                    self._load_done.wait()
+                self._reserved[name] = self.footprint(name)
+
+            print(f"ASR: loading model '{name}' ({ASR_COMPUTE_TYPE}, ~{self.footprint(name)} MB)")
+            try:
+                model = WhisperModel(
+                    name,
+                    device=ASR_DEVICE,
+                    compute_type=ASR_COMPUTE_TYPE,
+                    cpu_threads=ASR_CPU_THREADS,
+                    num_workers=ASR_NUM_WORKERS,
+                )
+            except BaseException:
+                with self._lock:
+                    self._reserved.pop(name, None)
+                    self._loading.pop(name, None)
+                    self._load_done.notify_all()
+                raise
+
+            with self._lock:
+                self._reserved.pop(name, None)
+                self._models[name] = model
+                self._loading.pop(name, None)
+                self._load_done.notify_all()
+            return model
+
+    def _evict_for(self, name):
+        # caller holds self._lock; loads in progress elsewhere count as used
+        need = self.footprint(name) + sum(self._reserved.values())
+        while self._models and (
+            len(self._models) + len(self._reserved) >= self.max_models
+            or sum(self.footprint(n) for n in self._models) + need > self.budget_mb
+        ):
+            victim, _ = self._models.popitem(last=False)
+            print(f"ASR: unloading least recently used model '{victim}'")
+        # with nothing else loading, a model larger than the budget still loads
+        return not self._reserved or (
+            len(self._models) + len(self._reserved) < self.max_models
+            and sum(self.footprint(n) for n in self._models) + need <= self.budget_mb
+        )
+
+    def unload(self, name):
+        with self._lock:
+            return self._models.pop(name, None) is not None
+
+
+# -----------------------------------------------------------
+# Decoding presets
+# -----------------------------------------------------------
+DECODE_PRESETS = {
+    # single words: greedy, no fallback, bias towards the expected word
+    "fast": {
+        "beam_size": 1,
+        "temperature": [0.0],
+        "without_timestamps": True,
+        "condition_on_previous_text": False,
+        "use_hotwords": True,
+        "use_prompt": False,
+    },
+    # short sentences
+    "balanced": {
+        "beam_size": 3,
+        "temperature": [0.0, 0.4],
+        "without_timestamps": True,
+        "condition_on_previous_text": False,
+        "use_hotwords": False,
+        "use_prompt": True,
+    },
+    # long mission sentences / passages
+    "accurate": {
+        "beam_size": 5,
+        "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+        "without_timestamps": False,
+        "condition_on_previous_text": True,
+        "use_hotwords": False,
+        "use_prompt": True,
+    },
+}
+
+
+def decode_options(preset_name, expected_text=None):
+    """Turns a preset into faster-whisper transcribe() keyword arguments."""
+    preset = DECODE_PRESETS[preset_name]
+    opts = {
+        "beam_size": preset["beam_size"],
+        "temperature": preset["temperature"],
+        "without_timestamps": preset["without_timestamps"],
+        "condition_on_previous_text": preset["condition_on_previous_text"],
+    }
+    if expected_text:
+        if preset["use_hotwords"]:
+            opts["hotwords"] = expected_text
+        if preset["use_prompt"]:
+            opts["initial_prompt"] = expected_text
+    return opts
@@ -0,0 +1,112 @@
+# ai/asr/result_cache.py
+import os
+import time
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+ASR_CACHE_MAX_ENTRIES = int(os.environ.get("ASR_CACHE_MAX_ENTRIES", "512"))
+ASR_CACHE_MAX_MB = float(os.environ.get("ASR_CACHE_MAX_MB", "32"))
+ASR_CACHE_TTL_S = float(os.environ.get("ASR_CACHE_TTL_S", "600"))
+
+
+def audio_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(audio_sha256: str, expected_text: str, route_info: dict) -> str:
+    """Cache key: audio content + expected text + model/preset that decoded it."""
+    return "|".join([
+        audio_sha256,
+        route_info.get("model", ""),
+        route_info.get("preset", ""),
+        expected_text.strip().lower(),
+    ])
+
+
+class ResultCache:
+    """
+    Bounded TTL cache of ASR evaluation results with single-flight:
+    identical requests arriving while the first is still being decoded
+    wait for that result instead of running Whisper again.
+    """
+
+    def __init__(self, max_entries=ASR_CACHE_MAX_ENTRIES, max_mb=ASR_CACHE_MAX_MB, ttl_s=ASR_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()   # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._inflight = {}             # key -> asyncio.Future
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, size, value = item
+        if expires_at < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl_s, size, value)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    async def peek(self, key):
+        """Returns a cached or in-flight result for key, or None. Never computes."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        fut = self._inflight.get(key)
+        if fut is not None:
+            try:
+                return await asyncio.shield(fut)
+            except Exception:
+                return None
+        return None
+
+    async def get_or_compute(self, key, compute):
+        """
+        Returns (value, status) where status is "hit", "joined" (waited for an
+        identical in-flight request) or "miss" (this call ran compute()).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, "hit"
+
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut), "joined"
+
+        # the computation is its own task: if this caller is cancelled (client went
+        # away), requests that joined it still get the result
+        task = asyncio.get_running_loop().create_task(compute())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task), "miss"
+
+    def _finish(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is None:   # also marks the exception retrieved when nobody waits
+            self.put(key, task.result())
@@ -0,0 +1,300 @@
+# ai/batch_score.py
+"""
+Offline batch scoring of recorded audio (re-score a term's recordings after a
+scoring change without going through /asr/evaluate).
+
+    python -m ai.batch_score manifest.csv --out scores.jsonl
+    python -m ai.batch_score manifest.jsonl --out scores.parquet --decode-workers 4
+
+Manifest: CSV with a header, or JSONL, with the fields
+    audio_path     (required; relative paths are resolved against --audio-root,
+                    default: the manifest's folder)
+    expected_text  (required)
+    id             (optional, default: audio_path)
+    exercise_type  (optional, used for model routing like the API)
+
+Pipeline (one process per box, all overlapped, bounded queues in between):
+    reader thread -> decode workers (Whisper, each loads the model once)
+                  -> analyze workers (espeak phonemization + scoring)
+                  -> writer (this process: JSONL append + checkpoint)
+
+The JSONL output is its own checkpoint: it is fsynced every
+--checkpoint-every rows and a rerun skips ids already scored with status "ok"
+(failed rows are retried; later rows supersede earlier ones for the same id).
+With a .parquet output the rows are staged in <out>.jsonl and converted
+with pyarrow at the end.
+"""
+import os
+import csv
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import multiprocessing as mp
+from pathlib import Path
+
+STOP = None
+
+
+# -----------------------------------------------------------
+# Manifest / checkpoint
+# -----------------------------------------------------------
+def read_manifest(path, audio_root=None):
+    path = Path(path)
+    root = Path(audio_root) if audio_root else path.parent
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    items, seen = [], set()
+    for n, row in enumerate(rows, 1):
+        audio = (row.get("audio_path") or "").strip()
+        expected = (row.get("expected_text") or "").strip()
+        if not audio or not expected:
+            print(f"manifest row {n}: missing audio_path or expected_text, skipped", file=sys.stderr)
+            continue
+        item_id = str(row.get("id") or audio)
+        if item_id in seen:
+            print(f"manifest row {n}: duplicate id {item_id!r}, skipped", file=sys.stderr)
+            continue
+        seen.add(item_id)
+        audio_path = Path(audio)
+        if not audio_path.is_absolute():
+            audio_path = root / audio_path
+        items.append({
+            "id": item_id,
+            "audio_path": str(audio_path),
+            "expected_text": expected,
+            "exercise_type": (row.get("exercise_type") or "").strip() or None,
+        })
+    return items
+
+
+def load_checkpoint(jsonl_path):
+    """Ids already scored successfully in an existing output file."""
+    done = set()
+    if not os.path.exists(jsonl_path):
+        return done
+    with open(jsonl_path, "rb") as f:
+        data = f.read()
+    for line in data.splitlines():
+        try:
+            row = json.loads(line)
+        except ValueError:
+            continue  # torn last line from an interrupted run
+        if row.get("status") == "ok":
+            done.add(row["id"])
+        else:
+            done.discard(row.get("id"))
+    if data and not data.endswith(b"\n"):
+        with open(jsonl_path, "ab") as f:
+            f.write(b"\n")
+    return done
+
+
+# -----------------------------------------------------------
+# Workers (separate processes; import the ASR stack lazily)
+# -----------------------------------------------------------
+def decode_worker(tasks, decoded, cpu_threads, model, preset):
+    # must be set before model_registry is imported
+    os.environ["ASR_CPU_THREADS"] = str(cpu_threads)
+    os.environ["ASR_NUM_WORKERS"] = "1"
+    from ai.asr import asr_service
+
+    while True:
+        item = tasks.get()
+        if item is STOP:
+            return
+        t0 = time.perf_counter()
+        try:
+            route_info = asr_service.route(item["expected_text"], item["exercise_type"])
+            if model or preset:
+                route_info = dict(route_info, model=model or route_info["model"],
+                                  preset=preset or route_info["preset"], reason="batch_override")
+            item["transcription"] = asr_service.transcribe_file(
+                item["audio_path"], expected_text=item["expected_text"], route_info=route_info
+            )
+        except Exception as e:
+            item["error"] = f"decode: {type(e).__name__}: {e}"
+        item["decode_s"] = round(time.perf_counter() - t0, 3)
+        decoded.put(item)
+
+
+def analyze_worker(decoded, results):
+    from ai.asr import asr_service
+
+    while True:
+        item = decoded.get()
+        if item is STOP:
+            return
+        if "error" not in item:
+            t0 = time.perf_counter()
+            try:
+                item["analysis"] = asr_service.analyze(item["expected_text"], item["transcription"]["text"])
+            except Exception as e:
+                item["error"] = f"analyze: {type(e).__name__}: {e}"
+            item["analyze_s"] = round(time.perf_counter() - t0, 3)
+        results.put(item)
+
+
+def to_row(item):
+    trans = item.get("transcription") or {}
+    analysis = item.get("analysis") or {}
+    return {
+        "id": item["id"],
+        "audio_path": item["audio_path"],
+        "expected_text": item["expected_text"],
+        "exercise_type": item["exercise_type"],
+        "status": "error" if "error" in item else "ok",
+        "error": item.get("error"),
+        "spoken_text": trans.get("text"),
+        "duration_s": trans.get("duration_s"),
+        "model": (trans.get("route") or {}).get("model"),
+        "preset": (trans.get("route") or {}).get("preset"),
+        "accuracy": analysis.get("accuracy"),
+        "words": analysis.get("words"),
+        "decode_s": item.get("decode_s"),
+        "analyze_s": item.get("analyze_s"),
+        "scored_at": time.time(),
+    }
+
+
+# -----------------------------------------------------------
+# Driver
+# -----------------------------------------------------------
+def default_workers(cores):
+    """Decoding gets ~3/4 of the cores (split into a few multi-threaded
+    processes), phonemization the rest; stages overlap, so a little
+    oversubscription keeps every core busy."""
+    decode = max(1, min(4, cores // 4) or 1)
+    threads = max(1, (cores * 3 // 4) // decode)
+    analyze = max(1, cores - decode * threads) + 1
+    return decode, threads, analyze
+
+
+def run(items, out_jsonl, decode_workers, decode_threads, analyze_workers,
+        model=None, preset=None, checkpoint_every=50, queue_size=64):
+    ctx = mp.get_context("spawn")  # the parent never loads a model; children start clean
+    tasks = ctx.Queue(maxsize=queue_size)
+    decoded = ctx.Queue(maxsize=queue_size)
+    results = ctx.Queue(maxsize=queue_size)
+
+    decoders = [ctx.Process(target=decode_worker, args=(tasks, decoded, decode_threads, model, preset),
+                            name=f"decode-{i}", daemon=True) for i in range(decode_workers)]
+    analyzers = [ctx.Process(target=analyze_worker, args=(decoded, results),
+                             name=f"analyze-{i}", daemon=True) for i in range(analyze_workers)]
+    for p in decoders + analyzers:
+        p.start()
+
+    def feed():
+        for item in items:
+            tasks.put(item)
+        for _ in decoders:
+            tasks.put(STOP)
+
+    threading.Thread(target=feed, name="reader", daemon=True).start()
+
+    total, written, failed = len(items), 0, 0
+    started = last_log = time.time()
+    with open(out_jsonl, "a", encoding="utf-8") as out:
+        while written < total:
+            try:
+                item = results.get(timeout=5)
+            except queue.Empty:
+                dead = [p.name for p in decoders + analyzers if p.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"worker(s) died: {', '.join(dead)}; rerun to resume")
+                continue
+            row = to_row(item)
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            written += 1
+            failed += row["status"] != "ok"
+            if written % checkpoint_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+            if time.time() - last_log >= 10:
+                rate = written / (time.time() - started)
+                print(f"{written}/{total} scored ({failed} failed), {rate:.1f} clips/s, "
+                      f"ETA {(total - written) / max(rate, 1e-9) / 60:.1f} min")
+                last_log = time.time()
+        out.flush()
+        os.fsync(out.fileno())
+
+    for _ in analyzers:
+        decoded.put(STOP)
+    for p in decoders + analyzers:
+        p.join(timeout=30)
+    return written, failed, time.time() - started
+
+
+def write_parquet(jsonl_path, parquet_path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output needs pyarrow (pip install pyarrow); JSONL results kept in " + jsonl_path)
+
+    latest = {}
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            latest[row["id"]] = row
+    pq.write_table(pa.Table.from_pylist(list(latest.values())), parquet_path, compression="zstd")
+    return len(latest)
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 2
+    d, t, a = default_workers(cores)
+    ap = argparse.ArgumentParser(description="Batch-score recorded audio against expected text")
+    ap.add_argument("manifest", help="CSV or JSONL with audio_path, expected_text[, id, exercise_type]")
+    ap.add_argument("--out", required=True, help="output .jsonl or .parquet")
+    ap.add_argument("--audio-root", default=None, help="base folder for relative audio paths")
+    ap.add_argument("--decode-workers", type=int, default=d)
+    ap.add_argument("--decode-threads", type=int, default=t, help="CTranslate2 threads per decode worker")
+    ap.add_argument("--analyze-workers", type=int, default=a)
+    ap.add_argument("--model", default=None, help="force one Whisper model instead of routing")
+    ap.add_argument("--preset", default=None, choices=["fast", "balanced", "accurate"])
+    ap.add_argument("--checkpoint-every", type=int, default=50)
+    ap.add_argument("--limit", type=int, default=0, help="score at most N clips (0 = all)")
+    args = ap.parse_args(argv)
+
+    parquet = args.out.lower().endswith(".parquet")
+    out_jsonl = args.out + ".jsonl" if parquet else args.out
+
+    items = read_manifest(args.manifest, args.audio_root)
+    done = load_checkpoint(out_jsonl)
+    todo = [it for it in items if it["id"] not in done]
+    skipped = len(items) - len(todo)
+    if args.limit:
+        todo = todo[:args.limit]
+    print(f"{len(items)} clips in manifest, {skipped} already scored, "
+          f"{len(todo)} to go ({args.decode_workers} decode x {args.decode_threads} threads, "
+          f"{args.analyze_workers} analyze workers on {cores} cores)")
+
+    if todo:
+        written, failed, elapsed = run(
+            todo, out_jsonl,
+            decode_workers=args.decode_workers,
+            decode_threads=args.decode_threads,
+            analyze_workers=args.analyze_workers,
+            model=args.model,
+            preset=args.preset,
+            checkpoint_every=args.checkpoint_every,
+        )
+        print(f"Scored {written} clips in {elapsed:.0f}s ({written / max(elapsed, 1e-9):.1f} clips/s), {failed} failed")
+
+    if parquet:
+        n = write_parquet(out_jsonl, args.out)
+        print(f"Wrote {n} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import json
 import re
 import google.generativeai as genai
 from dotenv import load_dotenv
+from common.metrics import span, counter
 
 load_dotenv()
 
@@ -15,6 +16,10 @@ if not GEMINI_API_KEY:
 
 genai.configure(api_key=GEMINI_API_KEY)
 
+def reset_client():
+    """Drops cached Gemini clients (call in a forked worker; gRPC channels do not survive fork)."""
+    genai.configure(api_key=GEMINI_API_KEY)
+
 # -----------------------------------------------------------
 # Select Best Available Gemini Model
 # -----------------------------------------------------------
@@ -37,21 +42,49 @@ def get_best_gemini_model():
 
 MODEL_NAME = get_best_gemini_model()
 
+# -----------------------------------------------------------
+# 📈 Metrics
+# -----------------------------------------------------------
+LLM_CALLS = counter("llm_calls_total", "Gemini generate_content attempts", ("outcome",))
+LLM_RETRIES = counter("llm_retries_total", "Gemini calls retried after an empty output or error")
+LLM_JSON_PARSE = counter("llm_json_parse_total", "JSON parsing of Gemini output", ("outcome",))
+LLM_FALLBACKS = counter("llm_fallbacks_total", "Canned fallback content served instead of Gemini output", ("generator",))
+
 # -----------------------------------------------------------
 # 🧩 JSON Parser
 # -----------------------------------------------------------
 def _parse_json_output(raw: str):
     """Extract JSON array/object from raw text safely."""
-    try:
-        return json.loads(raw)
-    except Exception:
-        match = re.search(r'(\[.*\]|\{.*\})', raw, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group(1))
-            except Exception:
-                pass
-    return None
+    with span("llm.parse_json"):
+        try:
+            data = json.loads(raw)
+            LLM_JSON_PARSE.inc(outcome="direct")
+            return data
+        except Exception:
+            match = re.search(r'(\[.*\]|\{.*\})', raw, re.DOTALL)
+            if match:
+                try:
+                    data = json.loads(match.group(1))
+                    LLM_JSON_PARSE.inc(outcome="repaired")
+                    return data
+                except Exception:
+                    pass
+        LLM_JSON_PARSE.inc(outcome="failed")
+        return None
+
+def _as_list(data, key: str):
+    """Normalizes parsed output to a list of objects ({key: [...]} and single objects are unwrapped)."""
+    if isinstance(data, dict):
+        data = data.get(key) if isinstance(data.get(key), list) else [data]
+    if not isinstance(data, list):
+        return None
+    return [d for d in data if isinstance(d, dict)] or None
+
+def _as_object(data):
+    """Normalizes parsed output to a single object (first element of a list)."""
+    if isinstance(data, list):
+        data = next((d for d in data if isinstance(d, dict)), None)
+    return data if isinstance(data, dict) else None
 
 # -----------------------------------------------------------
 # 🧠 Core Gemini Safe Generator
@@ -61,14 +94,17 @@ def _generate(prompt: str, temperature: float = 0.6, max_output_tokens: int = 51
     model = genai.GenerativeModel(MODEL_NAME)
 
     for attempt in range(2):
+        if attempt:
+            LLM_RETRIES.inc()
         try:
-            response = model.generate_content(
-                [prompt],
-                generation_config={
-                    "temperature": temperature,
-                    "max_output_tokens": max_output_tokens,
-                },
-            )
+            with span("llm.gemini_call"):
+                response = model.generate_content(
+                    [prompt],
+                    generation_config={
+                        "temperature": temperature,
+                        "max_output_tokens": max_output_tokens,
+                    },
+                )
 
             text_out = ""
             if getattr(response, "candidates", None):
@@ -78,11 +114,14 @@ def _generate(prompt: str, temperature: float = 0.6, max_output_tokens: int = 51
                             if getattr(p, "text", None):
                                 text_out += p.text.strip() + " "
             if text_out.strip():
+                LLM_CALLS.inc(outcome="ok")
                 return text_out.strip()
 
+            LLM_CALLS.inc(outcome="empty")
             print(f"⚠️ Empty Gemini output (attempt {attempt + 1}). Retrying...")
 
         except Exception as e:
+            LLM_CALLS.inc(outcome="error")
             print(f"⚠️ Gemini call error (attempt {attempt + 1}): {e}")
 
         # Retry with simplified prompt
@@ -97,9 +136,9 @@ def _generate(prompt: str, temperature: float = 0.6, max_output_tokens: int = 51
 # -----------------------------------------------------------
 def generate_exercises(level: int, patterns: dict, count: int = 10):
     level_descriptions = {
-        1: "Focus on simple, short CVC words like 'bat', 'dog', 'cup'. Include phoneme-color hints for every sound.",
-        2: "Use 3–6 word sentences. Add hints only on tricky sounds.",
-        3: "Use 6–10 word sentences for fluent reading. No hints needed.",
+        1: "Focus on simple, short CVC words like 'bat', 'dog', 'cup'.",
+        2: "Use 3–6 word sentences.",
+        3: "Use 6–10 word sentences for fluent reading.",
     }
 
     prompt = f"""
@@ -109,25 +148,24 @@ def generate_exercises(level: int, patterns: dict, count: int = 10):
 
     Create {count} exercises as a JSON array. Each object must have:
     - text: the word or sentence
-    - phoneme_color_hints: list of phoneme:color (optional)
     - difficulty: easy | medium | hard
 
     Return valid JSON only. Example:
     [
       {{
         "text": "bat",
-        "phoneme_color_hints": ["b:#4F46E5","a:#FB923C","t:#10B981"],
         "difficulty": "easy"
       }}
     ]
     """
 
     raw = _generate(prompt)
-    data = _parse_json_output(raw)
+    data = _as_list(_parse_json_output(raw), "exercises")
     if not data:
         print("⚠️ Using fallback exercises (Gemini returned none).")
+        LLM_FALLBACKS.inc(generator="exercises")
         data = [
-            {"text": w, "phoneme_color_hints": [], "difficulty": "easy"}
+            {"text": w, "difficulty": "easy"}
             for w in ["bat", "bag", "dog", "cup", "top", "sun"][:count]
         ]
     return data
@@ -155,9 +193,10 @@ def generate_microdrills(analysis_result: dict):
     """
 
     raw = _generate(prompt)
-    drills = _parse_json_output(raw)
+    drills = _as_list(_parse_json_output(raw), "microdrills")
     if not drills:
         print("⚠️ Gemini returned empty or invalid drills. Using fallback examples.")
+        LLM_FALLBACKS.inc(generator="microdrills")
         drills = [
             {"type": "minimal_pair", "instruction": "Tap the word that sounds different!", "content": [["bat", "bad"], ["bag", "back"]]},
             {"type": "phoneme_isolation", "instruction": "Say the first sound in 'dog'!", "content": ["d"]},
@@ -176,6 +215,7 @@ def generate_saarthi_feedback(accuracy: float):
     """
     msg = _generate(prompt, temperature=0.7, max_output_tokens=50)
     if not msg:
+        LLM_FALLBACKS.inc(generator="feedback")
         msg = "You're doing great! Every word you read makes you stronger!"
     return {"message": msg}
 
@@ -192,24 +232,22 @@ def generate_phoneme_lesson(phoneme: str, difficulty: int = 1):
     Include:
     1. A 2–3 line simple explanation.
     2. 3–5 example words.
-    3. phoneme_color_hints: list of phoneme:color.
 
     Return JSON only:
     {{
       "explanation": "The /b/ sound is made by your lips. Try saying 'bat'!",
-      "examples": ["bat", "ball", "bubble"],
-      "phoneme_color_hints": ["b:#4F46E5","a:#FB923C","t:#10B981"]
+      "examples": ["bat", "ball", "bubble"]
     }}
     """
 
     raw = _generate(prompt, temperature=0.7)
-    lesson = _parse_json_output(raw)
+    lesson = _as_object(_parse_json_output(raw))
     if not lesson:
         print("⚠️ Using fallback phoneme lesson.")
+        LLM_FALLBACKS.inc(generator="lesson")
         lesson = {
             "explanation": f"The /{phoneme}/ sound is made by your lips. Try saying 'bat'!",
             "examples": ["bat", "ball", "bubble"],
-            "phoneme_color_hints": [f"{phoneme}:#4F46E5"]
         }
     return lesson
 
@@ -231,8 +269,9 @@ def generate_pronunciation_mission(level: int = 1):
     """
 
     raw = _generate(prompt)
-    data = _parse_json_output(raw)
+    data = _as_object(_parse_json_output(raw))
     if not data:
+        LLM_FALLBACKS.inc(generator="mission")
         data = {
             "mission_title": "Fallback Mission",
             "sentence": "The sun is bright.",
@@ -0,0 +1,128 @@
+# ai/phonemizer/alignment.py
+"""
+Grapheme-to-phoneme alignment for English words.
+
+align("ship", ("ʃ", "ɪ", "p")) splits the spelling into graphemes and gives
+each one the phonemes it spells:  sh->ʃ  i->ɪ  p->p
+
+A small rule table lists which sounds each grapheme (single letters, digraphs,
+vowel teams, doubled consonants, silent-e) usually makes. A dynamic program
+picks the segmentation that explains the espeak phonemes best, so unusual
+spellings still align: unknown pairings only cost more.
+"""
+
+# grapheme -> sounds it commonly spells ("" = silent). Multi-phoneme sounds are space separated.
+GRAPHEME_SOUNDS = {
+    # consonants
+    "b": {"b"}, "c": {"k", "s"}, "d": {"d", "t"}, "f": {"f"}, "g": {"ɡ", "dʒ"}, "h": {"h", ""},
+    "j": {"dʒ"}, "k": {"k"}, "l": {"l"}, "m": {"m"}, "n": {"n", "ŋ"}, "p": {"p"}, "q": {"k"},
+    "r": {"ɹ"}, "s": {"s", "z", "ʃ", "ʒ"}, "t": {"t", "ɾ", "ʃ"}, "v": {"v"}, "w": {"w"},
+    "x": {"k s", "ɡ z", "z"}, "y": {"j", "aɪ", "i", "ɪ", "iː"}, "z": {"z"},
+    # consonant digraphs / trigraphs
+    "sh": {"ʃ"}, "ch": {"tʃ", "k", "ʃ"}, "tch": {"tʃ"}, "th": {"θ", "ð"}, "ph": {"f"},
+    "wh": {"w", "h"}, "ck": {"k"}, "ng": {"ŋ", "ŋ ɡ"}, "nk": {"ŋ k"}, "qu": {"k w", "k"},
+    "gh": {"", "f", "ɡ"}, "kn": {"n"}, "wr": {"ɹ"}, "gn": {"n"}, "mb": {"m"}, "dge": {"dʒ"},
+    "tion": {"ʃ ə n", "ʃ n"}, "sion": {"ʒ ə n", "ʃ ə n"},
+    "bb": {"b"}, "dd": {"d"}, "ff": {"f"}, "gg": {"ɡ"}, "ll": {"l"}, "mm": {"m"}, "nn": {"n"},
+    "pp": {"p"}, "rr": {"ɹ"}, "ss": {"s"}, "tt": {"t", "ɾ"}, "zz": {"z"},
+    # vowels
+    "a": {"æ", "eɪ", "ɑː", "ə", "ɔː", "ɐ", "ɑ", "ɛ"}, "e": {"ɛ", "iː", "ə", "ɪ", "i", ""},
+    "i": {"ɪ", "aɪ", "iː", "ə", "i"}, "o": {"ɑː", "oʊ", "ʌ", "ə", "uː", "ɔ", "ɔː", "ɑ"},
+    "u": {"ʌ", "uː", "ʊ", "ə", "j uː", "ɪ"},
+    # vowel teams
+    "ai": {"eɪ"}, "ay": {"eɪ"}, "ee": {"iː"}, "ea": {"iː", "ɛ", "eɪ"}, "ey": {"eɪ", "i", "iː"},
+    "ie": {"aɪ", "iː", "i"}, "igh": {"aɪ"}, "oa": {"oʊ"}, "oe": {"oʊ", "uː"}, "oo": {"uː", "ʊ", "ʌ"},
+    "ou": {"aʊ", "ʌ", "uː", "oʊ"}, "ow": {"aʊ", "oʊ"}, "oi": {"ɔɪ"}, "oy": {"ɔɪ"},
+    "au": {"ɔː", "ɑː"}, "aw": {"ɔː"}, "ew": {"uː", "j uː"}, "ue": {"uː", "j uː"}, "ui": {"uː", "ɪ"},
+    "ei": {"eɪ", "iː", "aɪ"}, "eigh": {"eɪ"}, "ough": {"ɔː", "oʊ", "ʌ f", "uː", "aʊ"},
+    # r-controlled vowels
+    "ar": {"ɑːɹ", "ɑː ɹ", "ɚ"}, "or": {"ɔːɹ", "ɔː ɹ", "ɚ", "oːɹ"}, "er": {"ɚ", "ɜː", "ɛɹ"},
+    "ir": {"ɜː", "ɚ"}, "ur": {"ɜː", "ɚ"}, "air": {"ɛɹ"}, "are": {"ɛɹ"}, "ear": {"ɪɹ", "ɜː"},
+    "eer": {"ɪɹ"}, "ere": {"ɪɹ", "ɛɹ"}, "our": {"aʊɚ", "ɔːɹ"}, "ore": {"ɔːɹ", "oːɹ"},
+}
+MAX_GRAPHEME = max(len(g) for g in GRAPHEME_SOUNDS)
+
+# The "default" sound of each letter. A grapheme is tricky (worth a hint at
+# level 2) when it is more than one letter or spells anything else.
+PLAIN_SOUNDS = {
+    "a": "æ", "b": "b", "c": "k", "d": "d", "e": "ɛ", "f": "f", "g": "ɡ", "h": "h", "i": "ɪ",
+    "j": "dʒ", "k": "k", "l": "l", "m": "m", "n": "n", "o": "ɑː", "p": "p", "r": "ɹ", "s": "s",
+    "t": "t", "u": "ʌ", "v": "v", "w": "w", "z": "z",
+}
+
+_MATCH = 4.0       # known grapheme with one of its listed sounds (per letter)
+_SILENT = -1.0     # letter(s) mapped to nothing not listed as silent
+_MISMATCH = -2.0   # known grapheme with an unlisted sound
+_EXTRA = -1.5      # phoneme with no letter (attached to the previous grapheme)
+
+
+def _score(grapheme, sounds):
+    listed = GRAPHEME_SOUNDS.get(grapheme)
+    if listed is None:
+        return None if len(grapheme) > 1 else _MISMATCH * max(1, len(sounds))
+    key = " ".join(sounds)
+    if key in listed:
+        return _MATCH * len(grapheme)
+    if not sounds:
+        return _SILENT * len(grapheme)
+    return _MISMATCH * len(sounds)
+
+
+def _silent_e(word, i):
+    # final "e" after a consonant (make, hope) is silent and lengthens the earlier vowel
+    return word[i] == "e" and i == len(word) - 1 and i > 1 and word[i - 1] not in "aeiouy"
+
+
+def align(word, phonemes):
+    """Returns [(grapheme, [phonemes]), ...] covering every letter of word, in order."""
+    letters = word.lower()
+    n, m = len(letters), len(phonemes)
+    if n == 0:
+        return []
+    NEG = float("-inf")
+    # best[i][j] = best score having spelled letters[:i] with phonemes[:j]
+    best = [[NEG] * (m + 1) for _ in range(n + 1)]
+    back = [[None] * (m + 1) for _ in range(n + 1)]
+    best[0][0] = 0.0
+
+    for i in range(n):
+        for j in range(m + 1):
+            if best[i][j] == NEG:
+                continue
+            base = best[i][j]
+            for L in range(1, min(MAX_GRAPHEME, n - i) + 1):
+                g = letters[i:i + L]
+                if L > 1 and g not in GRAPHEME_SOUNDS:
+                    continue
+                for k in range(0, min(3, m - j) + 1):
+                    if k == 0 and L == 1 and _silent_e(letters, i):
+                        s = 0.5
+                    else:
+                        s = _score(g, phonemes[j:j + k])
+                    if s is None:
+                        continue
+                    total = base + s
+                    if total > best[i + L][j + k]:
+                        best[i + L][j + k] = total
+                        back[i + L][j + k] = (i, j)
+
+    # leftover phonemes (espeak sometimes adds a schwa) go to the last grapheme
+    end_j = max(range(m + 1), key=lambda j: best[n][j] + _EXTRA * (m - j) if best[n][j] != NEG else NEG)
+    segments = []
+    i, j = n, end_j
+    while i > 0:
+        pi, pj = back[i][j]
+        segments.append((word[pi:i], list(phonemes[pj:j])))
+        i, j = pi, pj
+    segments.reverse()
+    if end_j < m:
+        segments[-1][1].extend(phonemes[end_j:])
+    return segments
+
+
+def is_tricky(grapheme, sounds):
+    """True when the spelling does not simply say its letter's plain sound."""
+    g = grapheme.lower()
+    if len(g) > 1 or not sounds:
+        return True
+    return len(sounds) != 1 or PLAIN_SOUNDS.get(g) != sounds[0]
@@ -0,0 +1,48 @@
+# ai/phonemizer/build_index.py
+"""
+Builds the precomputed grapheme-phoneme alignment index used by the colorizer.
+
+    python -m ai.phonemizer.build_index words.txt [more.txt ...] [--out ai/phonemizer/alignment_index.json]
+
+Input files hold words or sentences (one per line). Every distinct word is
+phonemized with espeak in batches and aligned once; the colorizer then needs
+neither espeak nor the aligner for these words at runtime.
+"""
+import re
+import json
+import argparse
+
+from .alignment import align
+from .phoneme_colorizer import ALIGN_INDEX_PATH, espeak_phonemes
+
+_WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build the phoneme alignment index")
+    ap.add_argument("inputs", nargs="+", help="text files, one word or sentence per line")
+    ap.add_argument("--out", default=ALIGN_INDEX_PATH)
+    ap.add_argument("--batch", type=int, default=2000, help="words per espeak call")
+    args = ap.parse_args(argv)
+
+    words = set()
+    for path in args.inputs:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                words.update(w.lower() for w in _WORD_RE.findall(line))
+    words = sorted(words)
+
+    index = {}
+    for i in range(0, len(words), args.batch):
+        chunk = words[i:i + args.batch]
+        for w, phones in zip(chunk, espeak_phonemes(chunk)):
+            index[w] = [list(phones), [[g, list(p)] for g, p in align(w, phones)]]
+        print(f"{min(i + args.batch, len(words))}/{len(words)} words")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Wrote {len(index)} words to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,212 @@
 # ai/phonemizer/phoneme_colorizer.py
+"""
+Per-phoneme coloring of words, sentences and exercise lists.
+
+Each word is split into graphemes aligned to its phonemes (alignment.py) and
+every grapheme gets the fixed color of the sound it spells (common/phonemes),
+so "sh" in ship and "tion" in station start with the same color and b/d never do.
+
+Lookups go: precomputed alignment index (ALIGN_INDEX_PATH, built with
+python -m ai.phonemizer.build_index) -> in-memory LRU -> one batched espeak
+call for every word still missing in the request.
+"""
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List
+
 from phonemizer import phonemize
-from typing import List, Dict
+from phonemizer.separator import Separator
+
+from common.phonemes import color_of, SILENT_COLOR
+from .alignment import align, is_tricky
+from ..ai_utils import ROOT
 
-# minimal color assignment cycles for UI
+ALIGN_INDEX_PATH = os.getenv("ALIGN_INDEX_PATH", str(ROOT / "phonemizer" / "alignment_index.json"))
+PHONEME_CACHE_SIZE = int(os.getenv("PHONEME_CACHE_SIZE", "50000"))
+
+# kept for callers of the old per-character colorizer
 COLOR_CYCLE = ["#4F46E5", "#FB923C", "#10B981", "#EF4444", "#F59E0B"]
 
+_SEPARATOR = Separator(phone=" ", syllable="", word="|")
+_WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
+
+
+class _PhonemeCache:
+    """word -> phoneme tuple; LRU, shared by request threads."""
+
+    def __init__(self, size):
+        self.size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, word):
+        with self._lock:
+            value = self._data.get(word)
+            if value is not None:
+                self._data.move_to_end(word)
+            return value
+
+    def put(self, word, value):
+        with self._lock:
+            self._data[word] = value
+            self._data.move_to_end(word)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+
+_cache = _PhonemeCache(PHONEME_CACHE_SIZE)
+_index = None
+_index_lock = threading.Lock()
+
+
+def _load_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = {}
+                if os.path.exists(ALIGN_INDEX_PATH):
+                    with open(ALIGN_INDEX_PATH, encoding="utf-8") as f:
+                        index = json.load(f)
+                    print(f"Phoneme alignment index: {len(index)} words from {ALIGN_INDEX_PATH}")
+                _index = index
+    return _index
+
+
+def espeak_phonemes(words):
+    """One espeak call for a list of words -> list of phoneme tuples."""
+    out = phonemize(
+        list(words),
+        language="en-us",
+        backend="espeak",
+        separator=_SEPARATOR,
+        strip=True,
+        with_stress=False,
+        preserve_empty_lines=True,
+    )
+    return [tuple(out_word.replace("|", " ").split()) for out_word in out]
+
+
+def phonemes_for(words) -> Dict[str, tuple]:
+    """Phoneme tuples for many words (lowercased keys), phonemizing misses in one batch."""
+    index = _load_index()
+    result, missing = {}, []
+    for w in words:
+        w = w.lower()
+        if w in result:
+            continue
+        if not w:
+            result[w] = ()
+            continue
+        hit = index.get(w)
+        if hit is not None:
+            result[w] = tuple(hit[0])
+            continue
+        cached = _cache.get(w)
+        if cached is not None:
+            result[w] = cached
+        else:
+            result[w] = None
+            missing.append(w)
+
+    if missing:
+        for w, phones in zip(missing, espeak_phonemes(missing)):
+            _cache.put(w, phones)
+            result[w] = phones
+    return result
+
+
+@lru_cache(maxsize=PHONEME_CACHE_SIZE)
+def _aligned(word, phonemes):
+    entry = _load_index().get(word.lower())
+    if entry is not None and tuple(entry[0]) == phonemes:
+        return tuple((g, tuple(p)) for g, p in entry[1])
+    return tuple((g, tuple(p)) for g, p in align(word, phonemes))
+
+
+def _color_word(word, phonemes, level=1):
+    segments, pos = [], 0
+    for grapheme, sounds in _aligned(word, phonemes):
+        tricky = is_tricky(grapheme, sounds)
+        segments.append({
+            "graphemes": grapheme,
+            "phonemes": list(sounds),
+            "color": color_of(sounds[0]) if sounds else SILENT_COLOR,
+            "colors": [color_of(s) for s in sounds],
+            "tricky": tricky,
+            "hint": level == 1 or (level == 2 and tricky),
+            "start": pos,
+            "end": pos + len(grapheme),
+        })
+        pos += len(grapheme)
+    return {
+        "word": word,
+        "phonemes": "".join(phonemes),
+        "segments": segments,
+        # legacy fields of the per-character colorizer
+        "graphemes": [s["graphemes"] for s in segments],
+        "colors": [s["color"] for s in segments],
+    }
+
+
+def colorize_texts(texts: List[str], level: int = 1) -> List[Dict]:
+    """Colors every word of every text with a single espeak call for unseen words.
+    level 1 hints every sound, level 2 only tricky spellings, level 3 none."""
+    tokenized = [[(m.group(), m.start()) for m in _WORD_RE.finditer(t or "")] for t in texts]
+    phones = phonemes_for(w for words in tokenized for w, _ in words)
+
+    items = []
+    for text, words in zip(texts, tokenized):
+        colored = []
+        for w, start in words:
+            cw = _color_word(w, phones[w.lower()], level)
+            cw["start"] = start
+            colored.append(cw)
+        items.append({
+            "text": text,
+            "words": colored,
+            "hints": [f'{s["graphemes"]}:{s["color"]}' for cw in colored for s in cw["segments"]
+                      if s["hint"] and s["phonemes"]],
+        })
+    return items
+
+
 def colorize_word(word: str) -> Dict:
-    phones = phonemize(word, language="en-us", backend="espeak", strip=True, with_stress=False)
-    # naive split by characters for mapping - phonemizer returns string, tokenization for UI can be custom
-    graphemes = list(word)
-    colors = [COLOR_CYCLE[i % len(COLOR_CYCLE)] for i in range(len(graphemes))]
-    return {"word": word, "graphemes": graphemes, "colors": colors, "phonemes": phones}
+    return _color_word(word, phonemes_for([word])[word.lower()])
+
+
+def add_color_hints(exercises: List[Dict], level: int = 1) -> List[Dict]:
+    """Fills phoneme_color_hints of generated exercises locally (one batch for the list)."""
+    texts = [(ex.get("text") or "") if isinstance(ex, dict) else "" for ex in exercises]
+    try:
+        colored = colorize_texts(texts, level)
+    except Exception as e:
+        print("Color hints unavailable:", e)
+        return exercises
+    for ex, item in zip(exercises, colored):
+        if isinstance(ex, dict):
+            ex["phoneme_color_hints"] = item["hints"]
+    return exercises
+
+
+def lesson_hints(phoneme: str, examples: List[str]) -> List[str]:
+    """Hints for a phoneme lesson: the spellings of the target sound in the example words."""
+    target = (phoneme or "").strip("/ ").lower()
+    try:
+        colored = colorize_texts([e for e in examples if isinstance(e, str)], level=1)
+    except Exception as e:
+        print("Color hints unavailable:", e)
+        return []
+    hints = []
+    for item in colored:
+        for cw in item["words"]:
+            for s in cw["segments"]:
+                if s["phonemes"] and (target in s["phonemes"] or s["graphemes"].lower() == target):
+                    hint = f'{s["graphemes"]}:{s["color"]}'
+                    if hint not in hints:
+                        hints.append(hint)
+    return hints
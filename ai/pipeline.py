@@ -0,0 +1,67 @@
+# ai/pipeline.py
+"""
+The AI operations behind the HTTP endpoints, callable without HTTP.
+
+ai_router serves these over HTTP; the backend calls them directly when it
+runs the AI services in-process (AI_MODE=inprocess, backend/ai_client.py).
+Both go through the same scheduler executors and the same ASR result cache.
+"""
+from .asr.asr_service import transcribe_file, analyze, route
+from .asr.result_cache import ResultCache, audio_hash, make_key
+from .tts.tts_formats import audio_for
+from .llm.llm_service import generate_microdrills
+from .ai_utils import save_upload_bytes
+from .scheduler import cpu, gemini, Overloaded
+from common.metrics import span, counter
+
+# Retried uploads of the same clip are answered from here
+asr_cache = ResultCache()
+ASR_CACHE_REQUESTS = counter("asr_cache_requests_total", "ASR result cache lookups", ("endpoint", "result"))
+
+
+async def evaluate(data, filename, expected_text, exercise_type=None, priority="interactive"):
+    """Transcribes and analyzes one recording; returns the EvaluateResponse dict."""
+    audio_sha256 = audio_hash(data)
+    route_info = route(expected_text, exercise_type)
+    key = make_key(audio_sha256, expected_text, route_info)
+
+    def run():
+        with span("asr.save_upload"):
+            path = save_upload_bytes(data, filename)
+        trans = transcribe_file(path, expected_text=expected_text, route_info=route_info)
+        with span("asr.analyze"):
+            analysis = analyze(expected_text, trans["text"])
+        return {"transcription": trans, "analysis": analysis, "route": route_info}
+
+    async def compute():
+        return await cpu.run(priority, run)
+
+    result, status = await asr_cache.get_or_compute(key, compute)
+    ASR_CACHE_REQUESTS.inc(endpoint="evaluate", result=status)
+    return {**result, "cache": status, "audio_sha256": audio_sha256}
+
+
+async def lookup(audio_sha256, expected_text, exercise_type=None):
+    """Cached (or in-flight) evaluation for this audio hash, or None."""
+    route_info = route(expected_text, exercise_type)
+    result = await asr_cache.peek(make_key(audio_sha256, expected_text, route_info))
+    ASR_CACHE_REQUESTS.inc(endpoint="lookup", result="miss" if result is None else "hit")
+    if result is None:
+        return None
+    return {**result, "cache": "hit", "audio_sha256": audio_sha256}
+
+
+async def speak(text, priority="interactive", fmt="wav"):
+    """Path of the synthesized audio in fmt (see tts/tts_formats.py)."""
+    return await cpu.run(priority, audio_for, text, fmt)
+
+
+async def microdrills(payload, priority="prefetch"):
+    """Generated drills; [] if generation fails (Overloaded still propagates)."""
+    try:
+        return await gemini.run(priority, generate_microdrills, payload)
+    except Overloaded:
+        raise
+    except Exception as e:
+        print("Error generating microdrills:", e)
+        return []
@@ -0,0 +1,218 @@
+# ai/scheduler.py
+"""
+Priority-aware work scheduler for the AI service.
+
+Blocking work (Whisper decoding, phonemization, TTS, Gemini calls) runs on a
+thread pool per resource instead of on the event loop. Each request carries a
+priority class:
+
+  interactive  a child is waiting on the result (ASR evaluate, TTS, feedback)
+  prefetch     content the UI will need soon (exercises, lessons, missions)
+  background   nice-to-have work (microdrills after a submitted session)
+
+A resource has a number of slots and a per-class cap on how many of them one
+class may hold. Freed slots go to the highest-priority waiter. Under pressure,
+queued background work is shed first, then prefetch; shed or over-queue
+requests fail with Overloaded, which the app turns into 503 + Retry-After.
+
+Callers pick the class with the X-Work-Priority header (see work_priority);
+each endpoint has its own default.
+"""
+import os
+import time
+import heapq
+import asyncio
+import functools
+import itertools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import Header
+
+from common.metrics import span, counter, gauge, histogram
+
+PRIORITIES = ("interactive", "prefetch", "background")
+_RANK = {p: i for i, p in enumerate(PRIORITIES)}
+
+SCHED_RETRY_AFTER_S = int(os.getenv("SCHED_RETRY_AFTER_S", "5"))
+# once this many interactive requests are queued, queued prefetch work is shed too
+SCHED_PREFETCH_SHED_AT = int(os.getenv("SCHED_PREFETCH_SHED_AT", "4"))
+
+SCHED_RUNNING = gauge("sched_running", "Jobs running per resource and priority", ("resource", "priority"))
+SCHED_QUEUED = gauge("sched_queued", "Jobs waiting for a slot", ("resource", "priority"))
+SCHED_SHED = counter("sched_shed_total", "Jobs rejected or dropped by the scheduler", ("resource", "priority", "reason"))
+SCHED_WAIT = histogram("sched_wait_seconds", "Time spent waiting for a slot", ("resource", "priority"))
+
+
+class Overloaded(Exception):
+    def __init__(self, resource, priority, reason, retry_after=SCHED_RETRY_AFTER_S):
+        super().__init__(f"{resource} overloaded ({priority} work {reason})")
+        self.resource = resource
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _parse_classes(text, default):
+    """'interactive=8,prefetch=4' -> dict, falling back to default per class."""
+    out = dict(default)
+    for part in (text or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() in out and value.strip():
+            out[name.strip()] = float(value) if "." in value else int(value)
+    return out
+
+
+class WorkScheduler:
+    def __init__(self, name, slots, limits=None, max_queue=None, max_wait_s=None):
+        self.name = name
+        self.slots = max(1, slots)
+        self.limits = {p: min(self.slots, max(1, n)) for p, n in (limits or {p: self.slots for p in PRIORITIES}).items()}
+        self.max_queue = max_queue or {"interactive": 64, "prefetch": 16, "background": 8}
+        self.max_wait_s = max_wait_s or {"interactive": 60.0, "prefetch": 20.0, "background": 10.0}
+        self._executor = ThreadPoolExecutor(max_workers=self.slots, thread_name_prefix=f"sched-{name}")
+        self._running = {p: 0 for p in PRIORITIES}
+        self._queued = {p: 0 for p in PRIORITIES}
+        self._waiters = []          # heap of (rank, seq, priority, future)
+        self._seq = itertools.count()
+
+    # --- slot accounting (event-loop thread only) ---
+    def _total_running(self):
+        return sum(self._running.values())
+
+    def _can_start(self, priority):
+        return self._total_running() < self.slots and self._running[priority] < self.limits[priority]
+
+    def _start(self, priority):
+        self._running[priority] += 1
+        SCHED_RUNNING.set(self._running[priority], resource=self.name, priority=priority)
+
+    def _set_queued(self, priority, delta):
+        self._queued[priority] += delta
+        SCHED_QUEUED.set(self._queued[priority], resource=self.name, priority=priority)
+
+    def _wake(self):
+        """Hands free slots to the best waiters (skipping classes at their cap)."""
+        skipped = []
+        while self._waiters and self._total_running() < self.slots:
+            item = heapq.heappop(self._waiters)
+            _, _, priority, fut = item
+            if fut.done():
+                continue
+            if self._running[priority] >= self.limits[priority]:
+                skipped.append(item)
+                continue
+            self._start(priority)
+            fut.set_result(True)
+        for item in skipped:
+            heapq.heappush(self._waiters, item)
+
+    def _shed(self, priority, reason):
+        """Drops every queued waiter of one class."""
+        for _, _, p, fut in self._waiters:
+            if p == priority and not fut.done():
+                fut.set_exception(Overloaded(self.name, p, reason))
+                SCHED_SHED.inc(resource=self.name, priority=p, reason=reason)
+
+    def _release(self, priority):
+        self._running[priority] -= 1
+        SCHED_RUNNING.set(self._running[priority], resource=self.name, priority=priority)
+        self._wake()
+
+    async def _acquire(self, priority):
+        if not self._waiters and self._can_start(priority):
+            self._start(priority)
+            return
+        if self._queued[priority] >= self.max_queue[priority]:
+            SCHED_SHED.inc(resource=self.name, priority=priority, reason="queue_full")
+            raise Overloaded(self.name, priority, "queue full")
+
+        if priority == "interactive":
+            # interactive work has to wait: lower classes give way
+            self._shed("background", "shed_for_interactive")
+            if self._queued["interactive"] + 1 >= SCHED_PREFETCH_SHED_AT:
+                self._shed("prefetch", "shed_for_interactive")
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (_RANK[priority], next(self._seq), priority, fut))
+        self._set_queued(priority, +1)
+        self._wake()  # the waiters ahead may all be capped classes
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self.max_wait_s[priority])
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                return  # got the slot just as the timer fired
+            fut.cancel()
+            SCHED_SHED.inc(resource=self.name, priority=priority, reason="wait_timeout")
+            raise Overloaded(self.name, priority, "waited too long")
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                self._release(priority)  # client went away after being granted a slot
+            else:
+                fut.cancel()
+            raise
+        finally:
+            self._set_queued(priority, -1)
+            self._waiters = [w for w in self._waiters if not w[3].done()]
+            heapq.heapify(self._waiters)
+
+    async def run(self, priority, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on this resource's pool once a slot is free.
+        Context variables (stage spans, profiling) follow the call into the thread."""
+        priority = priority if priority in _RANK else "interactive"
+        t0 = time.perf_counter()
+        with span("sched.wait", f"{self.name}/{priority}"):
+            await self._acquire(priority)
+        SCHED_WAIT.observe(time.perf_counter() - t0, resource=self.name, priority=priority)
+        try:
+            ctx = contextvars.copy_context()
+            call = functools.partial(ctx.run, fn, *args, **kwargs)
+            fut = asyncio.get_running_loop().run_in_executor(self._executor, call)
+        except BaseException:
+            self._release(priority)
+            raise
+        # the slot stays taken until the thread is done, even if the caller is cancelled
+        fut.add_done_callback(lambda _: self._release(priority))
+        return await asyncio.shield(fut)
+
+    def stats(self):
+        return {
+            "slots": self.slots,
+            "limits": self.limits,
+            "running": dict(self._running),
+            "queued": dict(self._queued),
+        }
+
+
+# -----------------------------------------------------------
+# Shared schedulers
+# -----------------------------------------------------------
+def _default_limits(slots):
+    return {"interactive": slots, "prefetch": max(1, slots // 2), "background": max(1, slots // 4)}
+
+
+_CPU_SLOTS = int(os.getenv("SCHED_CPU_SLOTS", str(os.cpu_count() or 2)))
+_GEMINI_SLOTS = int(os.getenv("SCHED_GEMINI_SLOTS", "8"))
+
+# Whisper, phonemizer and TTS
+cpu = WorkScheduler(
+    "cpu",
+    _CPU_SLOTS,
+    limits=_parse_classes(os.getenv("SCHED_CPU_LIMITS"), _default_limits(_CPU_SLOTS)),
+    max_queue=_parse_classes(os.getenv("SCHED_MAX_QUEUE"), {"interactive": 64, "prefetch": 16, "background": 8}),
+)
+# Gemini requests (quota / rate limit rather than CPU)
+gemini = WorkScheduler(
+    "gemini",
+    _GEMINI_SLOTS,
+    limits=_parse_classes(os.getenv("SCHED_GEMINI_LIMITS"), _default_limits(_GEMINI_SLOTS)),
+    max_queue=_parse_classes(os.getenv("SCHED_MAX_QUEUE"), {"interactive": 64, "prefetch": 16, "background": 8}),
+)
+
+
+def work_priority(default):
+    """FastAPI dependency: the X-Work-Priority header, or this endpoint's default."""
+    def dependency(x_work_priority: str = Header(None)):
+        value = (x_work_priority or "").strip().lower()
+        return value if value in _RANK else default
+    return dependency
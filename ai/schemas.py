@@ -0,0 +1,142 @@
+# ai/schemas.py
+# Response models for the AI layer (also used by the backend bridge)
+from pydantic import BaseModel, ConfigDict
+from typing import Any, List, Optional
+
+
+class _Open(BaseModel):
+    # LLM output can carry extra keys; keep them instead of failing
+    model_config = ConfigDict(extra="allow")
+
+
+# ----------------------------------------------------
+# ASR
+# ----------------------------------------------------
+class RouteInfo(BaseModel):
+    model: str
+    preset: str
+    reason: str
+
+
+class Transcription(BaseModel):
+    text: str
+    duration_s: Optional[float] = None
+    route: Optional[RouteInfo] = None
+
+
+class WordResult(BaseModel):
+    expected: str
+    spoken: str
+    expected_phonemes: str
+    spoken_phonemes: str
+    phoneme_similarity: float
+    error_type: str
+
+
+class Analysis(BaseModel):
+    words: List[WordResult]
+    accuracy: float
+    expected_text: str
+    spoken_text: str
+
+
+class EvaluateResponse(BaseModel):
+    transcription: Transcription
+    analysis: Analysis
+    route: RouteInfo
+    cache: str                        # hit | joined | miss
+    audio_sha256: str
+
+
+# ----------------------------------------------------
+# LLM
+# ----------------------------------------------------
+class Exercise(_Open):
+    text: Optional[str] = None
+    phoneme_color_hints: List[Any] = []
+    difficulty: Optional[str] = None
+
+
+class ExercisesResponse(BaseModel):
+    exercises: List[Exercise]
+
+
+class Microdrill(_Open):
+    type: Optional[str] = None
+    instruction: Optional[str] = None
+    content: Any = None
+
+
+class MicrodrillsResponse(BaseModel):
+    microdrills: List[Microdrill]
+
+
+class Lesson(_Open):
+    explanation: Optional[str] = None
+    examples: List[Any] = []
+    phoneme_color_hints: List[Any] = []
+
+
+class LessonResponse(BaseModel):
+    lesson: Lesson
+
+
+class Feedback(BaseModel):
+    message: str
+
+
+class FeedbackResponse(BaseModel):
+    feedback: Feedback
+
+
+class Mission(_Open):
+    mission_title: Optional[str] = None
+    sentence: Optional[str] = None
+    target_phonemes: List[Any] = []
+    difficulty: Any = None
+
+
+class MissionResponse(BaseModel):
+    mission: Mission
+
+
+# ----------------------------------------------------
+# Phoneme colorization
+# ----------------------------------------------------
+class ColorizeRequest(BaseModel):
+    texts: List[str]
+    level: int = 1                    # 1 = hint every sound, 2 = tricky spellings only, 3 = none
+
+
+class ColoredSegment(BaseModel):
+    graphemes: str
+    phonemes: List[str]
+    color: str
+    colors: List[str]
+    tricky: bool
+    hint: bool
+    start: int
+    end: int
+
+
+class ColoredWord(BaseModel):
+    word: str
+    start: int
+    phonemes: str
+    segments: List[ColoredSegment]
+    graphemes: List[str]
+    colors: List[str]
+
+
+class ColoredText(BaseModel):
+    text: str
+    words: List[ColoredWord]
+    hints: List[str]                  # "grapheme:#color", same format as phoneme_color_hints
+
+
+class ColorizeResponse(BaseModel):
+    items: List[ColoredText]
+
+
+class Detail(BaseModel):
+    detail: str
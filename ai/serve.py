@@ -0,0 +1,312 @@
+# ai/serve.py
+"""
+Production launcher for the AI service (Linux).
+
+    python -m ai.serve --workers 4 --port 8001
+
+The supervisor imports the app once (Python modules, Gemini model selection)
+and binds the listening socket, then forks:
+  - one ASR decode host, the only process that loads Whisper weights
+    (CTranslate2 replicas share them, ASR_NUM_WORKERS = --workers), and
+  - N uvicorn workers sharing the socket, which send decoding to the host.
+
+Whisper models are not loaded in the supervisor itself: CTranslate2 starts its
+thread pools when a model is constructed, and forked children would inherit the
+pool without its threads. The supervisor therefore stays model-free so it can
+re-fork crashed or hung processes at any time.
+
+Workers (and the host) heartbeat into shared memory; a process that stops
+heartbeating for --heartbeat-timeout seconds is killed and replaced. Per-process
+RSS/PSS (PSS counts shared pages once) is logged every --stats-interval seconds
+and optionally written to --stats-file as JSON.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import socket
+import signal
+import asyncio
+import argparse
+import tempfile
+from multiprocessing import Array
+
+HOST_SLOT = 0
+
+
+def read_memory(pid):
+    """RSS / PSS / shared / private (kB) of a process, from /proc/<pid>/smaps_rollup."""
+    out = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":"):
+                    out[parts[0][:-1]] = int(parts[1])
+    except (OSError, ValueError):
+        return None
+    return {
+        "rss_kb": out.get("Rss", 0),
+        "pss_kb": out.get("Pss", 0),
+        "shared_kb": out.get("Shared_Clean", 0) + out.get("Shared_Dirty", 0),
+        "private_kb": out.get("Private_Clean", 0) + out.get("Private_Dirty", 0),
+    }
+
+
+class Supervisor:
+    def __init__(self, args):
+        self.args = args
+        self.sock = None
+        self.heartbeats = Array("d", args.workers + 1, lock=False)   # slot 0 = decode host
+        self.procs = {}        # slot -> {"pid", "started", "restarts", "next_start"}
+        self.stopping = False
+        self.decode_address = os.path.join(tempfile.gettempdir(), f"lexilift-asr-{os.getpid()}.sock")
+        self.decode_authkey = os.urandom(16)
+
+    # --- setup ---
+    def bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.args.host, self.args.port))
+        sock.listen(self.args.backlog)
+        sock.set_inheritable(True)
+        self.sock = sock
+
+    def preload(self):
+        # Import everything once so workers inherit it copy-on-write
+        from ai import ai_router  # noqa: F401  (FastAPI app, Gemini setup, registry)
+
+        self.app = ai_router.app
+        gc.collect()
+        gc.freeze()   # keep GC from touching (and un-sharing) inherited objects
+
+    # --- children ---
+    def _fork(self, slot, target):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                target(slot)
+            except BaseException as e:
+                print(f"[slot {slot}] exited with error: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        entry = self.procs.setdefault(slot, {"restarts": -1})
+        entry.update(pid=pid, started=time.time(), next_start=0)
+        entry["restarts"] += 1
+        self.heartbeats[slot] = time.time()
+        return pid
+
+    def _run_decode_host(self, slot):
+        from ai.asr import decode_host
+        from ai.asr import asr_service
+
+        self.sock.close()
+
+        def beat():
+            while True:
+                self.heartbeats[slot] = time.time()
+                time.sleep(1.0)
+
+        decode_host.serve(
+            self.decode_address,
+            self.decode_authkey,
+            preload=self.args.preload_models or [asr_service.ASR_MODEL_NAME],
+            heartbeat=beat,
+        )
+
+    def _run_worker(self, slot):
+        import uvicorn
+        from ai.asr import asr_service
+        from ai.llm import llm_service
+
+        asr_service.use_decode_host(self.decode_address, self.decode_authkey)
+        llm_service.reset_client()
+
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            log_level=self.args.log_level,
+            timeout_keep_alive=self.args.keep_alive,
+        )
+        server = uvicorn.Server(config)
+
+        async def main():
+            async def beat():
+                # heartbeat from the event loop, so a blocked loop counts as hung
+                while True:
+                    self.heartbeats[slot] = time.time()
+                    await asyncio.sleep(1.0)
+
+            task = asyncio.create_task(beat())
+            await server.serve(sockets=[self.sock])
+            task.cancel()
+
+        asyncio.run(main())
+
+    def spawn(self, slot):
+        target = self._run_decode_host if slot == HOST_SLOT else self._run_worker
+        pid = self._fork(slot, target)
+        role = "decode host" if slot == HOST_SLOT else f"worker {slot}"
+        print(f"Started {role} (pid {pid})")
+
+    def wait_for_decode_host(self, timeout):
+        from multiprocessing.connection import Client
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            self.reap()
+            try:
+                Client(self.decode_address, family="AF_UNIX", authkey=self.decode_authkey).close()
+                return True
+            except (OSError, EOFError):
+                time.sleep(0.5)
+        return False
+
+    # --- supervision ---
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            for slot, entry in self.procs.items():
+                if entry.get("pid") == pid:
+                    entry["pid"] = None
+                    uptime = time.time() - entry["started"]
+                    # crash loop: back off up to 30s
+                    delay = min(30.0, 2 ** min(entry["restarts"], 5)) if uptime < 10 else 0
+                    entry["next_start"] = time.time() + delay
+                    if not self.stopping:
+                        print(f"Slot {slot} (pid {pid}) exited with status {status} after {uptime:.0f}s; "
+                              f"restarting in {delay:.0f}s")
+
+    def check_heartbeats(self):
+        now = time.time()
+        for slot, entry in self.procs.items():
+            pid = entry.get("pid")
+            if pid and now - self.heartbeats[slot] > self.args.heartbeat_timeout:
+                print(f"Slot {slot} (pid {pid}) missed heartbeats for {now - self.heartbeats[slot]:.0f}s; killing")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def respawn(self):
+        for slot, entry in list(self.procs.items()):
+            if entry.get("pid") is None and time.time() >= entry.get("next_start", 0):
+                self.spawn(slot)
+
+    def stats(self):
+        rows = []
+        for slot, entry in sorted(self.procs.items()):
+            pid = entry.get("pid")
+            mem = read_memory(pid) if pid else None
+            rows.append({
+                "slot": slot,
+                "role": "decode_host" if slot == HOST_SLOT else "worker",
+                "pid": pid,
+                "restarts": entry["restarts"],
+                "uptime_s": round(time.time() - entry["started"]) if pid else 0,
+                "heartbeat_age_s": round(time.time() - self.heartbeats[slot], 1),
+                **(mem or {}),
+            })
+        return {"supervisor": {"pid": os.getpid(), **(read_memory(os.getpid()) or {})}, "processes": rows}
+
+    def report(self):
+        data = self.stats()
+        total_rss = sum(r.get("rss_kb", 0) for r in data["processes"])
+        total_pss = sum(r.get("pss_kb", 0) for r in data["processes"])
+        print(f"--- {len(data['processes'])} processes: RSS {total_rss // 1024} MB, PSS {total_pss // 1024} MB")
+        for r in data["processes"]:
+            print(f"    {r['role']:<11} slot {r['slot']:<2} pid {r['pid']}  rss {r.get('rss_kb', 0) // 1024} MB  "
+                  f"pss {r.get('pss_kb', 0) // 1024} MB  shared {r.get('shared_kb', 0) // 1024} MB  "
+                  f"restarts {r['restarts']}")
+        if self.args.stats_file:
+            tmp = self.args.stats_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({**data, "timestamp": time.time()}, f, indent=2)
+            os.replace(tmp, self.args.stats_file)
+
+    def shutdown(self, *_):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.shutdown)
+        signal.signal(signal.SIGINT, self.shutdown)
+
+        self.bind()
+        self.preload()
+        self.spawn(HOST_SLOT)
+        if not self.wait_for_decode_host(self.args.host_start_timeout):
+            print("ASR decode host did not start; aborting")
+            self.stopping = True
+        else:
+            for slot in range(1, self.args.workers + 1):
+                self.spawn(slot)
+            print(f"LexiLift AI serving on http://{self.args.host}:{self.args.port} with {self.args.workers} workers")
+
+        last_report = time.time()
+        while not self.stopping:
+            time.sleep(1.0)
+            self.reap()
+            self.check_heartbeats()
+            self.respawn()
+            if time.time() - last_report >= self.args.stats_interval:
+                self.report()
+                last_report = time.time()
+
+        self.stop_children()
+
+    def stop_children(self):
+        pids = [e["pid"] for e in self.procs.values() if e.get("pid")]
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.time() + self.args.graceful_timeout
+        while time.time() < deadline and any(e.get("pid") for e in self.procs.values()):
+            time.sleep(0.2)
+            self.reap()
+        for e in self.procs.values():
+            if e.get("pid"):
+                try:
+                    os.kill(e["pid"], signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        if os.path.exists(self.decode_address):
+            os.unlink(self.decode_address)
+        print("LexiLift AI stopped.")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pre-fork launcher for the LexiLift AI service")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    ap.add_argument("--preload-models", type=lambda s: [m for m in s.split(",") if m], default=None,
+                    help="models the decode host loads at start (default: ASR_MODEL)")
+    ap.add_argument("--backlog", type=int, default=2048)
+    ap.add_argument("--keep-alive", type=int, default=5)
+    ap.add_argument("--heartbeat-timeout", type=float, default=30.0)
+    ap.add_argument("--host-start-timeout", type=float, default=600.0, help="seconds to wait for model load")
+    ap.add_argument("--graceful-timeout", type=float, default=30.0)
+    ap.add_argument("--stats-interval", type=float, default=60.0)
+    ap.add_argument("--stats-file", default="", help="write per-process memory stats here as JSON")
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args(argv)
+
+    # one CTranslate2 replica per HTTP worker, all sharing the same weights
+    os.environ.setdefault("ASR_NUM_WORKERS", str(args.workers))
+    Supervisor(args).run()
+
+
+if __name__ == "__main__":
+    main()
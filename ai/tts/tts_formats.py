@@ -0,0 +1,151 @@
+# ai/tts/tts_formats.py
+"""
+Encoded variants of the cached TTS WAVs and content negotiation.
+
+  wav      the pyttsx3 output as is (default)
+  opus     Opus in OGG (audio/ogg), TTS_OPUS_BITRATE bits/s - a fraction of the WAV size
+  wav16k   16 kHz mono 16-bit PCM WAV
+  wav8k    8 kHz mono 16-bit PCM WAV
+
+A client picks one with the "format" form field or the Accept header
+("audio/ogg", "audio/wav; rate=16000", ...). Variants are encoded with PyAV
+the first time they are asked for and stored next to the WAV
+(<tts_key>.<format>.<ext>), so later requests only read the file. Responses
+are streamed in TTS_STREAM_CHUNK_KB chunks so playback can start early.
+"""
+import os
+import uuid
+from pathlib import Path
+
+import av
+from fastapi.responses import StreamingResponse
+
+from .tts_service import synthesize_to_wav
+from common.metrics import span, counter
+
+TTS_OPUS_BITRATE = int(os.getenv("TTS_OPUS_BITRATE", "24000"))
+TTS_STREAM_CHUNK = int(os.getenv("TTS_STREAM_CHUNK_KB", "32")) * 1024
+
+FORMATS = {
+    "wav": {"media_type": "audio/wav", "suffix": ".wav"},
+    "opus": {"media_type": "audio/ogg; codecs=opus", "suffix": ".opus.ogg",
+             "container": "ogg", "codec": "libopus", "rate": 48000, "bit_rate": TTS_OPUS_BITRATE},
+    "wav16k": {"media_type": "audio/wav", "suffix": ".16k.wav",
+               "container": "wav", "codec": "pcm_s16le", "rate": 16000},
+    "wav8k": {"media_type": "audio/wav", "suffix": ".8k.wav",
+              "container": "wav", "codec": "pcm_s16le", "rate": 8000},
+}
+_ALIASES = {"ogg": "opus", "pcm16k": "wav16k", "pcm8k": "wav8k"}
+_OGG_TYPES = {"audio/ogg", "audio/opus"}
+_WAV_TYPES = {"audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave", "audio/l16"}
+
+TTS_REQUESTS = counter("tts_requests_total", "TTS audio served by format and variant cache", ("format", "cache"))
+
+
+def _wav_for_rate(rate):
+    try:
+        rate = int(rate)
+    except (TypeError, ValueError):
+        return "wav"
+    if rate <= 8000:
+        return "wav8k"
+    return "wav16k" if rate <= 16000 else "wav"
+
+
+def negotiate(fmt=None, accept=None) -> str:
+    """
+    The format to serve: the explicit fmt if given (ValueError if unknown),
+    else the best Accept match, else wav.
+    """
+    if fmt:
+        name = _ALIASES.get(fmt.strip().lower(), fmt.strip().lower())
+        if name not in FORMATS:
+            raise ValueError(f"unknown TTS format {fmt!r} (use one of: {', '.join(FORMATS)})")
+        return name
+
+    best, best_q = "wav", 0.0
+    for part in (accept or "").split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        media = media.lower()
+        opts = dict(p.split("=", 1) for p in params if "=" in p)
+        try:
+            q = float(opts.get("q", 1))
+        except ValueError:
+            q = 0.0
+        if media in _OGG_TYPES:
+            name = "opus"
+        elif media in _WAV_TYPES:
+            name = _wav_for_rate(opts.get("rate"))
+        elif media in ("audio/*", "*/*"):
+            name = "wav"
+        else:
+            continue
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def variant_path(wav_path, fmt) -> Path:
+    wav_path = Path(wav_path)
+    return wav_path.with_name(wav_path.stem + FORMATS[fmt]["suffix"])
+
+
+def _encode(src, dst, spec):
+    part = dst.with_name(f"{dst.name}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        with av.open(str(src)) as inp, av.open(str(part), mode="w", format=spec["container"]) as out:
+            stream = out.add_stream(spec["codec"], rate=spec["rate"], layout="mono")
+            if spec.get("bit_rate"):
+                stream.bit_rate = spec["bit_rate"]
+            for frame in inp.decode(audio=0):
+                # the encoder resamples / re-frames to its own rate and frame size
+                frame.pts = None
+                for packet in stream.encode(frame):
+                    out.mux(packet)
+            for packet in stream.encode(None):
+                out.mux(packet)
+        os.replace(part, dst)
+    finally:
+        if part.exists():
+            part.unlink()
+
+
+def audio_for(text: str, fmt: str = "wav") -> str:
+    """Path of the TTS audio for text in fmt (synthesizing / encoding on first use)."""
+    wav = synthesize_to_wav(text)
+    if fmt == "wav":
+        TTS_REQUESTS.inc(format=fmt, cache="source")
+        return wav
+    dst = variant_path(wav, fmt)
+    if dst.exists():
+        TTS_REQUESTS.inc(format=fmt, cache="hit")
+        return str(dst)
+    with span("tts.encode", fmt):
+        _encode(wav, dst, FORMATS[fmt])
+    TTS_REQUESTS.inc(format=fmt, cache="miss")
+    return str(dst)
+
+
+def _chunks(path):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(TTS_STREAM_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+
+
+def stream_audio(path, fmt) -> StreamingResponse:
+    """Chunked response for a file from audio_for()."""
+    name = os.path.basename(path)
+    return StreamingResponse(
+        _chunks(path),
+        media_type=FORMATS[fmt]["media_type"],
+        headers={
+            "Content-Disposition": f'inline; filename="{name}"',
+            # the file name is a content hash: same name, same bytes
+            "ETag": f'"{name}"',
+            "Vary": "Accept",
+            "X-TTS-Format": fmt,
+        },
+    )
@@ -2,9 +2,12 @@
 import os
 import uuid
 import time
+import hashlib
+import threading
 from pathlib import Path
 import pyttsx3
 from ..ai_utils import ROOT
+from common.metrics import span
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,23 +16,55 @@ load_dotenv()
 OUT_DIR = ROOT / "tts_outputs"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
+TTS_RATE = 150      # speech speed
+TTS_VOLUME = 1.0    # max volume
+
+# pyttsx3.init() hands back a shared engine per driver; runs from scheduler threads must not overlap
+_engine_lock = threading.Lock()
+
+def tts_key(text: str) -> str:
+    """Content hash naming the cached WAV (and its encoded variants) for this text."""
+    return hashlib.sha256(f"{TTS_RATE}|{TTS_VOLUME}|{text}".encode("utf-8")).hexdigest()[:32]
+
 def synthesize_to_wav(text: str, filename: str = None) -> str:
     """
     Converts input text to speech and saves it as a .wav file using pyttsx3.
     Creates a fresh engine each call to prevent Windows engine lock.
     Returns path to the generated .wav file.
+
+    Without a filename the file is named by tts_key(text) and reused by later
+    calls with the same text.
     """
-    filename = filename or f"{uuid.uuid4().hex}.wav"
-    out_path = OUT_DIR / filename
+    if filename:
+        with _engine_lock:
+            return _synthesize(text, OUT_DIR / filename)
+
+    out_path = OUT_DIR / f"{tts_key(text)}.wav"
+    if out_path.exists():
+        return str(out_path)
+    with _engine_lock:
+        if out_path.exists():
+            return str(out_path)
+        # write under a temporary name so a failed run is never served from the cache
+        part = OUT_DIR / f"{out_path.stem}.{uuid.uuid4().hex[:8]}.part.wav"
+        _synthesize(text, part)
+        if not part.exists() or part.stat().st_size == 0:
+            part.unlink(missing_ok=True)
+            raise RuntimeError("TTS produced no audio")
+        os.replace(part, out_path)
+    return str(out_path)
 
+def _synthesize(text, out_path):
+    engine = None
     try:
         # Create a new engine for each call
         engine = pyttsx3.init()
-        engine.setProperty('rate', 150)   # speech speed
-        engine.setProperty('volume', 1.0) # max volume
+        engine.setProperty('rate', TTS_RATE)
+        engine.setProperty('volume', TTS_VOLUME)
 
-        engine.save_to_file(text, str(out_path))
-        engine.runAndWait()
+        with span("tts.synthesize"):
+            engine.save_to_file(text, str(out_path))
+            engine.runAndWait()
         print(f"TTS generated: {out_path}")
 
     except Exception as e:
@@ -37,8 +72,9 @@ def synthesize_to_wav(text: str, filename: str = None) -> str:
 
     finally:
         # Important! Always stop and delete engine
-        engine.stop()
-        del engine
+        if engine is not None:
+            engine.stop()
+            del engine
         time.sleep(0.2)  # brief pause to let process release
 
     return str(out_path)
@@ -0,0 +1,233 @@
+# backend/ai_client.py
+"""
+How the backend reaches the AI services.
+
+  AI_MODE=http (default)   HTTPAIClient calls the AI app at AI_BASE_URL.
+  AI_MODE=inprocess        InProcessAIClient calls ai/pipeline.py directly in
+                           this process: no re-upload of audio, no WAV download,
+                           same scheduler executors and ASR cache as the AI app.
+
+Both return ready-to-send responses and raise HTTPException (503 with
+Retry-After when the AI scheduler sheds the call), so routers don't care
+which one is configured. In-process mode needs the AI dependencies
+(faster-whisper, phonemizer, pyttsx3, Gemini) installed in the backend.
+"""
+import os
+import asyncio
+import hashlib
+import httpx
+import orjson
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+from common.metrics import span, counter
+from common.responses import dumps
+
+load_dotenv()
+AI_MODE = os.getenv("AI_MODE", "http").strip().lower()
+AI_BASE = os.getenv("AI_BASE_URL", "http://localhost:8001")
+
+# Global default timeout (60s covers pyttsx3)
+TIMEOUT = httpx.Timeout(60.0)
+LONG_TIMEOUT = httpx.Timeout(90.0)
+LLM_TIMEOUT_S = 90.0
+
+# forwarded from the AI app's TTS response
+_AUDIO_HEADERS = ("content-disposition", "etag", "vary", "x-tts-format")
+
+ASR_BRIDGE_CACHE = counter("ai_bridge_asr_lookup_total", "ASR hash lookups before uploading audio", ("result",))
+
+
+def priority_header(priority: str) -> dict:
+    # AI layer scheduler class: interactive (child waiting), prefetch, background
+    return {"X-Work-Priority": priority}
+
+
+def _json(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _busy(what: str, retry_after) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"{what} busy, retry later",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+class HTTPAIClient:
+    """Calls the AI app over HTTP."""
+
+    mode = "http"
+
+    def __init__(self, base_url=AI_BASE):
+        self.base_url = base_url
+
+    async def start(self):
+        pass
+
+    def _check(self, r: httpx.Response, what: str, status_code=500):
+        if r.status_code == 503:
+            # AI layer shed the request; pass the 503 and its Retry-After through
+            raise _busy(what, r.headers.get("Retry-After", "5"))
+        if r.status_code != 200:
+            raise HTTPException(status_code=status_code or r.status_code, detail=f"{what} failed: {r.text}")
+
+    async def evaluate(self, audio, filename, content_type, expected_text, exercise_type=None, priority="interactive"):
+        """
+        The audio hash is checked with AI /asr/lookup first, so retried uploads
+        are answered without sending the audio again.
+        """
+        data = {"expected_text": expected_text}
+        if exercise_type:
+            data["exercise_type"] = exercise_type
+        try:
+            async with httpx.AsyncClient(timeout=LONG_TIMEOUT) as client:
+                lookup = {**data, "audio_sha256": hashlib.sha256(audio).hexdigest()}
+                with span("ai.asr_lookup"):
+                    r = await client.post(f"{self.base_url}/asr/lookup", data=lookup)
+                if r.status_code == 200:
+                    ASR_BRIDGE_CACHE.inc(result="hit")
+                    print("ASR evaluation served from AI cache.")
+                    return _json(r.content)
+                ASR_BRIDGE_CACHE.inc(result="miss")
+
+                files = {"file": (filename, audio, content_type)}
+                with span("ai.asr_evaluate"):
+                    r = await client.post(
+                        f"{self.base_url}/asr/evaluate", files=files, data=data, headers=priority_header(priority)
+                    )
+        except httpx.ReadTimeout:
+            print("Timeout: AI ASR took too long.")
+            raise HTTPException(status_code=504, detail="AI ASR timed out.")
+        self._check(r, "ASR evaluation")
+        # AI layer already returns the declared JSON; forward the bytes instead of decoding and re-encoding
+        return _json(r.content)
+
+    async def speak(self, text, priority="interactive", fmt=None, accept=None):
+        """Streams the AI app's audio through as it arrives (format / Accept are forwarded)."""
+        data = {"text": text}
+        if fmt:
+            data["format"] = fmt
+        headers = priority_header(priority)
+        if accept:
+            headers["Accept"] = accept
+
+        client = httpx.AsyncClient(timeout=TIMEOUT)
+        try:
+            with span("ai.tts"):
+                r = await client.send(
+                    client.build_request("POST", f"{self.base_url}/tts/speak", data=data, headers=headers),
+                    stream=True,
+                )
+            if r.status_code != 200:
+                await r.aread()
+                await r.aclose()
+                self._check(r, "TTS", status_code=None)
+        except httpx.ReadTimeout:
+            await client.aclose()
+            print("Timeout: AI TTS took too long to respond.")
+            raise HTTPException(status_code=504, detail="AI TTS timed out (increase TIMEOUT or check AI logs).")
+        except BaseException:
+            await client.aclose()
+            raise
+
+        async def body():
+            try:
+                async for chunk in r.aiter_bytes():
+                    yield chunk
+            finally:
+                await r.aclose()
+                await client.aclose()
+
+        return StreamingResponse(
+            body(),
+            media_type=r.headers.get("content-type", "audio/wav"),
+            headers={k: r.headers[k] for k in _AUDIO_HEADERS if k in r.headers},
+        )
+
+    async def microdrills(self, payload, priority="prefetch", timeout=LLM_TIMEOUT_S):
+        """The generated drills (list)."""
+        try:
+            async with httpx.AsyncClient(timeout=httpx.Timeout(timeout)) as client:
+                with span("ai.microdrills"):
+                    r = await client.post(
+                        f"{self.base_url}/llm/generate_microdrills", json=payload, headers=priority_header(priority)
+                    )
+        except httpx.TimeoutException:
+            print("Timeout: AI LLM took too long.")
+            raise HTTPException(status_code=504, detail="AI LLM timed out.")
+        self._check(r, "Microdrill generation")
+        return orjson.loads(r.content).get("microdrills", [])
+
+
+class InProcessAIClient:
+    """Runs the AI pipeline inside the backend process."""
+
+    mode = "inprocess"
+
+    def __init__(self):
+        # imported here so AI_MODE=http backends don't load Whisper / espeak
+        from ai import pipeline
+        from ai.schemas import EvaluateResponse
+
+        self.pipeline = pipeline
+        self.EvaluateResponse = EvaluateResponse
+
+    async def start(self):
+        # load the default Whisper model before the first request (as the AI app's lifespan does)
+        from ai.asr.asr_service import warm_default_model
+
+        warm_default_model()
+
+    async def _call(self, what, coro):
+        try:
+            return await coro
+        except self.pipeline.Overloaded as e:
+            raise _busy(what, e.retry_after)
+
+    def _serialize(self, model, data):
+        # same bytes the AI app would send for its response_model
+        return _json(dumps(model.model_validate(data).model_dump(mode="json")))
+
+    async def evaluate(self, audio, filename, content_type, expected_text, exercise_type=None, priority="interactive"):
+        with span("ai.asr_evaluate", "inprocess"):
+            result = await self._call(
+                "ASR evaluation",
+                self.pipeline.evaluate(audio, filename, expected_text, exercise_type, priority),
+            )
+        return self._serialize(self.EvaluateResponse, result)
+
+    async def speak(self, text, priority="interactive", fmt=None, accept=None):
+        from ai.tts.tts_formats import negotiate, stream_audio
+
+        try:
+            fmt = negotiate(fmt, accept)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        with span("ai.tts", "inprocess"):
+            path = await self._call("TTS", self.pipeline.speak(text, priority, fmt))
+        return stream_audio(path, fmt)
+
+    async def microdrills(self, payload, priority="prefetch", timeout=LLM_TIMEOUT_S):
+        """The generated drills (list)."""
+        try:
+            with span("ai.microdrills", "inprocess"):
+                return await asyncio.wait_for(
+                    self._call("Microdrill generation", self.pipeline.microdrills(payload, priority)), timeout
+                )
+        except asyncio.TimeoutError:
+            print("Timeout: AI LLM took too long.")
+            raise HTTPException(status_code=504, detail="AI LLM timed out.")
+
+
+def make_client(mode=AI_MODE):
+    if mode == "inprocess":
+        return InProcessAIClient()
+    if mode != "http":
+        raise ValueError(f"AI_MODE must be 'http' or 'inprocess', not {mode!r}")
+    return HTTPAIClient()
+
+
+client = make_client()
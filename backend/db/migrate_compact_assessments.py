@@ -0,0 +1,102 @@
+# backend/db/migrate_compact_assessments.py
+"""
+Rewrites assessment_sessions documents into the compact format.
+
+    python -m backend.db.migrate_compact_assessments                 # raw -> compact
+    python -m backend.db.migrate_compact_assessments --archive-days 90   # also zlib-pack docs older than 90 days
+    python -m backend.db.migrate_compact_assessments --dry-run
+
+Every rewritten document is expanded again and compared with the original
+before it is written; the migration stops at the first one that differs.
+"""
+import argparse
+import asyncio
+import bson
+from datetime import datetime, timedelta
+from backend.db.mongo_connection import connect
+from backend.models.assessment_compact import (
+    COMPACT_FORMAT,
+    PACKED_FORMAT,
+    compact_assessment_doc,
+    pack_assessment_doc,
+    expand_questions,
+    normalize_questions,
+)
+
+
+# keys that only describe the stored layout (compared via expand_questions instead)
+_LAYOUT_FIELDS = {"questions", "format", "question_count", "word_count", "strings", "q", "w", "packed"}
+
+
+class RoundTripError(RuntimeError):
+    pass
+
+
+def _size(doc):
+    return len(bson.encode(doc))
+
+
+def _check_round_trip(doc, new_doc):
+    """Raises RoundTripError unless new_doc expands back to the same data as doc."""
+    if doc.get("format") is None:
+        questions = normalize_questions(doc.get("questions", []))
+    else:
+        questions = expand_questions(doc)
+    same_fields = {k: v for k, v in doc.items() if k not in _LAYOUT_FIELDS} == {
+        k: v for k, v in new_doc.items() if k not in _LAYOUT_FIELDS
+    }
+    if not same_fields or expand_questions(new_doc) != questions:
+        raise RoundTripError(f"assessment {doc['_id']} does not survive compaction; nothing written for it")
+
+
+async def migrate(dry_run=False, archive_days=None, batch_size=500):
+    db = connect()
+    coll = db["assessment_sessions"]
+    cutoff = datetime.utcnow() - timedelta(days=archive_days) if archive_days is not None else None
+
+    query = {"format": {"$ne": PACKED_FORMAT}} if cutoff is not None else {"format": {"$exists": False}}
+    stats = {"seen": 0, "compacted": 0, "packed": 0, "bytes_before": 0, "bytes_after": 0}
+
+    async for doc in coll.find(query).batch_size(batch_size):
+        stats["seen"] += 1
+        new_doc = doc
+        if doc.get("format") is None:
+            new_doc = compact_assessment_doc(doc)
+            stats["compacted"] += 1
+        created = new_doc.get("created_at")
+        if cutoff is not None and new_doc.get("format") == COMPACT_FORMAT and created and created < cutoff:
+            try:
+                new_doc = pack_assessment_doc(new_doc)
+            except (TypeError, ValueError) as e:   # an extra field that JSON cannot hold
+                raise RoundTripError(f"assessment {doc['_id']} cannot be packed: {e}")
+            stats["packed"] += 1
+        if new_doc is doc:
+            continue
+
+        _check_round_trip(doc, new_doc)
+        stats["bytes_before"] += _size(doc)
+        stats["bytes_after"] += _size(new_doc)
+        if not dry_run:
+            await coll.replace_one({"_id": doc["_id"]}, new_doc)
+
+    return stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert assessment_sessions to the compact format")
+    ap.add_argument("--dry-run", action="store_true", help="report sizes without writing")
+    ap.add_argument("--archive-days", type=int, default=None, help="zlib-pack assessments older than this")
+    ap.add_argument("--batch-size", type=int, default=500)
+    args = ap.parse_args()
+
+    try:
+        stats = asyncio.run(migrate(args.dry_run, args.archive_days, args.batch_size))
+    except RoundTripError as e:
+        raise SystemExit(f"❌ Migration aborted: {e}")
+    print("✅ Migration finished" + (" (dry run)" if args.dry_run else ""))
+    for k, v in stats.items():
+        print(f"   {k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
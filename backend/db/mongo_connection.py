@@ -1,24 +1,181 @@
 # backend/db/mongo_connection.py
+"""
+Mongo client for the backend, opened and closed by the FastAPI lifespan
+(backend/main.py). Handlers use get_db(), or get_analytics_db() for analytics /
+dashboard reads, which may be served by secondaries.
+
+Pool, timeouts and compression come from the environment:
+    MONGO_MAX_POOL_SIZE (100), MONGO_MIN_POOL_SIZE (0), MONGO_MAX_IDLE_TIME_MS (0 = no limit),
+    MONGO_WAIT_QUEUE_TIMEOUT_MS (0 = no limit), MONGO_SERVER_SELECTION_TIMEOUT_MS (5000),
+    MONGO_CONNECT_TIMEOUT_MS (5000), MONGO_SOCKET_TIMEOUT_MS (0 = no limit),
+    MONGO_COMPRESSORS ("" / "zstd,zlib"; zstd needs the zstandard package),
+    MONGO_ANALYTICS_READ_PREFERENCE (secondaryPreferred)
+"""
 import os
+import time
+import threading
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+from pymongo.monitoring import ConnectionPoolListener
 from dotenv import load_dotenv
+from common.metrics import span, counter, gauge, histogram
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI", "")
 MONGO_DB = os.getenv("MONGO_DB", "lexilift")
 
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+MONGO_ANALYTICS_READ_PREFERENCE = os.getenv("MONGO_ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
 client: AsyncIOMotorClient = None
 db = None
+analytics_db = None
+
+
+# -----------------------------------------------------------
+# Pool metrics
+# -----------------------------------------------------------
+POOL_WAIT_SECONDS = histogram(
+    "mongo_pool_wait_seconds",
+    "Time to check a connection out of the pool",
+    ("outcome",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+POOL_CHECKED_OUT = gauge("mongo_pool_checked_out", "Connections currently checked out")
+POOL_CONNECTIONS = gauge("mongo_pool_connections", "Open pool connections")
+POOL_CHECKOUT_FAILED = counter("mongo_pool_checkout_failed_total", "Failed connection checkouts", ("reason",))
+
+
+class PoolMetricsListener(ConnectionPoolListener):
+    """Feeds pool checkout waits and connection counts into /metrics."""
+
+    def __init__(self):
+        # fallback timing for drivers whose events have no duration (one checkout per thread at a time)
+        self._started = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._started.t = time.perf_counter()
+
+    def _waited(self, event):
+        duration = getattr(event, "duration", None)
+        if duration is None:
+            duration = time.perf_counter() - getattr(self._started, "t", time.perf_counter())
+        return duration
+
+    def connection_checked_out(self, event):
+        POOL_WAIT_SECONDS.observe(self._waited(event), outcome="ok")
+        POOL_CHECKED_OUT.inc()
+
+    def connection_check_out_failed(self, event):
+        POOL_WAIT_SECONDS.observe(self._waited(event), outcome="failed")
+        POOL_CHECKOUT_FAILED.inc(reason=str(event.reason))
+
+    def connection_checked_in(self, event):
+        POOL_CHECKED_OUT.dec()
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS.inc()
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS.dec()
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
 
-def connect():
-    global client, db
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+# -----------------------------------------------------------
+# Client lifecycle
+# -----------------------------------------------------------
+def client_options():
+    opts = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "event_listeners": [PoolMetricsListener()],
+    }
+    if MONGO_MAX_IDLE_TIME_MS:
+        opts["maxIdleTimeMS"] = MONGO_MAX_IDLE_TIME_MS
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        opts["waitQueueTimeoutMS"] = MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if MONGO_SOCKET_TIMEOUT_MS:
+        opts["socketTimeoutMS"] = MONGO_SOCKET_TIMEOUT_MS
+    if MONGO_COMPRESSORS:
+        opts["compressors"] = MONGO_COMPRESSORS
+    return opts
+
+
+def use_client(new_client):
+    """Installs a client (the real one, or a stand-in for benchmarks)."""
+    global client, db, analytics_db
+    client = new_client
+    db = client[MONGO_DB]
+    analytics_db = client.get_database(
+        MONGO_DB, read_preference=READ_PREFERENCES.get(MONGO_ANALYTICS_READ_PREFERENCE, ReadPreference.PRIMARY)
+    )
+    return db
+
+
+def open_client():
+    """Creates the client if none is installed yet (lifespan startup)."""
     if client is None:
-        client = AsyncIOMotorClient(MONGO_URI)
-        db = client[MONGO_DB]
+        use_client(AsyncIOMotorClient(MONGO_URI, **client_options()))
     return db
 
+
+def get_db():
+    # lazily opened for scripts that run outside the app lifespan
+    return db if client is not None else open_client()
+
+
+def get_analytics_db():
+    if client is None:
+        open_client()
+    return analytics_db
+
+
+# kept for scripts written against the old helper
+connect = get_db
+
+
 def close():
-    global client
+    global client, db, analytics_db
     if client:
         client.close()
+    client = db = analytics_db = None
+
+
+async def ping():
+    """Round-trip time (ms) of a ping to the primary; raises if unreachable."""
+    t0 = time.perf_counter()
+    with span("mongo.ping"):
+        await get_db().command("ping")
+    return (time.perf_counter() - t0) * 1000.0
@@ -0,0 +1,115 @@
+# backend/db/response_cache.py
+"""
+Conditional GET for per-user dashboard reads.
+
+Every user has a version number, bumped by writes that change what the
+dashboard shows (session submit, assessment submit, profile update). A GET
+response's ETag is derived from that version, so:
+  - If-None-Match with the current ETag -> 304, no Mongo query at all;
+  - otherwise the body is served from a small in-process LRU while the
+    version is unchanged, and rebuilt from Mongo after a write.
+
+Versions live in this process (the ETag carries a boot id so a restart never
+matches old ETags). With several backend processes, run one per user shard or
+set RESPONSE_CACHE_ENABLED=0. ETags also roll over every RESPONSE_CACHE_TTL_S,
+so writes made outside this API show up within that time.
+"""
+import os
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+from common.metrics import counter
+from common.responses import dumps
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "300"))
+# right after a write, reads may come from a lagging secondary: don't cache or tag them
+RESPONSE_CACHE_SETTLE_S = float(os.getenv("RESPONSE_CACHE_SETTLE_S", "2"))
+
+BOOT_ID = uuid.uuid4().hex[:8]
+CACHE_CONTROL = "private, no-cache"   # browsers may keep it but must revalidate
+
+CONDITIONAL_GETS = counter("conditional_get_total", "Dashboard GETs by outcome", ("endpoint", "result"))
+
+_versions = {}                 # user_id -> int
+_bumped_at = {}                # user_id -> monotonic time of the last bump
+_cache = OrderedDict()         # request key -> (etag, body)
+
+
+def version(user_id):
+    return _versions.get(str(user_id), 0)
+
+
+def bump(user_id):
+    """Call after any write that changes this user's dashboard data."""
+    if user_id is None:
+        return
+    user_id = str(user_id)
+    _versions[user_id] = _versions.get(user_id, 0) + 1
+    _bumped_at[user_id] = time.monotonic()
+
+
+def bump_for_documents(collection, docs):
+    # write-behind hook: documents become visible only when their batch is written
+    for user_id in {str(d.get("user_id")) for d in docs if d.get("user_id") is not None}:
+        bump(user_id)
+
+
+def _etag(key, ver):
+    window = int(time.time() // RESPONSE_CACHE_TTL_S)
+    return f'W/"{BOOT_ID}-{ver}-{window}-{zlib.crc32(key.encode("utf-8")):08x}"'
+
+
+def _matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or etag[2:] in tags
+
+
+def _serialize(data, model):
+    if model is not None:
+        # same shape FastAPI would produce from response_model
+        data = model.model_validate(data).model_dump(mode="json", by_alias=True)
+    return dumps(data)
+
+
+async def conditional_response(request: Request, user_id, endpoint, build, model=None):
+    """
+    Serves a per-user GET: 304 if the client's ETag is current, the cached body
+    if this version was already built, otherwise await build() (which may raise
+    HTTPException) and cache the result.
+    """
+    settling = time.monotonic() - _bumped_at.get(str(user_id), float("-inf")) < RESPONSE_CACHE_SETTLE_S
+    if not RESPONSE_CACHE_ENABLED or settling:
+        return Response(_serialize(await build(), model), media_type="application/json")
+
+    key = f"{request.url.path}?{request.url.query}"
+    ver = version(user_id)
+    etag = _etag(key, ver)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        CONDITIONAL_GETS.inc(endpoint=endpoint, result="not_modified")
+        return Response(status_code=304, headers=headers)
+
+    hit = _cache.get(key)
+    if hit is not None and hit[0] == etag:
+        _cache.move_to_end(key)
+        CONDITIONAL_GETS.inc(endpoint=endpoint, result="cache_hit")
+        return Response(hit[1], media_type="application/json", headers=headers)
+
+    body = _serialize(await build(), model)
+    if version(user_id) == ver:
+        # don't cache under this ETag if a write landed while we were reading
+        _cache[key] = (etag, body)
+        _cache.move_to_end(key)
+        while len(_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    CONDITIONAL_GETS.inc(endpoint=endpoint, result="miss")
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,142 @@
+# backend/db/write_behind.py
+"""
+Write-behind batching for insert-heavy collections (sessions, assessments).
+
+With WRITE_BEHIND_ENABLED=1, insert_document() puts the document in a
+per-collection buffer and one insert_many writes the whole buffer when it
+reaches WRITE_BEHIND_MAX_BATCH documents or WRITE_BEHIND_MAX_DELAY_MS after
+the first one arrived. The _id is generated here (ObjectId), so callers have
+it before the write happens.
+
+WRITE_BEHIND_DURABLE=1 (default) makes insert_document() wait until its batch
+is written (group commit: fewer round-trips, errors still reach the caller).
+With 0 it returns as soon as the document is buffered; buffered documents
+are lost if the process dies before the next flush. flush_all() runs on
+shutdown (backend lifespan).
+"""
+import os
+import asyncio
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from backend.db.mongo_connection import get_db
+from common.metrics import span, counter, gauge, histogram
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "0") == "1"
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "100"))
+WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "50"))
+WRITE_BEHIND_DURABLE = os.getenv("WRITE_BEHIND_DURABLE", "1") == "1"
+
+WB_BUFFERED = gauge("write_behind_buffered_documents", "Documents waiting to be written", ("collection",))
+WB_FLUSHES = counter("write_behind_flushes_total", "insert_many calls by trigger", ("collection", "reason"))
+WB_FAILED = counter("write_behind_failed_documents_total", "Buffered documents that could not be written", ("collection",))
+WB_BATCH = histogram(
+    "write_behind_batch_documents",
+    "Documents per insert_many",
+    ("collection",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+
+class WriteBehindBuffer:
+    def __init__(self, get_db=get_db, max_batch=WRITE_BEHIND_MAX_BATCH,
+                 max_delay_ms=WRITE_BEHIND_MAX_DELAY_MS, durable=WRITE_BEHIND_DURABLE):
+        self.get_db = get_db
+        self.max_batch = max(1, max_batch)
+        self.max_delay_s = max_delay_ms / 1000.0
+        self.durable = durable
+        self._pending = {}     # collection -> [(doc, future or None)]
+        self._timers = {}      # collection -> TimerHandle
+        self._writes = set()   # running insert_many tasks
+        self.on_written = []   # callbacks(collection, docs) after a batch is stored
+
+    def buffered(self, collection=None):
+        if collection is not None:
+            return len(self._pending.get(collection, ()))
+        return sum(len(v) for v in self._pending.values())
+
+    async def insert(self, collection, doc, durable=None):
+        """Buffers doc and returns its _id (after the write if durable)."""
+        durable = self.durable if durable is None else durable
+        loop = asyncio.get_running_loop()
+        doc.setdefault("_id", ObjectId())
+        fut = loop.create_future() if durable else None
+
+        batch = self._pending.setdefault(collection, [])
+        batch.append((doc, fut))
+        WB_BUFFERED.set(len(batch), collection=collection)
+        if len(batch) >= self.max_batch:
+            self._flush(collection, "size")
+        elif collection not in self._timers:
+            self._timers[collection] = loop.call_later(self.max_delay_s, self._flush, collection, "time")
+
+        if fut is not None:
+            # the write goes ahead even if this request is cancelled
+            await asyncio.shield(fut)
+        return doc["_id"]
+
+    def _flush(self, collection, reason):
+        timer = self._timers.pop(collection, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(collection, None)
+        WB_BUFFERED.set(0, collection=collection)
+        if not batch:
+            return None
+        WB_FLUSHES.inc(collection=collection, reason=reason)
+        task = asyncio.get_running_loop().create_task(self._write(collection, batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+        return task
+
+    async def _write(self, collection, batch):
+        docs = [doc for doc, _ in batch]
+        WB_BATCH.observe(len(docs), collection=collection)
+        failed = {}
+        try:
+            with span("mongo.insert_many", collection):
+                await self.get_db()[collection].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # unordered: only the listed documents failed
+            for err in e.details.get("writeErrors", []):
+                failed[err["index"]] = BulkWriteError({"writeErrors": [err]})
+        except Exception as e:
+            failed = {i: e for i in range(len(batch))}
+
+        if failed:
+            WB_FAILED.inc(len(failed), collection=collection)
+            print(f"Write-behind: {len(failed)}/{len(batch)} documents not written to {collection}")
+        written = [doc for i, doc in enumerate(docs) if i not in failed]
+        for callback in self.on_written:
+            callback(collection, written)
+        for i, (_, fut) in enumerate(batch):
+            if fut is None or fut.done():
+                continue
+            if i in failed:
+                fut.set_exception(failed[i])
+            else:
+                fut.set_result(True)
+
+    async def flush_all(self):
+        """Writes everything buffered and waits for running writes (shutdown hook)."""
+        for collection in list(self._pending):
+            self._flush(collection, "shutdown")
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+
+buffer = WriteBehindBuffer()
+
+
+async def insert_document(collection, doc):
+    """Inserts one document (through the write-behind buffer when enabled) and returns its _id."""
+    if WRITE_BEHIND_ENABLED:
+        return await buffer.insert(collection, doc)
+    doc.setdefault("_id", ObjectId())
+    with span("mongo.insert_one", collection):
+        await get_db()[collection].insert_one(doc)
+    return doc["_id"]
+
+
+async def flush_all():
+    await buffer.flush_all()
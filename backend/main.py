@@ -1,10 +1,28 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from backend.routers import ai_bridge, exercises, users, analytics
+from backend.routers import ai_bridge, exercises, users, analytics, lessons
 from backend.routers import assessment_router
+from backend.db import write_behind, mongo_connection, response_cache
+from backend import ai_client
+from common.metrics import MetricsMiddleware, metrics_response
+from backend.schemas.health_schema import DbHealth
+from common.responses import FastJSONResponse
+from fastapi.responses import PlainTextResponse
 import uvicorn
 
-app = FastAPI(title="LexiLift Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one Mongo client (and connection pool) for the whole app
+    mongo_connection.open_client()
+    # AI_MODE=inprocess: load Whisper here instead of in a separate AI app
+    await ai_client.client.start()
+    yield
+    # don't lose buffered session/assessment inserts on shutdown
+    await write_behind.flush_all()
+    mongo_connection.close()
+
+app = FastAPI(title="LexiLift Backend", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,12 +30,38 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, app_name="backend")
 
 app.include_router(users.router)
 app.include_router(exercises.router)
 app.include_router(ai_bridge.router)
 app.include_router(analytics.router)
 app.include_router(assessment_router.router)
+app.include_router(lessons.router)
+
+# buffered inserts change dashboards when they land, not when they're accepted
+write_behind.buffer.on_written.append(response_cache.bump_for_documents)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return metrics_response()
+
+@app.get("/health/db", response_model=DbHealth)
+async def health_db():
+    """Pings Mongo; 503 if it cannot be reached within the server selection timeout."""
+    try:
+        ping_ms = await mongo_connection.ping()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Mongo unreachable: {type(e).__name__}")
+    return {
+        "status": "ok",
+        "ping_ms": round(ping_ms, 2),
+        "pool": {
+            "max_size": mongo_connection.MONGO_MAX_POOL_SIZE,
+            "checked_out": mongo_connection.POOL_CHECKED_OUT.value(),
+            "connections": mongo_connection.POOL_CONNECTIONS.value(),
+        },
+    }
 
 if __name__ == "__main__":
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
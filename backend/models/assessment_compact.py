@@ -0,0 +1,221 @@
+# backend/models/assessment_compact.py
+"""
+Compact storage format for assessment sessions.
+
+Every string (words, phoneme strings, error types, question texts) is stored
+once in a per-document "strings" table and referenced by index; questions and
+per-word results are stored as parallel arrays (columns) instead of a list of
+objects. Fields outside the fixed columns (and non-string values of string
+fields) go into an optional per-question / per-word "extra" column, so
+nothing a client stored is lost. Archived documents can additionally be
+zlib-packed into one binary.
+
+expand_assessment_doc() turns any stored document (compact, packed or the
+old raw layout) back into the AssessmentCreate shape.
+"""
+import json
+import zlib
+from bson import Binary
+
+COMPACT_FORMAT = "compact-v1"
+PACKED_FORMAT = "compact-v1+zlib"
+
+QUESTION_STR_FIELDS = ("type", "expected_text", "spoken_text")
+WORD_STR_FIELDS = (
+    "expected",
+    "spoken",
+    "expected_phonemes",
+    "spoken_phonemes",
+    "error_type",
+    "mistaken_phoneme",
+    "substituted_with",
+)
+QUESTION_FIELDS = QUESTION_STR_FIELDS + ("index", "accuracy", "words")
+WORD_FIELDS = WORD_STR_FIELDS + ("phoneme_similarity",)
+
+
+class _Interner:
+    def __init__(self):
+        self.strings = []
+        self._index = {}
+
+    def __call__(self, value):
+        if value is None:
+            return -1
+        value = str(value)
+        idx = self._index.get(value)
+        if idx is None:
+            idx = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+
+def _extra(record, known, str_fields):
+    """Fields of record that the columns cannot hold as-is, or None."""
+    extra = {k: v for k, v in record.items() if k not in known}
+    extra.update({f: record[f] for f in str_fields if record.get(f) is not None and not isinstance(record[f], str)})
+    return extra or None
+
+
+def _intern_str(intern, record, f):
+    value = record.get(f)
+    return intern(value) if value is None or isinstance(value, str) else -1
+
+
+def compact_questions(question_records):
+    """Returns (strings, questions_columns, words_columns) for a list of question dicts."""
+    intern = _Interner()
+    questions = {"index": [], "accuracy": [], "word_start": [], "extra": []}
+    questions.update({f: [] for f in QUESTION_STR_FIELDS})
+    words = {f: [] for f in WORD_STR_FIELDS}
+    words["phoneme_similarity"] = []
+    words["extra"] = []
+
+    for q in question_records:
+        questions["index"].append(q.get("index"))
+        questions["accuracy"].append(q.get("accuracy", 0.0))
+        questions["word_start"].append(len(words["expected"]))
+        questions["extra"].append(_extra(q, QUESTION_FIELDS, QUESTION_STR_FIELDS))
+        for f in QUESTION_STR_FIELDS:
+            questions[f].append(_intern_str(intern, q, f))
+        for w in q.get("words") or []:
+            for f in WORD_STR_FIELDS:
+                words[f].append(_intern_str(intern, w, f))
+            words["phoneme_similarity"].append(w.get("phoneme_similarity", 0.0))
+            words["extra"].append(_extra(w, WORD_FIELDS, WORD_STR_FIELDS))
+
+    # the extra columns are only stored when something needs them
+    for cols in (questions, words):
+        if not any(cols["extra"]):
+            del cols["extra"]
+    return intern.strings, questions, words
+
+
+def normalize_questions(question_records):
+    """
+    question_records as expand_questions() gives them back: fixed fields that
+    are missing filled with their defaults (None, or 0.0 for the scores).
+    """
+    out = []
+    for q in question_records:
+        words = []
+        for w in q.get("words") or []:
+            word = {f: None for f in WORD_STR_FIELDS}
+            word["phoneme_similarity"] = 0.0
+            words.append({**word, **w})
+        question = {f: None for f in QUESTION_STR_FIELDS}
+        question.update(index=None, accuracy=0.0)
+        out.append({**question, **q, "words": words})
+    return out
+
+
+def compact_assessment_doc(doc, compress=False):
+    """Converts a raw assessment document (build_assessment_session_doc layout) to the compact layout."""
+    strings, questions, words = compact_questions(doc.get("questions", []))
+    out = {k: v for k, v in doc.items() if k != "questions"}
+    out["format"] = COMPACT_FORMAT
+    out["question_count"] = len(questions["index"])
+    out["word_count"] = len(words["expected"])
+    out["strings"] = strings
+    out["q"] = questions
+    out["w"] = words
+    return pack_assessment_doc(out) if compress else out
+
+
+def pack_assessment_doc(doc):
+    """zlib-packs the strings/columns of a compact document (for archived assessments)."""
+    if doc.get("format") != COMPACT_FORMAT:
+        return doc
+    body = {"strings": doc["strings"], "q": doc["q"], "w": doc["w"]}
+    out = {k: v for k, v in doc.items() if k not in body}
+    out["format"] = PACKED_FORMAT
+    out["packed"] = Binary(zlib.compress(json.dumps(body, separators=(",", ":")).encode("utf-8"), 6))
+    return out
+
+
+def _unpack(doc):
+    if doc.get("format") == PACKED_FORMAT:
+        body = json.loads(zlib.decompress(bytes(doc["packed"])).decode("utf-8"))
+        doc = {**{k: v for k, v in doc.items() if k != "packed"}, **body, "format": COMPACT_FORMAT}
+    return doc
+
+
+def expand_questions(doc):
+    """Rebuilds the list of question dicts (QuestionRecord shape) from a compact or packed document."""
+    doc = _unpack(doc)
+    strings, q, w = doc["strings"], doc["q"], doc["w"]
+
+    def s(idx):
+        return None if idx < 0 else strings[idx]
+
+    n_words = len(w["expected"])
+    starts = q["word_start"] + [n_words]
+    q_extra, w_extra = q.get("extra"), w.get("extra")
+    questions = []
+    for i in range(len(q["index"])):
+        words = []
+        for j in range(starts[i], starts[i + 1]):
+            word = {f: s(w[f][j]) for f in WORD_STR_FIELDS}
+            word["phoneme_similarity"] = w["phoneme_similarity"][j]
+            if w_extra and w_extra[j]:
+                word.update(w_extra[j])
+            words.append(word)
+        question = {f: s(q[f][i]) for f in QUESTION_STR_FIELDS}
+        question.update(index=q["index"][i], accuracy=q["accuracy"][i])
+        if q_extra and q_extra[i]:
+            question.update(q_extra[i])
+        question["words"] = words
+        questions.append(question)
+    return questions
+
+
+def word_columns(doc, fields=WORD_STR_FIELDS):
+    """
+    Per-word string columns {field: [str or None, ...]} of any stored assessment
+    document, without building the per-question dicts.
+    """
+    if doc.get("format") in (COMPACT_FORMAT, PACKED_FORMAT):
+        d = _unpack(doc)
+        strings, w = d["strings"], d.get("w") or {}
+        n = max((len(v) for v in w.values()), default=0)
+        return {f: [strings[i] if i >= 0 else None for i in w[f]] if f in w else [None] * n for f in fields}
+    words = [w for q in doc.get("questions") or [] for w in q.get("words") or []]
+    return {f: [w.get(f) for w in words] for f in fields}
+
+
+def expand_assessment_doc(doc):
+    """Any stored assessment document -> AssessmentCreate shape (user_id, questions, overall_accuracy)."""
+    if doc.get("format") in (COMPACT_FORMAT, PACKED_FORMAT):
+        questions = expand_questions(doc)
+    else:
+        questions = doc.get("questions", [])
+    return {
+        "user_id": doc["user_id"],
+        "questions": questions,
+        "overall_accuracy": doc.get("overall_accuracy", 0.0),
+    }
+
+
+def summarize_assessment(doc):
+    """Small response body for a stored assessment (no per-word data)."""
+    if doc.get("format") in (COMPACT_FORMAT, PACKED_FORMAT):
+        d = _unpack(doc)
+        error_types = [d["strings"][i] if i >= 0 else None for i in d["w"]["error_type"]]
+        question_count, word_count = d["question_count"], d["word_count"]
+    else:
+        words = [w for q in doc.get("questions", []) for w in q.get("words") or []]
+        error_types = [w.get("error_type") for w in words]
+        question_count, word_count = len(doc.get("questions", [])), len(words)
+
+    error_counts = {}
+    for et in error_types:
+        et = et or "unknown"
+        error_counts[et] = error_counts.get(et, 0) + 1
+    return {
+        "user_id": doc["user_id"],
+        "overall_accuracy": doc.get("overall_accuracy", 0.0),
+        "question_count": question_count,
+        "word_count": word_count,
+        "error_counts": error_counts,
+        "created_at": doc.get("created_at"),
+    }
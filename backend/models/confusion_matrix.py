@@ -0,0 +1,345 @@
+# backend/models/confusion_matrix.py
+"""
+Phoneme confusion matrices (expected x produced) per user and for the cohort.
+
+Rows and columns follow the fixed inventory of common/phonemes.py plus
+OTHER ("?", symbols outside the inventory) and EPS ("_"): row EPS counts
+inserted sounds, column EPS counts omitted ones.
+
+Each word result in sessions / assessment_sessions is turned into matrix
+cells once per distinct (expected_phonemes, spoken_phonemes, mistaken_phoneme,
+substituted_with, error_type) combination:
+  - mistaken_phoneme / substituted_with, when set, give the confusion directly
+    and the rest of the expected phonemes count as produced correctly;
+  - otherwise the tokenized phoneme strings are aligned (SequenceMatcher
+    opcodes; unmatched phonemes pair with EPS).
+Counting is then done for all words at once with NumPy (np.unique /
+np.bincount over user x cell indices), not per document.
+
+Matrices are stored incrementally in the phoneme_confusion collection, one
+document per user ({"counts": {"b|d": 3, ...}}) plus the cohort document,
+which also holds the watermark: refresh() only reads documents whose _id is
+after it. Documents newer than CONFUSION_LAG_S are left for the next run so
+late inserts (write-behind, clock skew) are not skipped. Each run is applied
+at most once per document, so an interrupted run can simply be repeated.
+
+    python -m backend.models.confusion_matrix       # refresh now (e.g. from cron)
+"""
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from common.phonemes import PHONEME_COLORS, tokenize
+from common.metrics import span
+from backend.models.assessment_compact import word_columns
+
+CONFUSION_LAG_S = float(os.getenv("CONFUSION_LAG_S", "60"))
+CONFUSION_REFRESH_S = float(os.getenv("CONFUSION_REFRESH_S", "30"))
+CONFUSION_BATCH = int(os.getenv("CONFUSION_BATCH", "1000"))
+
+COLLECTION = "phoneme_confusion"
+COHORT_ID = "__cohort__"
+SOURCES = ("sessions", "assessment_sessions")
+
+OTHER = "?"
+EPS = "_"
+PHONEMES = tuple(PHONEME_COLORS) + (OTHER, EPS)
+INDEX = {p: i for i, p in enumerate(PHONEMES)}
+K = len(PHONEMES)
+EPS_I = INDEX[EPS]
+
+WORD_FIELDS = ("expected_phonemes", "spoken_phonemes", "mistaken_phoneme", "substituted_with", "error_type")
+_WORD_PROJECTION = {f"words.{f}": 1 for f in WORD_FIELDS}
+_ASSESSMENT_PROJECTION = {
+    "format": 1,
+    "strings": 1,
+    "packed": 1,
+    **{f"w.{f}": 1 for f in WORD_FIELDS},
+    **{f"questions.words.{f}": 1 for f in WORD_FIELDS},
+}
+
+
+def _index(token):
+    return INDEX.get(token, INDEX[OTHER])
+
+
+def _align(expected, produced):
+    """[(expected_index, produced_index), ...] for two token tuples."""
+    pairs = []
+    ops = SequenceMatcher(None, expected, produced, autojunk=False).get_opcodes()
+    for tag, i1, i2, j1, j2 in ops:
+        exp = [_index(t) for t in expected[i1:i2]]
+        got = [_index(t) for t in produced[j1:j2]]
+        n = min(len(exp), len(got))
+        pairs.extend(zip(exp[:n], got[:n]))
+        pairs.extend((e, EPS_I) for e in exp[n:])
+        pairs.extend((EPS_I, g) for g in got[n:])
+    return pairs
+
+
+@lru_cache(maxsize=200_000)
+def word_cells(expected_phonemes, spoken_phonemes, mistaken=None, substituted=None, error_type=None):
+    """Flat cell indices (row * K + col) one word result contributes."""
+    expected = tokenize(expected_phonemes or "")
+    if mistaken:
+        wrong = tokenize(mistaken)
+        rest = list(expected)
+        for t in wrong:
+            if t in rest:
+                rest.remove(t)
+        pairs = _align(wrong, tokenize(substituted or "")) + [(_index(t), _index(t)) for t in rest]
+    elif spoken_phonemes is not None:
+        pairs = _align(expected, tokenize(spoken_phonemes))
+    elif error_type == "correct":
+        pairs = [(_index(t), _index(t)) for t in expected]
+    else:
+        pairs = []   # nothing known about what was said
+    return np.array([r * K + c for r, c in pairs], dtype=np.int64)
+
+
+class ConfusionBuilder:
+    """Collects word results for many users, then counts them in one pass."""
+
+    def __init__(self):
+        self.users = []           # user index -> user_id
+        self._user_index = {}
+        self._pair_index = {}     # word key -> pair id
+        self._pair_cells = []     # pair id -> cell array
+        self._word_user = []
+        self._word_pair = []
+
+    @property
+    def words(self):
+        return len(self._word_pair)
+
+    def add_words(self, user_id, columns):
+        """columns: {field: [value per word]} for WORD_FIELDS (missing fields = None)."""
+        user_id = str(user_id)
+        u = self._user_index.get(user_id)
+        if u is None:
+            u = self._user_index[user_id] = len(self.users)
+            self.users.append(user_id)
+        n = max((len(v) for v in columns.values()), default=0)
+        cols = [columns.get(f) or [None] * n for f in WORD_FIELDS]
+        pair_index = self._pair_index
+        for key in zip(*cols):
+            if not key[0] and not key[2]:
+                continue   # no expected phonemes and no explicit confusion
+            p = pair_index.get(key)
+            if p is None:
+                p = pair_index[key] = len(self._pair_cells)
+                self._pair_cells.append(word_cells(*key))
+            self._word_pair.append(p)
+        self._word_user.extend([u] * (len(self._word_pair) - len(self._word_user)))
+
+    def add_session(self, doc):
+        words = doc.get("words") or []
+        self.add_words(doc["user_id"], {f: [w.get(f) for w in words] for f in WORD_FIELDS})
+
+    def add_assessment(self, doc):
+        self.add_words(doc["user_id"], word_columns(doc, WORD_FIELDS))
+
+    def build(self):
+        """
+        Returns (user_idx, cell, count, cohort): sparse per-user counts (parallel
+        int64 arrays, user_idx into self.users) and the dense K x K cohort total.
+        """
+        cohort = np.zeros((K, K), dtype=np.int64)
+        empty = np.zeros(0, dtype=np.int64)
+        if not self._word_pair:
+            return empty, empty, empty, cohort
+
+        pair_len = np.array([len(c) for c in self._pair_cells], dtype=np.int64)
+        flat = np.concatenate(self._pair_cells) if pair_len.sum() else empty
+        offsets = np.concatenate(([0], np.cumsum(pair_len)[:-1]))
+
+        # words -> (user, pair) counts
+        n_pairs = len(self._pair_cells)
+        keys = np.asarray(self._word_user, dtype=np.int64) * n_pairs + np.asarray(self._word_pair, dtype=np.int64)
+        uniq, counts = np.unique(keys, return_counts=True)
+        users, pairs = uniq // n_pairs, uniq % n_pairs
+
+        # (user, pair) -> (user, cell): expand each pair into its cells
+        lens = pair_len[pairs]
+        total = int(lens.sum())
+        if total == 0:
+            return empty, empty, empty, cohort
+        ends = np.cumsum(lens)
+        idx = np.repeat(offsets[pairs] - (ends - lens), lens) + np.arange(total)
+        cells = flat[idx]
+        weights = np.repeat(counts, lens)
+
+        cohort += np.bincount(cells, weights=weights, minlength=K * K).astype(np.int64).reshape(K, K)
+        uniq, inverse = np.unique(np.repeat(users, lens) * (K * K) + cells, return_inverse=True)
+        summed = np.bincount(inverse.ravel(), weights=weights).astype(np.int64)
+        return uniq // (K * K), uniq % (K * K), summed, cohort
+
+
+def cell_key(cell):
+    return f"{PHONEMES[cell // K]}|{PHONEMES[cell % K]}"
+
+
+def counts_to_matrix(counts):
+    """Stored {"b|d": n} -> K x K int64 array (unknown phoneme names count as OTHER)."""
+    matrix = np.zeros((K, K), dtype=np.int64)
+    if counts:
+        rows, cols, vals = [], [], []
+        for key, n in counts.items():
+            exp, _, got = key.partition("|")
+            rows.append(_index(exp))
+            cols.append(_index(got))
+            vals.append(n)
+        np.add.at(matrix, (np.array(rows), np.array(cols)), np.array(vals, dtype=np.int64))
+    return matrix
+
+
+def _bulk_ops(users, user_idx, cells, counts, cohort, through, now):
+    ops = []
+    order = np.argsort(user_idx, kind="stable")
+    user_idx, cells, counts = user_idx[order], cells[order], counts[order]
+    bounds = np.flatnonzero(np.diff(user_idx)) + 1
+    for u, c, n in zip(np.split(user_idx, bounds), np.split(cells, bounds), np.split(counts, bounds)):
+        if not len(u):
+            continue
+        inc = {f"counts.{cell_key(int(cell))}": int(v) for cell, v in zip(c, n)}
+        ops.append(UpdateOne(
+            # through != this run: a repeated run does not count the same documents twice
+            {"_id": users[int(u[0])], "through": {"$ne": through}},
+            {"$inc": inc, "$set": {"through": through, "updated_at": now}},
+            upsert=True,
+        ))
+    rows, cols = np.nonzero(cohort)
+    inc = {f"counts.{cell_key(int(r) * K + int(c))}": int(cohort[r, c]) for r, c in zip(rows, cols)}
+    update = {"$set": {"through": through, "updated_at": now}}
+    if inc:
+        update["$inc"] = inc
+    ops.append(UpdateOne({"_id": COHORT_ID, "through": {"$ne": through}}, update, upsert=True))
+    return ops
+
+
+async def refresh(db, lag_s=CONFUSION_LAG_S, batch_size=CONFUSION_BATCH):
+    """Adds every source document since the watermark to the stored matrices."""
+    coll = db[COLLECTION]
+    state = await coll.find_one({"_id": COHORT_ID}, {"through": 1, "pending": 1}) or {}
+    if state.get("pending") is None:
+        upper = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=lag_s))
+        if state.get("through") is not None and upper <= state["through"]:
+            return {"documents": 0, "words": 0, "users": 0, "through": state["through"]}
+        try:
+            # claim the run: concurrent refreshes (other workers, the CLI) all work on the same
+            # bounds, and a run that dies after this point is redone with them
+            state = await coll.find_one_and_update(
+                {"_id": COHORT_ID, "pending": {"$exists": False}},
+                {"$set": {"pending": upper}},
+                projection={"through": 1, "pending": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # another run claimed it first: do (or finish) that one
+            state = await coll.find_one({"_id": COHORT_ID}, {"through": 1, "pending": 1}) or {}
+    through, upper = state.get("through"), state.get("pending")
+    if upper is None or (through is not None and upper <= through):
+        if upper is not None:
+            await coll.update_one({"_id": COHORT_ID, "pending": upper}, {"$unset": {"pending": ""}})
+        return {"documents": 0, "words": 0, "users": 0, "through": through}
+
+    id_range = {"$lte": upper} if through is None else {"$gt": through, "$lte": upper}
+    builder = ConfusionBuilder()
+    documents = 0
+    for source in SOURCES:
+        projection = {"user_id": 1, **(_WORD_PROJECTION if source == "sessions" else _ASSESSMENT_PROJECTION)}
+        add = builder.add_session if source == "sessions" else builder.add_assessment
+        with span("mongo.find", source):
+            async for doc in db[source].find({"_id": id_range}, projection).batch_size(batch_size):
+                if doc.get("user_id") is not None:
+                    add(doc)
+                    documents += 1
+
+    with span("confusion.build"):
+        user_idx, cells, counts, cohort = builder.build()
+    ops = _bulk_ops(builder.users, user_idx, cells, counts, cohort, upper, datetime.utcnow())
+    try:
+        with span("mongo.bulk_write", COLLECTION):
+            await coll.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # duplicate key = that document was already updated by an earlier attempt of this run
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    await coll.update_one({"_id": COHORT_ID, "through": upper}, {"$unset": {"pending": ""}})
+    return {"documents": documents, "words": builder.words, "users": len(builder.users), "through": upper}
+
+
+_last_refresh = float("-inf")
+_refresh_lock = asyncio.Lock()
+
+
+async def refresh_if_stale(db):
+    """refresh() at most every CONFUSION_REFRESH_S in this process (one run at a time)."""
+    global _last_refresh
+    if time.monotonic() - _last_refresh < CONFUSION_REFRESH_S:
+        return
+    async with _refresh_lock:
+        if time.monotonic() - _last_refresh < CONFUSION_REFRESH_S:
+            return
+        await refresh(db)
+        _last_refresh = time.monotonic()
+
+
+def describe(matrix, top=10):
+    """Response body: the matrix restricted to phonemes that occur, plus the top confusions."""
+    used = np.flatnonzero(matrix.sum(axis=0) + matrix.sum(axis=1))
+    row_totals = matrix.sum(axis=1)
+    off = matrix.copy()
+    np.fill_diagonal(off, 0)
+    off[EPS_I, EPS_I] = 0
+    flat = np.argsort(off, axis=None)[::-1][:top]
+    confusions = []
+    for cell in flat:
+        r, c = divmod(int(cell), K)
+        if off[r, c] == 0:
+            break
+        confusions.append({
+            "expected": PHONEMES[r],
+            "produced": PHONEMES[c],
+            "count": int(off[r, c]),
+            "rate": round(float(off[r, c]) / max(1, int(row_totals[r])), 3),
+        })
+    return {
+        "phonemes": [PHONEMES[i] for i in used],
+        "matrix": matrix[np.ix_(used, used)].tolist(),
+        "total": int(matrix.sum()),
+        "top_confusions": confusions,
+    }
+
+
+async def load_confusion(db, key):
+    """Stored matrix (K x K) for a user id or COHORT_ID, and the time the data runs up to."""
+    with span("mongo.find", COLLECTION):
+        docs = await db[COLLECTION].find({"_id": {"$in": [key, COHORT_ID]}}, {"counts": 1, "through": 1}).to_list(2)
+    by_id = {d["_id"]: d for d in docs}
+    # the cohort watermark: users without new documents keep an older "through" of their own
+    through = by_id.get(COHORT_ID, {}).get("through")
+    return counts_to_matrix(by_id.get(key, {}).get("counts")), through.generation_time if through else None
+
+
+def main():
+    from backend.db.mongo_connection import connect
+
+    t0 = time.perf_counter()
+    stats = asyncio.run(refresh(connect()))
+    print(f"✅ Confusion matrices refreshed in {time.perf_counter() - t0:.2f}s")
+    for k, v in stats.items():
+        print(f"   {k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,56 @@
 # backend/routers/analytics.py
-from fastapi import APIRouter, HTTPException
-from backend.db.mongo_connection import connect
+from fastapi import APIRouter, Request
+from backend.db.mongo_connection import get_analytics_db, get_db
+from backend.db.response_cache import conditional_response
+from backend.schemas.analytics_schema import RecentSessionsResponse, SummaryResponse, ConfusionResponse
+from backend.models import confusion_matrix
 from bson import ObjectId
-from typing import List
+from common.metrics import span
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
-@router.get("/user/{user_id}/recent_sessions")
-async def recent_sessions(user_id: str, limit: int = 10):
-    db = connect()
-    docs = db["sessions"].find({"user_id": ObjectId(user_id)}).sort("created_at", -1).limit(limit)
-    res = []
-    async for d in docs:
-        d["id"] = str(d["_id"])
-        d.pop("_id", None)
-        # convert ObjectId user_id
-        d["user_id"] = str(d["user_id"]) if isinstance(d["user_id"], ObjectId) else d["user_id"]
-        res.append(d)
-    return {"sessions": res}
-
-@router.get("/user/{user_id}/summary")
-async def user_summary(user_id: str):
-    db = connect()
-    pipeline = [
-        {"$match": {"user_id": ObjectId(user_id)}},
-        {"$group": {"_id": "$exercise_type", "avg_accuracy": {"$avg": "$accuracy"}, "count": {"$sum": 1}}}
-    ]
-    agg = db["sessions"].aggregate(pipeline)
-    out = []
-    async for r in agg:
-        out.append(r)
-    return {"summary": out}
+# Dashboard reads go through get_analytics_db(), which may be served by a
+# secondary (MONGO_ANALYTICS_READ_PREFERENCE) and can lag the latest writes.
+
+@router.get("/user/{user_id}/recent_sessions", response_model=RecentSessionsResponse)
+async def recent_sessions(user_id: str, request: Request, limit: int = 10):
+    async def load():
+        db = get_analytics_db()
+        docs = db["sessions"].find({"user_id": ObjectId(user_id)}).sort("created_at", -1).limit(limit)
+        with span("mongo.find", "sessions"):
+            res = await docs.to_list(limit)
+        return {"sessions": res}
+
+    return await conditional_response(request, user_id, "recent_sessions", load, RecentSessionsResponse)
+
+@router.get("/user/{user_id}/summary", response_model=SummaryResponse)
+async def user_summary(user_id: str, request: Request):
+    async def load():
+        db = get_analytics_db()
+        pipeline = [
+            {"$match": {"user_id": ObjectId(user_id)}},
+            {"$group": {"_id": "$exercise_type", "avg_accuracy": {"$avg": "$accuracy"}, "count": {"$sum": 1}}}
+        ]
+        agg = db["sessions"].aggregate(pipeline)
+        with span("mongo.aggregate", "sessions"):
+            out = await agg.to_list(None)
+        return {"summary": out}
+
+    return await conditional_response(request, user_id, "summary", load, SummaryResponse)
+
+@router.get("/user/{user_id}/confusion", response_model=ConfusionResponse)
+async def user_confusion(user_id: str, top: int = 10):
+    """Phoneme confusion matrix (expected x produced) for one user."""
+    db = get_db()
+    # the watermark lives on the primary; refresh runs at most every CONFUSION_REFRESH_S
+    await confusion_matrix.refresh_if_stale(db)
+    matrix, through = await confusion_matrix.load_confusion(db, user_id)
+    return {"user_id": user_id, **confusion_matrix.describe(matrix, top), "through": through}
+
+@router.get("/cohort/confusion", response_model=ConfusionResponse)
+async def cohort_confusion(top: int = 10):
+    """Phoneme confusion matrix summed over every user."""
+    db = get_db()
+    await confusion_matrix.refresh_if_stale(db)
+    matrix, through = await confusion_matrix.load_confusion(db, confusion_matrix.COHORT_ID)
+    return {**confusion_matrix.describe(matrix, top), "through": through}
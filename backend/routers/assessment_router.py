@@ -1,12 +1,26 @@
-from fastapi import APIRouter
-from backend.db.mongo_connection import connect
+from fastapi import APIRouter, HTTPException
+from backend.db.mongo_connection import get_db
+from backend.db.write_behind import insert_document
+from backend.db.response_cache import bump
 from backend.models.assessment_session import build_assessment_session_doc
+from backend.models.assessment_compact import (
+    compact_assessment_doc,
+    expand_assessment_doc,
+    summarize_assessment,
+)
+from backend.schemas.assessment_schema import AssessmentSubmitResponse, AssessmentOut
+from bson import ObjectId
+from common.metrics import span
+import os
 
 router = APIRouter(prefix="/assessment", tags=["assessment"])
 
+# zlib-pack new assessments as well (the migration tool packs old ones)
+ASSESSMENT_COMPRESS = os.getenv("ASSESSMENT_COMPRESS", "0") == "1"
 
-@router.post("/submit")
-async def submit_full_assessment(payload: dict):
+
+@router.post("/submit", response_model=AssessmentSubmitResponse)
+async def submit_full_assessment(payload: dict, full: bool = False):
     """
     Frontend sends full 15-question results in one big JSON payload.
     {
@@ -14,9 +28,8 @@ async def submit_full_assessment(payload: dict):
       overall_accuracy: 0.72,
       questions: [...]
     }
+    Stored in the compact format; the response is a summary unless ?full=true.
     """
-    db = connect()
-
     # Extract prepared blocks
     user_id = payload["user_id"]
     questions = payload["questions"]
@@ -25,7 +38,37 @@ async def submit_full_assessment(payload: dict):
         user_id,
         questions
     )
+    stored_doc = compact_assessment_doc(final_doc, compress=ASSESSMENT_COMPRESS)
+
+    assessment_id = await insert_document("assessment_sessions", stored_doc)
+    bump(user_id)
+
+    response = {
+        "status": "completed",
+        "assessment_id": str(assessment_id),
+        "summary": summarize_assessment(stored_doc),
+    }
+    if full:
+        response["assessment"] = expand_assessment_doc(stored_doc)
+    return response
+
 
-    await db["assessment_sessions"].insert_one(final_doc)
+@router.get("/{assessment_id}", response_model=AssessmentOut)
+async def get_assessment(assessment_id: str):
+    """Returns one stored assessment expanded back to the AssessmentCreate shape."""
+    try:
+        obj_id = ObjectId(assessment_id)
+    except Exception:
+        raise HTTPException(400, "Invalid assessment ID")
 
-    return {"status": "completed", "assessment": final_doc}
+    db = get_db()
+    with span("mongo.find_one", "assessment_sessions"):
+        doc = await db["assessment_sessions"].find_one({"_id": obj_id})
+    if not doc:
+        raise HTTPException(404, "Assessment not found")
+
+    return {
+        "assessment_id": assessment_id,
+        "created_at": doc.get("created_at"),
+        **expand_assessment_doc(doc),
+    }
@@ -1,7 +1,24 @@
-@router.get("/lessons/next")
-async def get_next_phoneme(user_id: str):
-    db = connect()
-    profile = await db["phoneme_profiles"].find_one({"user_id": user_id})
+from fastapi import APIRouter, Request
+from backend.db.mongo_connection import get_db
+from backend.db.response_cache import conditional_response
+from backend.schemas.lesson_schema import NextPhonemeResponse
+from common.metrics import span
+
+router = APIRouter(tags=["lessons"])
+
+
+@router.get("/lessons/next", response_model=NextPhonemeResponse)
+async def get_next_phoneme(user_id: str, request: Request):
+    async def load():
+        return await _next_phoneme(user_id)
+
+    return await conditional_response(request, user_id, "lessons_next", load, NextPhonemeResponse)
+
+
+async def _next_phoneme(user_id: str):
+    db = get_db()
+    with span("mongo.find_one", "phoneme_profiles"):
+        profile = await db["phoneme_profiles"].find_one({"user_id": user_id})
     if not profile or not profile.get("phoneme_stats"):
         # fallback if no assessment yet
         return {"phoneme": "b", "difficulty": 1, "reason": "default"}
@@ -11,10 +28,10 @@ async def get_next_phoneme(user_id: str):
     # compute error rate per phoneme
     scored = []
     for ph, s in stats.items():
-      attempts = max(1, s.get("attempts", 1))
-      errors = s.get("errors", 0)
-      error_rate = errors / attempts
-      scored.append((ph, error_rate, attempts))
+        attempts = max(1, s.get("attempts", 1))
+        errors = s.get("errors", 0)
+        error_rate = errors / attempts
+        scored.append((ph, error_rate, attempts))
 
     # sort by highest error rate, then by attempts
     scored.sort(key=lambda x: (-x[1], -x[2]))
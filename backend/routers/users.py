@@ -1,19 +1,23 @@
-from fastapi import APIRouter, HTTPException
-from backend.schemas.user_schema import UserCreate, UserInDB, UserLogin
-from backend.db.mongo_connection import connect
+from fastapi import APIRouter, HTTPException, Request
+from typing import List
+from backend.schemas.user_schema import UserCreate, UserInDB, UserLogin, UserUpdate
+from backend.db.mongo_connection import get_db
+from backend.db.response_cache import conditional_response, bump
+from pymongo import ReturnDocument
 from bson import ObjectId
+from common.metrics import span
 import bcrypt
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-db = connect()
-
 # -------------------------------
 # SIGN UP (Hash password)
 # -------------------------------
-@router.post("/signup")
+@router.post("/signup", response_model=UserInDB)
 async def signup(user: UserCreate):
-    existing = await db.users.find_one({"email": user.email})
+    db = get_db()
+    with span("mongo.find_one", "users"):
+        existing = await db.users.find_one({"email": user.email})
     if existing:
         raise HTTPException(400, "User already exists")
 
@@ -23,24 +27,25 @@ async def signup(user: UserCreate):
     doc = user.dict()
     doc["password"] = hashed_pw.decode("utf-8")
 
-    result = await db.users.insert_one(doc)
-    saved_user = await db.users.find_one({"_id": result.inserted_id})
-
-    # Clean before sending response
-    saved_user["_id"] = str(saved_user["_id"])
-    saved_user.pop("password", None)
+    with span("mongo.insert_one", "users"):
+        result = await db.users.insert_one(doc)
+    with span("mongo.find_one", "users"):
+        saved_user = await db.users.find_one({"_id": result.inserted_id})
 
+    # password is left out by the UserInDB response model
     return saved_user
 
 
 # -------------------------------
 # LOGIN (Compare password)
 # -------------------------------
-@router.post("/login")
+@router.post("/login", response_model=UserInDB)
 async def login(credentials: UserLogin):
+    db = get_db()
 
     # Fetch user by email
-    user = await db.users.find_one({"email": credentials.email})
+    with span("mongo.find_one", "users"):
+        user = await db.users.find_one({"email": credentials.email})
     if not user:
         raise HTTPException(404, "User not found")
 
@@ -53,40 +58,63 @@ async def login(credentials: UserLogin):
     if not ok:
         raise HTTPException(401, "Invalid password")
 
-    # Clean before sending back
-    user["_id"] = str(user["_id"])
-    user.pop("password", None)
-
     return user
 
 
 # -------------------------------
 # LIST USERS
 # -------------------------------
-@router.get("/")
+@router.get("/", response_model=List[UserInDB])
 async def list_users():
-    users = []
-    async for u in db.users.find({}):
-        u["_id"] = str(u["_id"])
-        u.pop("password", None)
-        users.append(u)
+    db = get_db()
+    with span("mongo.find", "users"):
+        users = await db.users.find({}, {"password": 0}).to_list(None)
     return users
 
 
 # -------------------------------
 # GET SINGLE USER
 # -------------------------------
-@router.get("/{user_id}")
-async def get_user(user_id: str):
+@router.get("/{user_id}", response_model=UserInDB)
+async def get_user(user_id: str, request: Request):
+    try:
+        obj_id = ObjectId(user_id)
+    except:
+        raise HTTPException(400, "Invalid user ID")
+
+    async def load():
+        db = get_db()
+        with span("mongo.find_one", "users"):
+            user = await db.users.find_one({"_id": obj_id})
+        if not user:
+            raise HTTPException(404, "User not found")
+        return user
+
+    # dashboard polls this; unchanged profiles cost a 304 / cached body
+    return await conditional_response(request, user_id, "user", load, UserInDB)
+
+
+# -------------------------------
+# UPDATE PROFILE
+# -------------------------------
+@router.patch("/{user_id}", response_model=UserInDB)
+async def update_user(user_id: str, changes: UserUpdate):
     try:
         obj_id = ObjectId(user_id)
     except:
         raise HTTPException(400, "Invalid user ID")
 
-    user = await db.users.find_one({"_id": obj_id})
+    fields = changes.model_dump(exclude_unset=True)
+    db = get_db()
+    with span("mongo.find_one_and_update", "users"):
+        user = await db.users.find_one_and_update(
+            {"_id": obj_id},
+            {"$set": fields} if fields else {"$currentDate": {"updated_at": True}},
+            projection={"password": 0},
+            return_document=ReturnDocument.AFTER,
+        )
     if not user:
         raise HTTPException(404, "User not found")
 
-    user["_id"] = str(user["_id"])
-    user.pop("password", None)
+    bump(user_id)
     return user
@@ -0,0 +1,52 @@
+# backend/schemas/analytics_schema.py
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from backend.schemas.mongo_types import PyObjectId
+
+
+class SessionOut(BaseModel):
+    model_config = ConfigDict(extra="allow")   # keep fields added later to session docs
+
+    id: PyObjectId = Field(..., validation_alias="_id")   # Mongo _id -> "id"
+    user_id: PyObjectId
+    exercise_type: Optional[str] = None
+    level: Optional[int] = None
+    expected_text: Optional[str] = None
+    spoken_text: Optional[str] = None
+    words: List[Dict[str, Any]] = []
+    accuracy: Optional[float] = None
+    meta: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+
+
+class RecentSessionsResponse(BaseModel):
+    sessions: List[SessionOut]
+
+
+class ExerciseTypeSummary(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: Optional[str] = Field(None, alias="_id")   # exercise_type ($group key)
+    avg_accuracy: Optional[float] = None
+    count: int = 0
+
+
+class SummaryResponse(BaseModel):
+    summary: List[ExerciseTypeSummary]
+
+
+class Confusion(BaseModel):
+    expected: str
+    produced: str        # "_" = phoneme left out
+    count: int
+    rate: float          # share of the expected phoneme's occurrences
+
+
+class ConfusionResponse(BaseModel):
+    user_id: Optional[str] = None   # None for the cohort
+    phonemes: List[str]             # row / column labels ("?" other, "_" none)
+    matrix: List[List[int]]         # expected (rows) x produced (columns)
+    total: int
+    top_confusions: List[Confusion]
+    through: Optional[datetime] = None   # data up to this time is included
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Dict, Optional
+from datetime import datetime
 
 class WordAnalysis(BaseModel):
     expected: str
@@ -23,3 +24,21 @@ class AssessmentCreate(BaseModel):
     user_id: str
     questions: List[QuestionRecord]
     overall_accuracy: float
+
+class AssessmentOut(AssessmentCreate):
+    assessment_id: str
+    created_at: Optional[datetime] = None
+
+class AssessmentSummary(BaseModel):
+    user_id: str
+    overall_accuracy: float
+    question_count: int
+    word_count: int
+    error_counts: Dict[str, int]
+    created_at: Optional[datetime] = None
+
+class AssessmentSubmitResponse(BaseModel):
+    status: str
+    assessment_id: str
+    summary: AssessmentSummary
+    assessment: Optional[AssessmentCreate] = None   # only with ?full=true
@@ -1,8 +1,11 @@
 # backend/schemas/exercise_schema.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Any, Optional
 
 class WordResult(BaseModel):
+    # keep the rest of the AI word analysis (expected_phonemes, spoken_phonemes, ...) for analytics
+    model_config = ConfigDict(extra="allow")
+
     expected: str
     spoken: str
     phoneme_similarity: Optional[float] = None  # ✅ make optional
@@ -17,3 +20,7 @@ class SessionCreate(BaseModel):
     words: Optional[List[WordResult]] = None
     accuracy: Optional[float] = None
     meta: Optional[Dict[str, Any]] = None
+
+class SessionSubmitResponse(BaseModel):
+    session_id: str
+    microdrills: List[Dict[str, Any]] = []
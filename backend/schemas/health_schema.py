@@ -0,0 +1,14 @@
+# backend/schemas/health_schema.py
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    max_size: int
+    checked_out: int     # connections in use
+    connections: int     # open connections
+
+
+class DbHealth(BaseModel):
+    status: str
+    ping_ms: float
+    pool: PoolStats
@@ -0,0 +1,11 @@
+# backend/schemas/lesson_schema.py
+from pydantic import BaseModel
+from typing import Optional
+
+
+class NextPhonemeResponse(BaseModel):
+    phoneme: str
+    difficulty: int
+    error_rate: Optional[float] = None   # set when picked from the phoneme profile
+    attempts: Optional[int] = None
+    reason: Optional[str] = None         # "default" when there is no profile yet
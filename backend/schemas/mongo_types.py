@@ -0,0 +1,13 @@
+# backend/schemas/mongo_types.py
+from typing import Annotated
+from bson import ObjectId
+from pydantic import BeforeValidator
+
+
+def _object_id_to_str(value):
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+# Accepts an ObjectId straight from Mongo and serializes it as a string,
+# so handlers can return raw documents without conversion loops
+PyObjectId = Annotated[str, BeforeValidator(_object_id_to_str)]
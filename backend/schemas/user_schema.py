@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
+from backend.schemas.mongo_types import PyObjectId
 
 
 # ----------------------------------------------------
@@ -22,12 +23,22 @@ class UserLogin(BaseModel):
     password: str                     # plain password → bcrypt compare
 
 
+# ----------------------------------------------------
+# PROFILE UPDATE (only the fields sent are changed)
+# ----------------------------------------------------
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    age: Optional[int] = None
+    gender: Optional[str] = None
+    level: Optional[int] = None
+
+
 # ----------------------------------------------------
 # USER RETURNED FROM DATABASE
 # (password Omitted for safety)
 # ----------------------------------------------------
 class UserInDB(BaseModel):
-    id: str = Field(..., alias="_id")  # MongoDB _id → frontend "id"
+    id: PyObjectId = Field(..., alias="_id")  # MongoDB _id → frontend "id"
     name: str
     age: Optional[int] = None
     email: EmailStr
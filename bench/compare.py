@@ -0,0 +1,53 @@
+# bench/compare.py
+"""
+Compares two bench/run_bench.py result files endpoint by endpoint.
+
+    python -m bench.compare bench/results/base.json bench/results/new.json
+"""
+import sys
+import json
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def _delta(old, new):
+    if old in (None, 0) or new is None:
+        return "   n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def compare(base, new):
+    rows = []
+    names = sorted(set(base["endpoints"]) | set(new["endpoints"]))
+    for name in names:
+        b = base["endpoints"].get(name, {})
+        n = new["endpoints"].get(name, {})
+        row = {"endpoint": name}
+        for m in METRICS:
+            row[m] = (b.get(m), n.get(m), _delta(b.get(m), n.get(m)))
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        raise SystemExit("usage: python -m bench.compare BASE.json NEW.json")
+    with open(argv[0]) as f:
+        base = json.load(f)
+    with open(argv[1]) as f:
+        new = json.load(f)
+
+    print(f"base: {base.get('commit')}  ({base.get('timestamp')})")
+    print(f"new:  {new.get('commit')}  ({new.get('timestamp')})")
+    print(f"{'endpoint':42} " + " ".join(f"{m:>26}" for m in METRICS))
+    for row in compare(base, new):
+        cells = []
+        for m in METRICS:
+            old, cur, delta = row[m]
+            cells.append(f"{str(old):>9} → {str(cur):>9} {delta}")
+        print(f"{row['endpoint']:42} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# bench/confusion_bench.py
+"""
+Confusion-matrix build time for a synthetic cohort (no Mongo).
+
+--users learners with --docs sessions of --words word results each, drawn
+from a small vocabulary of expected / spoken phoneme pairs. Reports the time
+to collect the words, count them (NumPy) and prepare the per-user updates.
+
+    python -m bench.confusion_bench --users 20000 --docs 3 --words 15
+"""
+import json
+import time
+import random
+import argparse
+
+from backend.models import confusion_matrix as cm
+
+VOCAB = [
+    ("bæt", "bæt"), ("bæt", "dæt"), ("dɑːɡ", "dɑːɡ"), ("dɑːɡ", "bɑːɡ"), ("ʃɪp", "ʃɪp"),
+    ("ʃɪp", "sɪp"), ("fɪʃ", "fɪʃ"), ("fɪʃ", "fɪs"), ("kʌp", "kʌp"), ("sʌn", "sʌn"),
+    ("pɛn", "pɛn"), ("pɛn", "bɛn"), ("tɑːp", "tɑːp"), ("dʌk", "dʌk"), ("bæɡ", "dæɡ"),
+    ("θɪŋk", "fɪŋk"), ("ðə", "də"), ("kæɹəts", "kæɹəs"), ("muːn", "muːn"), ("ɡloʊz", "ɡoʊz"),
+]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Time the phoneme confusion-matrix build")
+    ap.add_argument("--users", type=int, default=20000)
+    ap.add_argument("--docs", type=int, default=3, help="sessions per user")
+    ap.add_argument("--words", type=int, default=15, help="word results per session")
+    ap.add_argument("--seed", type=int, default=1234)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    docs = [
+        {"user_id": f"user{u}", "words": [
+            dict(zip(("expected_phonemes", "spoken_phonemes"), rng.choice(VOCAB))) for _ in range(args.words)
+        ]}
+        for u in range(args.users) for _ in range(args.docs)
+    ]
+
+    t0 = time.perf_counter()
+    builder = cm.ConfusionBuilder()
+    for doc in docs:
+        builder.add_session(doc)
+    t1 = time.perf_counter()
+    user_idx, cells, counts, cohort = builder.build()
+    t2 = time.perf_counter()
+    ops = cm._bulk_ops(builder.users, user_idx, cells, counts, cohort, None, None)
+    t3 = time.perf_counter()
+
+    print(json.dumps({
+        "users": args.users,
+        "documents": len(docs),
+        "words": builder.words,
+        "collect_s": round(t1 - t0, 3),
+        "count_s": round(t2 - t1, 3),
+        "updates_s": round(t3 - t2, 3),
+        "total_s": round(t3 - t0, 3),
+        "user_cells": int(len(cells)),
+        "updates": len(ops),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# bench/embed_bench.py
+"""
+Backend -> AI latency and memory: AI_MODE=http vs AI_MODE=inprocess.
+
+  http:       backend and AI app as two processes, ASR/TTS proxied over HTTP
+  inprocess:  one backend process calling ai/pipeline.py directly
+
+Each mode runs in fresh processes (fake Gemini, in-memory Mongo stand-in).
+--requests calls from --concurrency clients hit the backend's /ai/asr/evaluate
+(unique audio, so the ASR cache does not hit) and /ai/tts/speak; the report
+has p50/p95/p99 per endpoint and the summed RSS/PSS of the mode's processes.
+
+    python -m bench.embed_bench --requests 200 --concurrency 8 --out bench/results/embed.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+from ai.serve import read_memory
+from bench.run_bench import ROOT, SAMPLE_DIR, percentile
+
+TTS_TEXTS = ["Hello! Welcome to LexiLift!", "Great job!", "Say the word: ship"]
+
+
+# -----------------------------------------------------------
+# Server side (child process)
+# -----------------------------------------------------------
+def serve(app_name, port, args):
+    import uvicorn
+    from bench import fake_gemini
+
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    fake_gemini.install()
+    fake_gemini.configure(latency_ms=args.gemini_latency_ms, jitter_ms=0.0, failure_rate=0.0, seed=args.seed)
+
+    if app_name == "ai":
+        from ai.ai_router import app
+    else:
+        from bench.fake_mongo import FakeMotorClient
+        from backend.db import mongo_connection
+
+        mongo_connection.use_client(FakeMotorClient(rtt_ms=args.mongo_rtt_ms))
+        from backend.main import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+
+
+def spawn(app_name, port, env, args):
+    cmd = [
+        sys.executable, "-m", "bench.embed_bench", "--serve", app_name, "--port", str(port),
+        "--gemini-latency-ms", str(args.gemini_latency_ms), "--mongo-rtt-ms", str(args.mongo_rtt_ms),
+    ]
+    return subprocess.Popen(cmd, cwd=ROOT, env={**os.environ, **env})
+
+
+async def wait_ready(url, procs, timeout=300):
+    import httpx
+
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            if any(p.poll() is not None for p in procs):
+                raise RuntimeError("server process exited during startup")
+            try:
+                if (await client.get(f"{url}/metrics")).status_code == 200:
+                    return
+            except Exception:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not start")
+
+
+# -----------------------------------------------------------
+# Load
+# -----------------------------------------------------------
+async def drive(url, args):
+    import httpx
+
+    audio = [p.read_bytes() for p in sorted(SAMPLE_DIR.glob("*.wav"))[: args.max_samples]]
+    if not audio:
+        raise RuntimeError(f"no sample WAVs found in {SAMPLE_DIR}")
+    rng = random.Random(args.seed)
+    samples, errors = {}, {}
+    todo = list(range(args.requests))
+
+    async def one(client, i):
+        if rng.random() < args.tts_share:
+            name = "POST /ai/tts/speak"
+            req = client.post(f"{url}/ai/tts/speak", data={"text": rng.choice(TTS_TEXTS)})
+        else:
+            name = "POST /ai/asr/evaluate"
+            data = audio[i % len(audio)]
+            data = data[:-1] + bytes([(data[-1] + i + 1) % 256])
+            req = client.post(
+                f"{url}/ai/asr/evaluate",
+                files={"file": ("audio.wav", data, "audio/wav")},
+                data={"expected_text": "I love carrots", "exercise_type": "read_aloud"},
+            )
+        t0 = time.perf_counter()
+        try:
+            ok = (await req).status_code == 200
+        except Exception:
+            ok = False
+        samples.setdefault(name, []).append(time.perf_counter() - t0)
+        if not ok:
+            errors[name] = errors.get(name, 0) + 1
+
+    async def worker(client):
+        while todo:
+            await one(client, todo.pop())
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(120.0)) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - t0
+
+    endpoints = {}
+    for name, vals in sorted(samples.items()):
+        vals.sort()
+        endpoints[name] = {
+            "count": len(vals),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(percentile(vals, 50) * 1000, 2),
+            "p95_ms": round(percentile(vals, 95) * 1000, 2),
+            "p99_ms": round(percentile(vals, 99) * 1000, 2),
+        }
+    return {"elapsed_s": round(elapsed, 3), "throughput_rps": round(args.requests / elapsed, 3), "endpoints": endpoints}
+
+
+async def run_mode(mode, args):
+    backend_url = f"http://127.0.0.1:{args.backend_port}"
+    procs = {}
+    try:
+        if mode == "http":
+            procs["ai"] = spawn("ai", args.ai_port, {}, args)
+            await wait_ready(f"http://127.0.0.1:{args.ai_port}", list(procs.values()))
+        procs["backend"] = spawn("backend", args.backend_port, {
+            "AI_MODE": mode,
+            "AI_BASE_URL": f"http://127.0.0.1:{args.ai_port}",
+        }, args)
+        await wait_ready(backend_url, list(procs.values()))
+
+        idle = {name: read_memory(p.pid) for name, p in procs.items()}
+        result = await drive(backend_url, args)
+        loaded = {name: read_memory(p.pid) for name, p in procs.items()}
+    finally:
+        for p in procs.values():
+            p.terminate()
+        for p in procs.values():
+            try:
+                p.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+    def total(mem, key):
+        return sum((m or {}).get(key, 0) for m in mem.values())
+
+    result["memory"] = {
+        "processes": loaded,
+        "idle_rss_mb": round(total(idle, "rss_kb") / 1024, 1),
+        "rss_mb": round(total(loaded, "rss_kb") / 1024, 1),
+        "pss_mb": round(total(loaded, "pss_kb") / 1024, 1),
+    }
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare AI_MODE=http and AI_MODE=inprocess")
+    ap.add_argument("--modes", default="http,inprocess")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--tts-share", type=float, default=0.3, help="fraction of calls that are TTS")
+    ap.add_argument("--max-samples", type=int, default=40, help="sample WAVs to load from ai/uploads")
+    ap.add_argument("--gemini-latency-ms", type=float, default=400.0)
+    ap.add_argument("--mongo-rtt-ms", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--ai-port", type=int, default=18101)
+    ap.add_argument("--backend-port", type=int, default=18100)
+    ap.add_argument("--serve", choices=("ai", "backend"), help=argparse.SUPPRESS)
+    ap.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    ap.add_argument("--out", default="", help="write JSON results here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    sys.path.insert(0, str(ROOT))
+    if args.serve:
+        serve(args.serve, args.port, args)
+        return
+
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        print(f"Running {args.requests} requests with AI_MODE={mode} ...")
+        results[mode] = asyncio.run(run_mode(mode, args))
+    text = json.dumps({
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "tts_share": args.tts_share,
+            "asr_models": os.environ.get("ASR_MODELS", os.environ.get("ASR_MODEL", "tiny")),
+        },
+        "modes": results,
+    }, indent=2)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+        print(f"Results written to {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# bench/fake_gemini.py
+"""
+In-process stand-in for google.generativeai.
+
+install() puts a fake module into sys.modules before ai.llm.llm_service is
+imported, so every Gemini call in the AI service returns canned JSON after a
+configurable latency, failing (raising) at a configurable rate.
+"""
+import sys
+import time
+import json
+import random
+import types
+
+_config = {"latency_ms": 400.0, "jitter_ms": 150.0, "failure_rate": 0.0, "seed": None}
+_rng = random.Random()
+_stats = {"calls": 0, "failures": 0}
+
+
+def configure(latency_ms=400.0, jitter_ms=150.0, failure_rate=0.0, seed=None):
+    _config.update(latency_ms=latency_ms, jitter_ms=jitter_ms, failure_rate=failure_rate, seed=seed)
+    _rng.seed(seed)
+
+
+def stats():
+    return dict(_stats)
+
+
+# -----------------------------------------------------------
+# Canned responses, picked from the prompt wording in llm_service
+# -----------------------------------------------------------
+def _answer(prompt: str) -> str:
+    if "reading exercise creator" in prompt:
+        words = ["bat", "bag", "dog", "cup", "top", "sun", "map", "pen", "fish", "ship"]
+        return json.dumps([
+            {"text": w, "difficulty": "easy"} for w in words
+        ])
+    if "micro-practice" in prompt:
+        return json.dumps([
+            {"type": "minimal_pair", "instruction": "Tap the word that sounds different!", "content": [["bat", "bad"]]},
+            {"type": "phoneme_isolation", "instruction": "Say the first sound in 'dog'!", "content": ["d"]},
+            {"type": "spelling_rebuild", "instruction": "Drag letters to spell 'cup'", "content": ["c", "u", "p"]},
+        ])
+    if "short lesson about the phoneme" in prompt:
+        return json.dumps({
+            "explanation": "The /b/ sound is made by your lips.",
+            "examples": ["bat", "ball", "bubble"],
+        })
+    if "pronunciation mission" in prompt:
+        return json.dumps({
+            "mission_title": "Bench Mission",
+            "sentence": "The moon glows softly.",
+            "target_phonemes": ["m", "s"],
+            "difficulty": 1,
+        })
+    return "Great reading today, keep going!"
+
+
+class _Part:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Content:
+    def __init__(self, text):
+        self.parts = [_Part(text)]
+
+
+class _Candidate:
+    def __init__(self, text):
+        self.content = _Content(text)
+
+
+class _Response:
+    def __init__(self, text):
+        self.candidates = [_Candidate(text)]
+
+
+class GenerativeModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, contents, generation_config=None, **kwargs):
+        _stats["calls"] += 1
+        delay = max(0.0, _config["latency_ms"] + _rng.uniform(-1, 1) * _config["jitter_ms"])
+        time.sleep(delay / 1000.0)
+        if _rng.random() < _config["failure_rate"]:
+            _stats["failures"] += 1
+            raise RuntimeError("fake gemini: injected failure")
+        prompt = contents[0] if isinstance(contents, (list, tuple)) else str(contents)
+        return _Response(_answer(prompt))
+
+
+class _ModelInfo:
+    def __init__(self, name):
+        self.name = name
+
+
+def install():
+    """Registers the fake as google.generativeai. Call before importing the AI app."""
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = lambda **kwargs: None
+    genai.list_models = lambda: [_ModelInfo("models/gemini-2.5-flash-lite")]
+    genai.GenerativeModel = GenerativeModel
+
+    try:
+        import google
+    except ImportError:
+        google = types.ModuleType("google")
+        google.__path__ = []
+        sys.modules["google"] = google
+    google.generativeai = genai
+    sys.modules["google.generativeai"] = genai
+    return genai
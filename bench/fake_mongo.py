@@ -0,0 +1,413 @@
+# bench/fake_mongo.py
+"""
+In-memory stand-in for the parts of Motor the backend uses.
+
+Supports insert_one/insert_many, find_one, find().sort().limit(), aggregate
+($match/$group/$sort/$limit), update_one / find_one_and_update / bulk_write of
+UpdateOne ($set/$inc/$unset/$currentDate/$setOnInsert on dotted paths, upsert),
+replace_one, count_documents and db.command("ping"). An upsert that would
+create a second document with the same _id raises DuplicateKeyError, as Mongo
+does. Every call costs one simulated round-trip (rtt_ms), and round-trips are
+counted so benchmarks can report them.
+"""
+import copy
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+
+class Stats:
+    def __init__(self):
+        self.round_trips = 0
+        self.by_op = {}
+
+    def record(self, op):
+        self.round_trips += 1
+        self.by_op[op] = self.by_op.get(op, 0) + 1
+
+    def as_dict(self):
+        return {"round_trips": self.round_trips, "by_op": dict(self.by_op)}
+
+
+# -----------------------------------------------------------
+# Query matching
+# -----------------------------------------------------------
+def _get(doc, dotted):
+    cur = doc
+    for part in dotted.split("."):
+        if isinstance(cur, dict) and part in cur:
+            cur = cur[part]
+        else:
+            return None
+    return cur
+
+
+def _match_value(value, cond):
+    if _is_operator(cond):
+        for op, arg in cond.items():
+            if op == "$eq" and value != arg:
+                return False
+            if op == "$ne" and value == arg:
+                return False
+            if op == "$gt" and not (value is not None and value > arg):
+                return False
+            if op == "$gte" and not (value is not None and value >= arg):
+                return False
+            if op == "$lt" and not (value is not None and value < arg):
+                return False
+            if op == "$lte" and not (value is not None and value <= arg):
+                return False
+            if op == "$in" and value not in arg:
+                return False
+            if op == "$exists" and (value is not None) != bool(arg):
+                return False
+        return True
+    return value == cond
+
+
+def matches(doc, flt):
+    for key, cond in (flt or {}).items():
+        if key == "$or":
+            if not any(matches(doc, f) for f in cond):
+                return False
+        elif not _match_value(_get(doc, key), cond):
+            return False
+    return True
+
+
+def _is_operator(cond):
+    return isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond)
+
+
+def _set_path(doc, dotted, value):
+    *parents, last = dotted.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def _unset_path(doc, dotted):
+    *parents, last = dotted.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+
+def _apply_update(doc, update, inserted=False):
+    if inserted:
+        for key, value in update.get("$setOnInsert", {}).items():
+            _set_path(doc, key, copy.deepcopy(value))
+    for key, value in update.get("$set", {}).items():
+        _set_path(doc, key, copy.deepcopy(value))
+    for key, value in update.get("$inc", {}).items():
+        _set_path(doc, key, (_get(doc, key) or 0) + value)
+    for key in update.get("$unset", {}):
+        _unset_path(doc, key)
+    for key in update.get("$currentDate", {}):
+        _set_path(doc, key, datetime.utcnow())
+
+
+def _project(doc, projection):
+    if not projection:
+        return doc
+    if any(v for k, v in projection.items() if k != "_id"):
+        keep = [k for k, v in projection.items() if v]
+        out = {k: doc[k] for k in keep if k in doc}
+        if projection.get("_id", 1):
+            out["_id"] = doc["_id"]
+        return out
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+def _sort_docs(docs, spec):
+    for key, direction in reversed(spec):
+        docs.sort(key=lambda d: (_get(d, key) is None, _get(d, key)), reverse=direction < 0)
+    return docs
+
+
+def _group(docs, spec):
+    groups = {}
+    id_expr = spec["_id"]
+    for d in docs:
+        gid = _get(d, id_expr[1:]) if isinstance(id_expr, str) and id_expr.startswith("$") else id_expr
+        groups.setdefault(repr(gid), (gid, []))[1].append(d)
+    out = []
+    for gid, members in groups.values():
+        row = {"_id": gid}
+        for field, acc in spec.items():
+            if field == "_id":
+                continue
+            (op, arg), = acc.items()
+            vals = [arg if not (isinstance(arg, str) and arg.startswith("$")) else _get(m, arg[1:]) for m in members]
+            vals = [v for v in vals if v is not None]
+            if op == "$sum":
+                row[field] = sum(vals)
+            elif op == "$avg":
+                row[field] = sum(vals) / len(vals) if vals else None
+            elif op == "$max":
+                row[field] = max(vals) if vals else None
+            elif op == "$min":
+                row[field] = min(vals) if vals else None
+        out.append(row)
+    return out
+
+
+# -----------------------------------------------------------
+# Motor-like objects
+# -----------------------------------------------------------
+class FakeCursor:
+    def __init__(self, coll, flt, op="find"):
+        self._coll = coll
+        self._filter = flt
+        self._sort = []
+        self._limit = 0
+        self._op = op
+        self._items = None
+
+    def sort(self, key, direction=1):
+        if isinstance(key, list):
+            self._sort.extend(key)
+        else:
+            self._sort.append((key, direction))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    async def _load(self):
+        await self._coll._round_trip(self._op)
+        docs = [copy.deepcopy(d) for d in self._coll._docs if matches(d, self._filter)]
+        _sort_docs(docs, self._sort)
+        if self._limit:
+            docs = docs[: self._limit]
+        self._items = docs
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._items is None:
+            await self._load()
+        if not self._items:
+            raise StopAsyncIteration
+        return self._items.pop(0)
+
+    async def to_list(self, length=None):
+        if self._items is None:
+            await self._load()
+        items, self._items = self._items, []
+        return items if length is None else items[:length]
+
+
+class FakeAggCursor(FakeCursor):
+    def __init__(self, coll, pipeline):
+        super().__init__(coll, {}, op="aggregate")
+        self._pipeline = pipeline
+
+    async def _load(self):
+        await self._coll._round_trip(self._op)
+        docs = [copy.deepcopy(d) for d in self._coll._docs]
+        for stage in self._pipeline:
+            (name, arg), = stage.items()
+            if name == "$match":
+                docs = [d for d in docs if matches(d, arg)]
+            elif name == "$group":
+                docs = _group(docs, arg)
+            elif name == "$sort":
+                docs = _sort_docs(docs, list(arg.items()))
+            elif name == "$limit":
+                docs = docs[:arg]
+        self._items = docs
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class UpdateResult:
+    def __init__(self, matched, modified, upserted_id=None):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_id = upserted_id
+
+
+class BulkWriteResult:
+    def __init__(self, matched, modified, upserted):
+        self.matched_count = matched
+        self.modified_count = modified
+        self.upserted_count = upserted
+
+
+class FakeCollection:
+    def __init__(self, name, client):
+        self.name = name
+        self._client = client
+        self._docs = []
+
+    async def _round_trip(self, op):
+        self._client.stats.record(op)
+        if self._client.rtt_ms:
+            await asyncio.sleep(self._client.rtt_ms / 1000.0)
+
+    async def insert_one(self, doc):
+        await self._round_trip("insert_one")
+        doc.setdefault("_id", ObjectId())
+        self._docs.append(copy.deepcopy(doc))
+        return InsertOneResult(doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        await self._round_trip("insert_many")
+        ids = []
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self._docs.append(copy.deepcopy(doc))
+            ids.append(doc["_id"])
+        return InsertManyResult(ids)
+
+    async def find_one(self, flt=None, *args, **kwargs):
+        await self._round_trip("find_one")
+        for d in self._docs:
+            if matches(d, flt):
+                return copy.deepcopy(d)
+        return None
+
+    def find(self, flt=None, *args, **kwargs):
+        return FakeCursor(self, flt)
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        return FakeAggCursor(self, pipeline)
+
+    async def count_documents(self, flt=None):
+        await self._round_trip("count_documents")
+        return sum(1 for d in self._docs if matches(d, flt))
+
+    def _update(self, flt, update, upsert):
+        """Applies one update; returns (document before or None, document after or None, upserted id)."""
+        target = next((d for d in self._docs if matches(d, flt)), None)
+        if target is not None:
+            before = copy.deepcopy(target)
+            _apply_update(target, update)
+            return before, target, None
+        if not upsert:
+            return None, None, None
+        target = {k: copy.deepcopy(v) for k, v in (flt or {}).items() if not k.startswith("$") and not _is_operator(v)}
+        if "_id" in target and any(d["_id"] == target["_id"] for d in self._docs):
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} dup key: {{ _id: {target['_id']!r} }}")
+        target.setdefault("_id", ObjectId())
+        _apply_update(target, update, inserted=True)
+        self._docs.append(target)
+        return None, target, target["_id"]
+
+    async def update_one(self, flt, update, upsert=False):
+        await self._round_trip("update_one")
+        before, after, upserted_id = self._update(flt, update, upsert)
+        if after is None:
+            return UpdateResult(0, 0)
+        return UpdateResult(0 if upserted_id else 1, 1, upserted_id)
+
+    async def find_one_and_update(self, flt, update, projection=None, upsert=False, return_document=False, **kwargs):
+        # return_document: ReturnDocument.BEFORE (False) or ReturnDocument.AFTER (True)
+        await self._round_trip("find_one_and_update")
+        before, after, _ = self._update(flt, update, upsert)
+        doc = after if return_document else before
+        return None if doc is None else _project(copy.deepcopy(doc), projection)
+
+    async def bulk_write(self, requests, ordered=True):
+        """UpdateOne requests only (what the backend sends)."""
+        await self._round_trip("bulk_write")
+        matched = upserted = 0
+        errors = []
+        for i, op in enumerate(requests):
+            if not isinstance(op, UpdateOne):
+                raise NotImplementedError(f"fake bulk_write does not support {type(op).__name__}")
+            try:
+                _, after, upserted_id = self._update(op._filter, op._doc, op._upsert)
+            except DuplicateKeyError as e:
+                errors.append({"index": i, "code": 11000, "errmsg": str(e), "op": op._filter})
+                if ordered:
+                    break
+                continue
+            if upserted_id is not None:
+                upserted += 1
+            elif after is not None:
+                matched += 1
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nMatched": matched, "nModified": matched, "nUpserted": upserted})
+        return BulkWriteResult(matched, matched, upserted)
+
+    async def replace_one(self, flt, replacement, upsert=False):
+        await self._round_trip("replace_one")
+        for i, d in enumerate(self._docs):
+            if matches(d, flt):
+                new_doc = copy.deepcopy(replacement)
+                new_doc["_id"] = d["_id"]
+                self._docs[i] = new_doc
+                return UpdateResult(1, 1)
+        if upsert:
+            new_doc = copy.deepcopy(replacement)
+            new_doc.setdefault("_id", ObjectId())
+            self._docs.append(new_doc)
+            return UpdateResult(0, 0, new_doc["_id"])
+        return UpdateResult(0, 0)
+
+
+class FakeDatabase:
+    def __init__(self, name, client):
+        self.name = name
+        self._client = client
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name, self._client)
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name, **kwargs):
+        return self[name]
+
+    async def command(self, cmd, *args, **kwargs):
+        self._client.stats.record("command")
+        if self._client.rtt_ms:
+            await asyncio.sleep(self._client.rtt_ms / 1000.0)
+        return {"ok": 1.0}
+
+
+class FakeMotorClient:
+    def __init__(self, rtt_ms=0.0):
+        self.rtt_ms = rtt_ms
+        self.stats = Stats()
+        self._dbs = {}
+
+    def __getitem__(self, name):
+        if name not in self._dbs:
+            self._dbs[name] = FakeDatabase(name, self)
+        return self._dbs[name]
+
+    def get_database(self, name, **kwargs):
+        return self[name]
+
+    @property
+    def admin(self):
+        return self["admin"]
+
+    def close(self):
+        pass
@@ -0,0 +1,360 @@
+# bench/run_bench.py
+"""
+End-to-end load test for the backend and AI services.
+
+Boots backend.main:app and ai.ai_router:app in this process (uvicorn, one
+thread each) against the fake Gemini in bench/fake_gemini.py and either the
+in-memory Mongo stand-in or a real local mongod (--mongo-uri). It then replays
+a weighted traffic mix and writes throughput and p50/p95/p99 per endpoint as JSON.
+
+    python -m bench.run_bench --duration 60 --users 20 --out bench/results/$(git rev-parse --short HEAD).json
+    python -m bench.compare bench/results/old.json bench/results/new.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import platform
+import threading
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_DIR = ROOT / "ai" / "uploads"
+
+# Expected texts used with the sample WAVs (assessment: 10 words + 5 sentences)
+ASSESSMENT_ITEMS = [
+    ("word", "bat"), ("word", "dog"), ("word", "cup"), ("word", "ship"), ("word", "fish"),
+    ("word", "sun"), ("word", "bag"), ("word", "duck"), ("word", "top"), ("word", "pen"),
+    ("sentence", "I love carrots"),
+    ("sentence", "The cat sat on the mat"),
+    ("sentence", "The moon glows softly"),
+    ("sentence", "A big dog ran to the park"),
+    ("sentence", "She sells shells by the sea shore"),
+]
+
+# Scenario weights for the default traffic mix
+DEFAULT_MIX = {"assessment": 1, "exercise_submit": 4, "tts": 2, "dashboard": 6, "llm": 1, "confusion": 1, "profile_edit": 1}
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    # nearest-rank percentile
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(p / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+# -----------------------------------------------------------
+# Server boot
+# -----------------------------------------------------------
+def _serve(app, port):
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 300
+    while not server.started:
+        if not thread.is_alive() or time.time() > deadline:
+            raise RuntimeError(f"server on port {port} failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def boot(args):
+    """Installs the stand-ins, imports both apps and starts them."""
+    from bench import fake_gemini
+
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    # refresh the confusion matrices often enough to pick up this run's submits
+    os.environ.setdefault("CONFUSION_LAG_S", "1")
+    os.environ.setdefault("CONFUSION_REFRESH_S", "2")
+    os.environ["AI_BASE_URL"] = f"http://127.0.0.1:{args.ai_port}"
+    fake_gemini.install()
+    fake_gemini.configure(
+        latency_ms=args.gemini_latency_ms,
+        jitter_ms=args.gemini_jitter_ms,
+        failure_rate=args.gemini_failure_rate,
+        seed=args.seed,
+    )
+
+    fake_client = None
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+        os.environ.setdefault("MONGO_DB", "lexilift_bench")
+    else:
+        from bench.fake_mongo import FakeMotorClient
+        from backend.db import mongo_connection
+
+        fake_client = FakeMotorClient(rtt_ms=args.mongo_rtt_ms)
+        mongo_connection.use_client(fake_client)
+
+    from ai.ai_router import app as ai_app
+    from backend.main import app as backend_app
+
+    servers = [_serve(ai_app, args.ai_port), _serve(backend_app, args.backend_port)]
+    return servers, fake_client
+
+
+# -----------------------------------------------------------
+# Load generator
+# -----------------------------------------------------------
+class Recorder:
+    def __init__(self):
+        self.samples = {}   # endpoint -> [latency_s]
+        self.errors = {}    # endpoint -> count
+
+    async def call(self, client, endpoint, method, url, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, url, **kwargs)
+            ok = r.status_code < 400
+        except Exception:
+            r, ok = None, False
+        self.samples.setdefault(endpoint, []).append(time.perf_counter() - t0)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return r
+
+
+class Traffic:
+    def __init__(self, args, recorder):
+        self.args = args
+        self.rec = recorder
+        self.backend = f"http://127.0.0.1:{args.backend_port}"
+        self.ai = f"http://127.0.0.1:{args.ai_port}"
+        self.samples = sorted(SAMPLE_DIR.glob("*.wav"))[: args.max_samples]
+        if not self.samples:
+            raise RuntimeError(f"no sample WAVs found in {SAMPLE_DIR}")
+        self._audio = [p.read_bytes() for p in self.samples]
+        self._counter = 0
+        self.rng = random.Random(args.seed)
+
+    def audio(self):
+        """A sample clip; with --unique-audio the last byte is changed so every upload hashes differently."""
+        self._counter += 1
+        data = self._audio[self._counter % len(self._audio)]
+        if self.args.unique_audio:
+            data = data[:-1] + bytes([(data[-1] + self._counter) % 256])
+        return data
+
+    async def new_user(self, client):
+        n = self.rng.randrange(10 ** 9)
+        body = {"name": f"Bench {n}", "age": 9, "email": f"bench{n}@lexilift.com", "password": "bench", "level": 1}
+        r = await self.rec.call(client, "POST /users/signup", "POST", f"{self.backend}/users/signup", json=body)
+        if r is not None and r.status_code == 200:
+            data = r.json()
+            return data.get("_id") or data.get("id")
+        return None
+
+    async def assessment(self, client, user_id):
+        questions = []
+        for i, (kind, text) in enumerate(ASSESSMENT_ITEMS):
+            files = {"file": ("audio.wav", self.audio(), "audio/wav")}
+            r = await self.rec.call(
+                client, "POST /ai/asr/evaluate", "POST", f"{self.backend}/ai/asr/evaluate",
+                files=files, data={"expected_text": text, "exercise_type": "assessment"},
+            )
+            analysis = (r.json().get("analysis") if r is not None and r.status_code == 200 else None) or {}
+            questions.append({
+                "index": i,
+                "type": kind,
+                "expected_text": text,
+                "spoken_text": analysis.get("spoken_text", ""),
+                "accuracy": analysis.get("accuracy", 0.0),
+                "words": analysis.get("words", []),
+            })
+        await self.rec.call(
+            client, "POST /assessment/submit", "POST", f"{self.backend}/assessment/submit",
+            json={
+                "user_id": user_id,
+                "questions": questions,
+                "overall_accuracy": sum(q["accuracy"] for q in questions) / len(questions),
+            },
+        )
+
+    async def exercise_submit(self, client, user_id):
+        body = {
+            "user_id": user_id,
+            "exercise_type": "read_aloud",
+            "level": 1,
+            "expected_text": "I love carrots",
+            "spoken_text": "I love carots",
+            "words": [
+                {"expected": "i", "spoken": "i", "phoneme_similarity": 1.0, "error_type": "correct"},
+                {"expected": "love", "spoken": "love", "phoneme_similarity": 1.0, "error_type": "correct"},
+                {"expected": "carrots", "spoken": "carots", "phoneme_similarity": 0.8, "error_type": "substitution_similar"},
+            ],
+            "accuracy": 0.67,
+        }
+        await self.rec.call(client, "POST /exercises/submit", "POST", f"{self.backend}/exercises/submit", json=body)
+
+    async def tts(self, client, user_id):
+        text = self.rng.choice(["Hello! Welcome to LexiLift!", "Great job!", "Say the word: ship"])
+        await self.rec.call(client, "POST /ai/tts/speak", "POST", f"{self.backend}/ai/tts/speak", data={"text": text})
+
+    async def dashboard(self, client, user_id):
+        await self.rec.call(client, "GET /users/{user_id}", "GET", f"{self.backend}/users/{user_id}")
+        await self.rec.call(client, "GET /analytics/user/{id}/summary", "GET", f"{self.backend}/analytics/user/{user_id}/summary")
+        await self.rec.call(client, "GET /analytics/user/{id}/recent_sessions", "GET", f"{self.backend}/analytics/user/{user_id}/recent_sessions")
+
+    async def profile_edit(self, client, user_id):
+        url = f"{self.backend}/users/{user_id}"
+        r = await self.rec.call(client, "GET /users/{user_id}", "GET", url)
+        etag = r.headers.get("etag") if r is not None else None
+        await self.rec.call(client, "PATCH /users/{user_id}", "PATCH", url, json={"level": self.rng.randint(1, 5)})
+        if not etag:
+            return
+        # the PATCH bumped the user's version: the old ETag must not get a 304
+        name = "GET /users/{user_id} (If-None-Match)"
+        r = await self.rec.call(client, name, "GET", url, headers={"If-None-Match": etag})
+        if r is not None and r.status_code == 304:
+            self.rec.errors[name] = self.rec.errors.get(name, 0) + 1
+
+    async def confusion(self, client, user_id):
+        # refresh_if_stale() runs the claim / watermark update before the read
+        await self.rec.call(client, "GET /analytics/user/{id}/confusion", "GET", f"{self.backend}/analytics/user/{user_id}/confusion")
+        await self.rec.call(client, "GET /analytics/cohort/confusion", "GET", f"{self.backend}/analytics/cohort/confusion")
+
+    async def llm(self, client, user_id):
+        await self.rec.call(
+            client, "POST /llm/generate_exercises", "POST", f"{self.ai}/llm/generate_exercises",
+            data={"level": 1, "patterns": "{}", "count": 10},
+        )
+
+
+async def virtual_user(traffic, mix, deadline, iterations):
+    import httpx
+
+    names = list(mix.keys())
+    weights = [mix[n] for n in names]
+    async with httpx.AsyncClient(timeout=httpx.Timeout(120.0)) as client:
+        user_id = await traffic.new_user(client)
+        if not user_id:
+            return
+        done = 0
+        while time.perf_counter() < deadline and (not iterations or done < iterations):
+            scenario = traffic.rng.choices(names, weights)[0]
+            await getattr(traffic, scenario)(client, user_id)
+            done += 1
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    for name, vals in sorted(recorder.samples.items()):
+        vals = sorted(vals)
+        endpoints[name] = {
+            "count": len(vals),
+            "errors": recorder.errors.get(name, 0),
+            "throughput_rps": round(len(vals) / elapsed, 3),
+            "p50_ms": round(percentile(vals, 50) * 1000, 2),
+            "p95_ms": round(percentile(vals, 95) * 1000, 2),
+            "p99_ms": round(percentile(vals, 99) * 1000, 2),
+            "max_ms": round(vals[-1] * 1000, 2),
+        }
+    total = sum(e["count"] for e in endpoints.values())
+    return {
+        "total_requests": total,
+        "total_errors": sum(e["errors"] for e in endpoints.values()),
+        "throughput_rps": round(total / elapsed, 3),
+        "endpoints": endpoints,
+    }
+
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return mix
+
+
+async def run(args):
+    _, fake_client = boot(args)
+    mix = parse_mix(args.mix)
+    recorder = Recorder()
+    traffic = Traffic(args, recorder)
+
+    print(f"Running {args.users} virtual users for {args.duration}s, mix={mix}")
+    t0 = time.perf_counter()
+    deadline = t0 + args.duration
+    await asyncio.gather(*[virtual_user(traffic, mix, deadline, args.iterations) for _ in range(args.users)])
+    elapsed = time.perf_counter() - t0
+
+    from bench import fake_gemini
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "host": {"python": platform.python_version(), "cpus": os.cpu_count(), "platform": platform.platform()},
+        "config": {
+            "users": args.users,
+            "duration_s": args.duration,
+            "iterations": args.iterations,
+            "mix": mix,
+            "unique_audio": args.unique_audio,
+            "gemini_latency_ms": args.gemini_latency_ms,
+            "gemini_failure_rate": args.gemini_failure_rate,
+            "mongo": args.mongo_uri or f"fake(rtt_ms={args.mongo_rtt_ms})",
+            "asr_models": os.environ.get("ASR_MODELS", os.environ.get("ASR_MODEL", "tiny")),
+        },
+        "elapsed_s": round(elapsed, 3),
+        **summarize(recorder, elapsed),
+        "gemini": fake_gemini.stats(),
+    }
+    if fake_client is not None:
+        result["mongo"] = fake_client.stats.as_dict()
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="LexiLift end-to-end benchmark")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    ap.add_argument("--iterations", type=int, default=0, help="scenarios per user (0 = until --duration)")
+    ap.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    ap.add_argument("--mix", default="", help="e.g. assessment=1,dashboard=6 (default: built-in mix)")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--max-samples", type=int, default=40, help="sample WAVs to load from ai/uploads")
+    ap.add_argument("--unique-audio", action=argparse.BooleanOptionalAction, default=True,
+                    help="perturb each upload so the ASR result cache does not hit")
+    ap.add_argument("--gemini-latency-ms", type=float, default=400.0)
+    ap.add_argument("--gemini-jitter-ms", type=float, default=150.0)
+    ap.add_argument("--gemini-failure-rate", type=float, default=0.0)
+    ap.add_argument("--mongo-uri", default="", help="use a real (local) mongod instead of the in-memory stand-in")
+    ap.add_argument("--mongo-rtt-ms", type=float, default=1.0, help="simulated round-trip for the stand-in")
+    ap.add_argument("--ai-port", type=int, default=18001)
+    ap.add_argument("--backend-port", type=int, default=18000)
+    ap.add_argument("--out", default="", help="write JSON results here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    sys.path.insert(0, str(ROOT))
+    result = asyncio.run(run(args))
+    text = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+        print(f"Results written to {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
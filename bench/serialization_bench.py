@@ -0,0 +1,160 @@
+# bench/serialization_bench.py
+"""
+Microbenchmark: cost of turning large session / assessment payloads into JSON.
+
+  legacy: per-document ObjectId->str loop + jsonable_encoder + stdlib json
+          (what the routers did before response models)
+  typed:  response-model validation + pydantic JSON-mode dump + orjson
+          (what FastAPI does now with response_model + FastJSONResponse)
+  raw:    orjson straight on the Mongo documents (FastJSONResponse default hook)
+
+    python -m bench.serialization_bench --sessions 100 --repeat 200
+"""
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from backend.schemas.analytics_schema import RecentSessionsResponse
+from backend.schemas.assessment_schema import AssessmentOut
+from common.responses import dumps as fast_dumps
+
+WORDS = ["bat", "dog", "cup", "ship", "fish", "sun", "bag", "duck", "top", "pen", "moon", "glows"]
+
+
+def _word(rng):
+    w = rng.choice(WORDS)
+    return {
+        "expected": w,
+        "spoken": w if rng.random() > 0.3 else w[:-1] + "d",
+        "expected_phonemes": "bæt",
+        "spoken_phonemes": "bæd",
+        "phoneme_similarity": round(rng.random(), 3),
+        "error_type": rng.choice(["correct", "substitution", "substitution_similar", "omission"]),
+    }
+
+
+def make_sessions(n, words_per_session, rng):
+    user = ObjectId()
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user,
+            "exercise_type": "read_aloud",
+            "level": 1,
+            "expected_text": "The moon glows softly",
+            "spoken_text": "The moon glow softly",
+            "words": [_word(rng) for _ in range(words_per_session)],
+            "accuracy": round(rng.random(), 3),
+            "meta": {"source": "bench"},
+            "created_at": now - timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+
+
+def make_assessment(rng):
+    questions = []
+    for i in range(15):
+        n = 1 if i < 10 else 6
+        questions.append({
+            "index": i,
+            "type": "word" if n == 1 else "sentence",
+            "expected_text": "bat",
+            "spoken_text": "bad",
+            "accuracy": round(rng.random(), 3),
+            "words": [dict(_word(rng), mistaken_phoneme=None, substituted_with=None) for _ in range(n)],
+        })
+    return {
+        "assessment_id": str(ObjectId()),
+        "user_id": str(ObjectId()),
+        "created_at": datetime.utcnow(),
+        "questions": questions,
+        "overall_accuracy": 0.5,
+    }
+
+
+# -----------------------------------------------------------
+# Encoders under test
+# -----------------------------------------------------------
+def legacy_sessions(docs):
+    res = []
+    for d in docs:
+        d = dict(d)
+        d["id"] = str(d["_id"])
+        d.pop("_id", None)
+        d["user_id"] = str(d["user_id"]) if isinstance(d["user_id"], ObjectId) else d["user_id"]
+        res.append(d)
+    return json.dumps(jsonable_encoder({"sessions": res})).encode("utf-8")
+
+
+def typed_sessions(docs):
+    model = RecentSessionsResponse.model_validate({"sessions": docs})
+    return fast_dumps(model.model_dump(mode="json"))
+
+
+def raw_sessions(docs):
+    return fast_dumps({"sessions": docs})
+
+
+def legacy_assessment(doc):
+    return json.dumps(jsonable_encoder(doc)).encode("utf-8")
+
+
+def typed_assessment(doc):
+    return fast_dumps(AssessmentOut.model_validate(doc).model_dump(mode="json"))
+
+
+def raw_assessment(doc):
+    return fast_dumps(doc)
+
+
+def timeit(fn, arg, repeat):
+    fn(arg)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        "median_us": round(samples[len(samples) // 2] * 1e6, 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1] * 1e6, 1),
+        "bytes": len(fn(arg)),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="JSON serialization microbenchmark")
+    ap.add_argument("--sessions", type=int, default=100)
+    ap.add_argument("--words", type=int, default=8, help="words per session")
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    sessions = make_sessions(args.sessions, args.words, rng)
+    assessment = make_assessment(rng)
+
+    results = {
+        f"sessions x{args.sessions}": {
+            "legacy": timeit(legacy_sessions, sessions, args.repeat),
+            "typed": timeit(typed_sessions, sessions, args.repeat),
+            "raw": timeit(raw_sessions, sessions, args.repeat),
+        },
+        "assessment (15 questions)": {
+            "legacy": timeit(legacy_assessment, assessment, args.repeat),
+            "typed": timeit(typed_assessment, assessment, args.repeat),
+            "raw": timeit(raw_assessment, assessment, args.repeat),
+        },
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# bench/write_behind_bench.py
+"""
+Burst-load benchmark for session/assessment inserts.
+
+  direct:    one insert_one per submit (write-behind disabled)
+  durable:   write-behind, each submit waits for its batch (group commit)
+  buffered:  write-behind, submits return once the document is buffered
+
+A class of --clients children submits --bursts rounds at the same moment.
+Mongo is the in-memory stand-in with --rtt-ms per round-trip, a connection
+pool of --pool-size (calls queue for a connection like Motor's pool) and
+--per-doc-us server time per inserted document.
+
+    python -m bench.write_behind_bench --clients 300 --bursts 5 --rtt-ms 2
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+
+from bench.fake_mongo import FakeMotorClient
+from backend.db.write_behind import WriteBehindBuffer
+
+
+class _PooledCollection:
+    def __init__(self, coll, pool, per_doc_s):
+        self._coll = coll
+        self._pool = pool
+        self._per_doc_s = per_doc_s
+
+    async def insert_one(self, doc):
+        async with self._pool:
+            res = await self._coll.insert_one(doc)
+            await asyncio.sleep(self._per_doc_s)
+            return res
+
+    async def insert_many(self, docs, ordered=True):
+        async with self._pool:
+            res = await self._coll.insert_many(docs, ordered=ordered)
+            await asyncio.sleep(self._per_doc_s * len(docs))
+            return res
+
+
+class _PooledDB:
+    def __init__(self, db, pool_size, per_doc_s):
+        self._db = db
+        self._pool = asyncio.Semaphore(pool_size)
+        self._per_doc_s = per_doc_s
+
+    def __getitem__(self, name):
+        return _PooledCollection(self._db[name], self._pool, self._per_doc_s)
+
+
+def session_doc(rng):
+    return {
+        "user_id": f"user{rng.randrange(1000)}",
+        "exercise_type": "read_aloud",
+        "level": 1,
+        "expected_text": "The moon glows softly",
+        "spoken_text": "The moon glow softly",
+        "words": [{"expected": "moon", "spoken": "moon", "phoneme_similarity": 1.0, "error_type": "correct"}] * 4,
+        "accuracy": round(rng.random(), 3),
+        "meta": {},
+    }
+
+
+async def run_mode(mode, args):
+    rng = random.Random(args.seed)
+    client = FakeMotorClient(rtt_ms=args.rtt_ms)
+    db = _PooledDB(client["lexilift_bench"], args.pool_size, args.per_doc_us / 1e6)
+    buffer = WriteBehindBuffer(
+        get_db=lambda: db,
+        max_batch=args.max_batch,
+        max_delay_ms=args.max_delay_ms,
+        durable=(mode == "durable"),
+    )
+
+    async def submit():
+        doc = session_doc(rng)
+        t0 = time.perf_counter()
+        if mode == "direct":
+            await db["sessions"].insert_one(doc)
+        else:
+            await buffer.insert("sessions", doc)
+        return time.perf_counter() - t0
+
+    latencies = []
+    t_start = time.perf_counter()
+    for _ in range(args.bursts):
+        latencies += await asyncio.gather(*[submit() for _ in range(args.clients)])
+        await asyncio.sleep(args.burst_gap_ms / 1000.0)
+    await buffer.flush_all()
+    elapsed = time.perf_counter() - t_start - args.bursts * args.burst_gap_ms / 1000.0
+
+    latencies.sort()
+    round_trips = client.stats.as_dict()
+    stored = await client["lexilift_bench"]["sessions"].count_documents({})
+    return {
+        "submits": len(latencies),
+        "stored": stored,
+        "round_trips": round_trips,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "busy_s": round(elapsed, 3),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write-behind insert benchmark")
+    ap.add_argument("--clients", type=int, default=300, help="simultaneous submits per burst")
+    ap.add_argument("--bursts", type=int, default=5)
+    ap.add_argument("--burst-gap-ms", type=float, default=200)
+    ap.add_argument("--rtt-ms", type=float, default=2.0)
+    ap.add_argument("--pool-size", type=int, default=10)
+    ap.add_argument("--per-doc-us", type=float, default=50)
+    ap.add_argument("--max-batch", type=int, default=100)
+    ap.add_argument("--max-delay-ms", type=float, default=20)
+    ap.add_argument("--modes", default="direct,durable,buffered")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    results = {mode: asyncio.run(run_mode(mode, args)) for mode in args.modes.split(",")}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
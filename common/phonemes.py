@@ -0,0 +1,96 @@
+# common/phonemes.py
+"""
+Shared phoneme inventory (espeak en-us IPA, no stress marks).
+
+tokenize() splits a phoneme string as stored in sessions ("ʃɪp", "tʃɜːtʃ")
+into phonemes by longest match, and PHONEME_COLORS gives every phoneme one
+fixed UI color, grouped by sound class, so a sound has the same color in
+every word. CONFUSABLE_PAIRS (b/d, p/q, m/n, ...) never share a color; this is
+checked at import.
+"""
+from functools import lru_cache
+from itertools import combinations
+
+# sound class -> (phonemes, palette)
+PHONEME_CLASSES = {
+    # one color per stop, no cycling: b, d, p and q (/k/) are the letters most often mixed up
+    "stop": (
+        ["p", "b", "t", "d", "k", "ɡ", "ɾ", "ʔ"],
+        ["#4F46E5", "#2563EB", "#0EA5E9", "#7C3AED", "#1E3A8A", "#A78BFA", "#60A5FA", "#64748B"],
+    ),
+    "fricative": (
+        ["f", "v", "θ", "ð", "s", "z", "ʃ", "ʒ", "h", "tʃ", "dʒ", "x"],
+        ["#10B981", "#059669", "#65A30D", "#0D9488", "#16A34A"],
+    ),
+    "nasal": (
+        ["m", "n", "ŋ"],
+        ["#9333EA", "#C026D3", "#A855F7"],
+    ),
+    "approximant": (
+        ["l", "ɹ", "w", "j"],
+        ["#0891B2", "#06B6D4", "#0284C7", "#14B8A6"],
+    ),
+    "short_vowel": (
+        ["ɪ", "ɛ", "æ", "ɑ", "ɒ", "ʌ", "ʊ", "ə", "ɐ", "ᵻ", "i", "u", "e", "o", "a", "ɔ", "ɜ"],
+        ["#FB923C", "#F59E0B", "#EA580C", "#D97706"],
+    ),
+    "long_vowel": (
+        ["iː", "uː", "ɑː", "ɔː", "ɜː", "ɚ", "oː", "eː"],
+        ["#EF4444", "#DC2626", "#F43F5E", "#E11D48"],
+    ),
+    "diphthong": (
+        ["eɪ", "aɪ", "ɔɪ", "aʊ", "oʊ", "ɪə", "eə", "ʊə", "ɑːɹ", "ɔːɹ", "ɪɹ", "ɛɹ", "ʊɹ", "oːɹ", "aɪɚ", "aɪə", "aʊɚ"],
+        ["#DB2777", "#BE185D", "#EC4899", "#F472B6"],
+    ),
+}
+
+SILENT_COLOR = "#9CA3AF"   # letters with no sound of their own (silent e, gh in "night")
+UNKNOWN_COLOR = "#6B7280"
+
+PHONEME_CLASS = {}
+PHONEME_COLORS = {}
+for _cls, (_phones, _palette) in PHONEME_CLASSES.items():
+    for _i, _p in enumerate(_phones):
+        PHONEME_CLASS[_p] = _cls
+        PHONEME_COLORS[_p] = _palette[_i % len(_palette)]
+
+# sounds whose letters children commonly confuse (mirror letters, near neighbours)
+CONFUSABLE_PAIRS = tuple(combinations(["p", "b", "t", "d", "k", "ɡ"], 2)) + (
+    ("m", "n"), ("n", "ŋ"), ("f", "v"), ("f", "θ"), ("θ", "ð"), ("s", "z"), ("s", "ʃ"),
+    ("ʃ", "tʃ"), ("tʃ", "dʒ"), ("w", "m"), ("l", "ɹ"), ("ɪ", "ɛ"), ("æ", "ɛ"), ("ʌ", "ʊ"),
+)
+for _a, _b in CONFUSABLE_PAIRS:
+    if PHONEME_COLORS[_a] == PHONEME_COLORS[_b]:
+        raise ValueError(f"phonemes {_a} and {_b} share color {PHONEME_COLORS[_a]}")
+
+INVENTORY = tuple(sorted(PHONEME_COLORS, key=len, reverse=True))
+_MAX_LEN = max(len(p) for p in INVENTORY)
+
+# characters espeak may emit that carry no sound of their own
+_IGNORED = {"ˈ", "ˌ", " ", "-", "|", "̩"}
+_NORMALIZE = {"g": "ɡ", "r": "ɹ"}
+
+
+@lru_cache(maxsize=50_000)
+def tokenize(phoneme_string):
+    """'ʃɪp' -> ('ʃ', 'ɪ', 'p'); unknown symbols become one-character tokens."""
+    s = "".join(_NORMALIZE.get(c, c) for c in phoneme_string or "" if c not in _IGNORED)
+    out, i = [], 0
+    while i < len(s):
+        for n in range(min(_MAX_LEN, len(s) - i), 0, -1):
+            if s[i:i + n] in PHONEME_COLORS:
+                out.append(s[i:i + n])
+                i += n
+                break
+        else:
+            out.append(s[i])
+            i += 1
+    return tuple(out)
+
+
+def color_of(phoneme):
+    color = PHONEME_COLORS.get(_NORMALIZE.get(phoneme, phoneme))
+    if color is None and phoneme:
+        # e.g. an r-coloured or lengthened vowel missing from the table: use its first sound
+        color = PHONEME_COLORS.get(tokenize(phoneme)[0])
+    return color or UNKNOWN_COLOR
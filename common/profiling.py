@@ -0,0 +1,322 @@
+# common/profiling.py
+"""
+On-demand sampling profiler and slow-request capture.
+
+A single background thread samples every thread's Python stack (via
+sys._current_frames) only while something needs it:
+  - an admin-started profiling session (for N seconds, optionally only while
+    requests under a given path are in flight), or
+  - a request that has been running for more than half the slow threshold.
+
+Samples are stored as folded stacks ("frame;frame;frame count"), the input
+format of flamegraph.pl and speedscope. Requests that end up slower than
+SLOW_REQUEST_MS are kept, with their stage timings, in a ring buffer.
+"""
+import os
+import sys
+import time
+import uuid
+import secrets
+import threading
+from collections import Counter, deque
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from common.metrics import stage_sink
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "2000"))
+SLOW_REQUEST_KEEP = int(os.getenv("SLOW_REQUEST_KEEP", "20"))
+MAX_STACK_DEPTH = 64
+
+# leaf frames of threads that are just waiting; not worth a sample
+_IDLE_LEAVES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+
+
+def _folded_stack(frame):
+    parts = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+def _is_idle(frame):
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+
+def folded_text(samples: Counter):
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class _InFlight:
+    __slots__ = ("id", "method", "path", "started", "stages", "samples")
+
+    def __init__(self, method, path):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.stages = []
+        self.samples = Counter()
+
+
+class Profiler:
+    def __init__(self, interval_ms=PROFILE_SAMPLE_INTERVAL_MS, slow_ms=SLOW_REQUEST_MS, keep=SLOW_REQUEST_KEEP):
+        self.interval = interval_ms / 1000.0
+        self.slow_s = slow_ms / 1000.0
+        self.slow_requests = deque(maxlen=keep)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        # admin session
+        self.session = None
+        self.last_session = None
+
+    # --- sampler thread (started lazily, so forked workers each get their own) ---
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                slow = [r for r in self._inflight.values() if now - r.started > self.slow_s / 2]
+                session = self.session
+                if session is not None and time.time() > session["until"]:
+                    session["running"] = False
+                    self.last_session, self.session, session = session, None, None
+                if session is not None and session["path"]:
+                    if not any(r.path.startswith(session["path"]) for r in self._inflight.values()):
+                        session = None
+            if not slow and session is None:
+                continue
+
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me or _is_idle(frame):
+                    continue
+                stacks.append(f"{names.get(ident, ident)};{_folded_stack(frame)}")
+
+            with self._lock:
+                # requests that finished meanwhile have already handed off their samples
+                slow = [r for r in slow if r.id in self._inflight]
+                for stack in stacks:
+                    for r in slow:
+                        r.samples[stack] += 1
+                    if session is not None:
+                        session["samples"][stack] += 1
+                if session is not None:
+                    session["ticks"] += 1
+
+    # --- request tracking ---
+    def request_started(self, method, path):
+        self._ensure_thread()
+        r = _InFlight(method, path)
+        with self._lock:
+            self._inflight[r.id] = r
+        return r
+
+    def request_finished(self, r, status):
+        duration = time.perf_counter() - r.started
+        with self._lock:
+            self._inflight.pop(r.id, None)
+            # the sampler only writes to requests in _inflight, so this copy is final
+            samples = Counter(r.samples) if duration >= self.slow_s else None
+        if duration < self.slow_s:
+            return
+        self.slow_requests.append({
+            "id": r.id,
+            "method": r.method,
+            "path": r.path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 1),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "stages": [{"stage": s, "detail": d, "ms": round(sec * 1000, 2)} for s, d, sec in r.stages],
+            "samples": samples,
+        })
+
+    # --- admin session ---
+    def start_session(self, seconds, path=None):
+        self._ensure_thread()
+        with self._lock:
+            if self.session is not None:
+                raise HTTPException(409, "A profiling session is already running")
+            self.session = {
+                "id": uuid.uuid4().hex[:12],
+                "path": path,
+                "started_at": time.time(),
+                "until": time.time() + seconds,
+                "running": True,
+                "ticks": 0,
+                "samples": Counter(),
+            }
+            return self.session["id"]
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """Tracks in-flight requests and collects their stage timings for slow-request capture."""
+
+    def __init__(self, app, profiler=profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        r = self.profiler.request_started(scope.get("method", ""), scope.get("path", ""))
+        token = stage_sink.set(r.stages)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stage_sink.reset(token)
+            self.profiler.request_finished(r, status["code"])
+
+
+# -----------------------------------------------------------
+# 🔒 Admin endpoints
+# -----------------------------------------------------------
+def require_admin(x_admin_token: str = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(404, "Not found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(403, "Admin token required")
+
+
+admin_router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+class ProfileStarted(BaseModel):
+    session_id: str
+    seconds: float
+    path: Optional[str] = None
+
+
+class SessionSummary(BaseModel):
+    id: str
+    path: Optional[str] = None
+    started_at: float
+    until: float
+    running: bool
+    ticks: int
+    stacks: int
+
+
+class ProfileStatus(BaseModel):
+    running: Optional[SessionSummary] = None
+    last: Optional[SessionSummary] = None
+
+
+class StageTiming(BaseModel):
+    stage: str
+    detail: Optional[str] = None
+    ms: float
+
+
+class SlowRequest(BaseModel):
+    id: str
+    method: str
+    path: str
+    status: Optional[int] = None
+    duration_ms: float
+    finished_at: str
+    stacks: int
+
+
+class SlowRequestDetail(SlowRequest):
+    stages: List[StageTiming]
+
+
+class SlowRequestsResponse(BaseModel):
+    threshold_ms: float
+    requests: List[SlowRequest]
+
+
+def _session_summary(s):
+    if s is None:
+        return None
+    return {k: v for k, v in s.items() if k != "samples"} | {"stacks": len(s["samples"])}
+
+
+@admin_router.post("/profile/start", response_model=ProfileStarted)
+async def start_profile(seconds: float = 10.0, path: str = None):
+    """Samples all threads for `seconds` (max 300), or only while requests under `path` are in flight."""
+    seconds = max(0.1, min(seconds, 300.0))
+    session_id = profiler.start_session(seconds, path)
+    return {"session_id": session_id, "seconds": seconds, "path": path}
+
+
+@admin_router.get("/profile", response_model=ProfileStatus)
+async def profile_status():
+    return {"running": _session_summary(profiler.session), "last": _session_summary(profiler.last_session)}
+
+
+@admin_router.get("/profile/download", response_class=PlainTextResponse)
+async def profile_download():
+    """Folded stacks of the last finished session (flamegraph.pl / speedscope input)."""
+    s = profiler.last_session
+    if s is None:
+        raise HTTPException(404, "No finished profiling session")
+    return PlainTextResponse(
+        folded_text(s["samples"]),
+        headers={"Content-Disposition": f'attachment; filename="profile-{s["id"]}.folded"'},
+    )
+
+
+@admin_router.get("/slow_requests", response_model=SlowRequestsResponse)
+async def slow_requests():
+    return {
+        "threshold_ms": profiler.slow_s * 1000,
+        "requests": [
+            {k: v for k, v in r.items() if k not in ("samples", "stages")} | {"stacks": len(r["samples"])}
+            for r in reversed(profiler.slow_requests)
+        ],
+    }
+
+
+def _find_slow(request_id):
+    for r in profiler.slow_requests:
+        if r["id"] == request_id:
+            return r
+    raise HTTPException(404, "Slow request not found (it may have rotated out)")
+
+
+@admin_router.get("/slow_requests/{request_id}", response_model=SlowRequestDetail)
+async def slow_request_detail(request_id: str):
+    r = _find_slow(request_id)
+    return {k: v for k, v in r.items() if k != "samples"} | {"stacks": len(r["samples"])}
+
+
+@admin_router.get("/slow_requests/{request_id}/folded", response_class=PlainTextResponse)
+async def slow_request_folded(request_id: str):
+    r = _find_slow(request_id)
+    return PlainTextResponse(
+        folded_text(r["samples"]),
+        headers={"Content-Disposition": f'attachment; filename="slow-{request_id}.folded"'},
+    )
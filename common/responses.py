@@ -0,0 +1,47 @@
+# common/responses.py
+"""
+Fast JSON response class for both FastAPI apps.
+
+orjson serializes datetimes natively; ObjectId (and other bson types) are
+handled by _default, so raw Mongo documents can be returned without
+per-document conversion loops.
+"""
+import decimal
+import orjson
+from fastapi.responses import JSONResponse
+
+from common.metrics import span
+
+try:
+    from bson import ObjectId, Decimal128
+except ImportError:  # AI service can run without pymongo installed
+    ObjectId = Decimal128 = None
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    if ObjectId is not None:
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        if isinstance(obj, Decimal128):
+            return float(obj.to_decimal())
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        with span("http.encode_json"):
+            return dumps(content)